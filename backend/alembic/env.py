@@ -27,6 +27,12 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Skip per-column unique indexes created at runtime by the list service"""
+    if type_ == 'index' and name and name.startswith('uq_items_col_'):
+        return False
+    return True
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
@@ -35,6 +41,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -50,7 +57,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,42 @@
+"""add list item_count counter
+
+Revision ID: 5p6q7r8s9t0u
+Revises: 4k5l6m7n8o9p
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5p6q7r8s9t0u'
+down_revision = '4k5l6m7n8o9p'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Maintained count of non-archived items, so unfiltered listings never need COUNT(*)
+    op.add_column('lists', sa.Column('item_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from existing rows
+    op.execute(
+        """
+        UPDATE lists SET item_count = counts.n
+        FROM (
+            SELECT list_id, COUNT(*) AS n
+            FROM items
+            WHERE archived_at IS NULL
+            GROUP BY list_id
+        ) AS counts
+        WHERE lists.id = counts.list_id
+        """
+    )
+
+    # Partial index so exact filtered counts only touch live rows
+    op.execute('CREATE INDEX idx_items_list_live ON items (list_id) WHERE archived_at IS NULL')
+
+
+def downgrade():
+    op.drop_index('idx_items_list_live', table_name='items')
+    op.drop_column('lists', 'item_count')
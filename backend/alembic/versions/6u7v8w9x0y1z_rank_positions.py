@@ -0,0 +1,73 @@
+"""switch item and list positions to lexicographic rank keys
+
+Revision ID: 6u7v8w9x0y1z
+Revises: 5p6q7r8s9t0u
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '6u7v8w9x0y1z'
+down_revision = '5p6q7r8s9t0u'
+branch_labels = None
+depends_on = None
+
+# Existing rows get fixed-width hex keys (a subset of the base-62 rank alphabet)
+# spaced 16**5 apart, with trailing zeros trimmed so string order == rank order.
+RANK_EXPR = "rtrim(lpad(to_hex(row_number() OVER (PARTITION BY {scope} ORDER BY position NULLS LAST, created_at) * 1048576), 12, '0'), '0')"
+
+
+def _to_rank(table, scope):
+    op.add_column(table, sa.Column('position_rank', sa.Text(collation='C'), nullable=True))
+    op.execute(
+        f"""
+        UPDATE {table} SET position_rank = ranked.rank
+        FROM (SELECT id, {RANK_EXPR.format(scope=scope)} AS rank FROM {table}) AS ranked
+        WHERE {table}.id = ranked.id
+        """
+    )
+    op.drop_column(table, 'position')
+    op.alter_column(table, 'position_rank', new_column_name='position')
+
+
+def _to_integer(table, scope):
+    op.add_column(table, sa.Column('position_int', sa.Integer(), nullable=True))
+    op.execute(
+        f"""
+        UPDATE {table} SET position_int = ranked.n
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY {scope} ORDER BY position, created_at) AS n
+            FROM {table}
+        ) AS ranked
+        WHERE {table}.id = ranked.id
+        """
+    )
+    op.drop_column(table, 'position')
+    op.alter_column(table, 'position_int', new_column_name='position')
+
+
+def upgrade():
+    _to_rank('items', 'list_id')
+    _to_rank('lists', 'workspace_id')
+
+    # Ordered listings become index scans on (scope, position)
+    op.execute(
+        'CREATE INDEX idx_items_list_position ON items (list_id, position, created_at) '
+        'WHERE archived_at IS NULL'
+    )
+    op.execute(
+        'CREATE INDEX idx_lists_workspace_position ON lists (workspace_id, position, created_at) '
+        'WHERE archived_at IS NULL'
+    )
+    # Superseded by idx_items_list_position, which has the same leading column and predicate
+    op.drop_index('idx_items_list_live', table_name='items')
+
+
+def downgrade():
+    op.execute('CREATE INDEX idx_items_list_live ON items (list_id) WHERE archived_at IS NULL')
+    op.drop_index('idx_lists_workspace_position', table_name='lists')
+    op.drop_index('idx_items_list_position', table_name='items')
+    _to_integer('lists', 'workspace_id')
+    _to_integer('items', 'list_id')
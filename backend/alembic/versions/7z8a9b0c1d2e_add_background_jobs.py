@@ -0,0 +1,51 @@
+"""add background_jobs table
+
+Revision ID: 7z8a9b0c1d2e
+Revises: 6u7v8w9x0y1z
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '7z8a9b0c1d2e'
+down_revision = '6u7v8w9x0y1z'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'background_jobs',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('workspace_id', sa.UUID(), nullable=False),
+        sa.Column('kind', sa.Text(), nullable=False),
+        sa.Column('status', sa.Enum('queued', 'running', 'completed', 'failed', 'cancelled', name='job_status'), nullable=False, server_default='queued'),
+        sa.Column('params', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('progress', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total', sa.Integer(), nullable=True),
+        sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.UUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_jobs_workspace_created', 'background_jobs', ['workspace_id', sa.text('created_at DESC')])
+    # Small partial index for "is anything pending?" checks and queue depth
+    op.execute(
+        "CREATE INDEX idx_jobs_active ON background_jobs (kind, workspace_id) "
+        "WHERE status IN ('queued', 'running')"
+    )
+
+
+def downgrade():
+    op.drop_index('idx_jobs_active', table_name='background_jobs')
+    op.drop_index('idx_jobs_workspace_created', table_name='background_jobs')
+    op.drop_table('background_jobs')
+    op.execute("DROP TYPE IF EXISTS job_status")
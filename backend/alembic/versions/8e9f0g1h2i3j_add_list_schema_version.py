@@ -0,0 +1,24 @@
+"""add list schema_version
+
+Revision ID: 8e9f0g1h2i3j
+Revises: 7z8a9b0c1d2e
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8e9f0g1h2i3j'
+down_revision = '7z8a9b0c1d2e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bumped on every column change; keys the compiled validator cache
+    op.add_column('lists', sa.Column('schema_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('lists', 'schema_version')
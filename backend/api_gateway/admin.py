@@ -0,0 +1,78 @@
+"""Operator endpoints, protected by ADMIN_TOKEN (disabled when it is unset)"""
+import hmac
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from shared.auth import invalidate_user
+from shared.database import get_db
+from shared.models import AuditLog, User, WorkspaceMembership
+from shared.settings import get_settings
+from shared.slow_queries import slow_log
+
+router = APIRouter()
+
+
+def require_bearer_token(authorization: Optional[str], token: Optional[str], detail: str) -> None:
+    """403 unless the Authorization header is `Bearer <token>`; always 403 while token is unset"""
+    if not token or not hmac.compare_digest((authorization or '').encode(), f'Bearer {token}'.encode()):
+        raise HTTPException(status_code=403, detail=detail)
+
+
+def _require_admin(authorization: Optional[str]) -> None:
+    require_bearer_token(authorization, get_settings().admin_token, "Admin access denied")
+
+
+@router.get("/admin/slow-queries", include_in_schema=False)
+def get_slow_queries(
+    route: Optional[str] = Query(None, description='"METHOD /route/{template}"; omit for every route'),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Slow statements recorded by this worker, slowest first, with their
+    parameter shapes, latest EXPLAIN plans and plan changes
+    """
+    _require_admin(authorization)
+    return {'routes': slow_log.routes(), 'statements': slow_log.statements(route)}
+
+
+@router.post("/admin/users/{user_id}/deactivate", include_in_schema=False)
+def deactivate_user(user_id: UUID, authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Deactivate a user; every worker stops accepting their tokens once this commits"""
+    return _set_active(db, user_id, False, authorization)
+
+
+@router.post("/admin/users/{user_id}/activate", include_in_schema=False)
+def activate_user(user_id: UUID, authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Reactivate a deactivated user; their tokens are accepted again once this commits"""
+    return _set_active(db, user_id, True, authorization)
+
+
+def _set_active(db: Session, user_id: UUID, active: bool, authorization: Optional[str]) -> dict:
+    _require_admin(authorization)
+    user = db.get(User, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    user.is_active = active
+    # Audit logs are per workspace: record it in every workspace the user belongs to
+    workspace_ids = db.execute(
+        select(WorkspaceMembership.workspace_id).where(WorkspaceMembership.user_id == user.id)
+    ).scalars().all()
+    db.add_all([
+        AuditLog(
+            workspace_id=workspace_id,
+            user_id=None,  # an operator, not a user
+            action='user.activated' if active else 'user.deactivated',
+            entity_type='user',
+            entity_id=user.id,
+            details={'email': user.email}
+        )
+        for workspace_id in workspace_ids
+    ])
+    # Evict the cached active status in every process
+    invalidate_user(db, user.id)
+    db.commit()
+    return {'id': str(user.id), 'is_active': active}
@@ -1,55 +1,60 @@
-from fastapi import FastAPI
+"""The API process.
+
+create_app() builds the FastAPI app; importing this module builds one as
+`app` for `uvicorn api_gateway.main:app` and gunicorn. Nothing here opens a
+connection or requires configuration: settings are read inside create_app()
+and engines are created by the first session that needs one. A worker's boot
+is therefore just importing code, which `gunicorn --preload` does once in
+the master and shares with every forked worker (`python -m benchmarks
+startup` measures it).
+"""
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-import os
 
-app = FastAPI(title="Customer Database API", version="0.1.0")
+from shared.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
 
 # CORS - allow frontend origins
-allowed_origins = [
+DEFAULT_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # Local development
     "https://customer-database-system.vercel.app",  # Production frontend (Vercel)
 ]
 
-# Add FRONTEND_URL from environment if set
-frontend_url = os.getenv("FRONTEND_URL", "").strip()
-if frontend_url and frontend_url not in allowed_origins:
-    allowed_origins.append(frontend_url)
-
-# Remove empty strings
-allowed_origins = [origin for origin in allowed_origins if origin]
-
-print("=" * 60)
-print(f"🚀 Starting Customer Database API")
-print(f"📍 CORS allowed origins: {allowed_origins}")
-print(f"🔑 JWT_SECRET_KEY: {'✅ Set' if os.getenv('JWT_SECRET_KEY') else '❌ NOT SET'}")
-print(f"🗄️  DATABASE_URL: {'✅ Set' if os.getenv('DATABASE_URL') else '❌ NOT SET'}")
-print("=" * 60)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allowed_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-@app.get("/health")
+router = APIRouter()
+
+
+def allowed_origins(settings: Settings):
+    """Default origins plus FRONTEND_URL, when set"""
+    origins = list(DEFAULT_ALLOWED_ORIGINS)
+    frontend_url = settings.frontend_url.strip()
+    if frontend_url and frontend_url not in origins:
+        origins.append(frontend_url)
+    # Remove empty strings
+    return [origin for origin in origins if origin]
+
+
+@router.get("/health")
 async def health():
     """Basic health check"""
     return {"status": "ok", "service": "api"}
 
-@app.get("/health/full")
+@router.get("/health/full")
 async def health_full():
     """Comprehensive health check - tests database connection"""
-    from shared.database import SessionLocal
+    from shared.database import SessionLocal, get_read_engine
     from sqlalchemy import text
-    
+
     health_status = {
         "status": "ok",
         "service": "api",
         "checks": {}
     }
-    
+
     # Check database connection
     try:
         db = SessionLocal()
@@ -59,28 +64,138 @@ async def health_full():
     except Exception as e:
         health_status["status"] = "degraded"
         health_status["checks"]["database"] = {"status": "error", "message": str(e)}
-    
+
+    # Check the read replica, when one is configured
+    try:
+        read_engine = get_read_engine()
+    except ValueError:
+        read_engine = None
+    if read_engine is not None:
+        try:
+            with read_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            health_status["checks"]["read_replica"] = {"status": "ok", "message": "Connected"}
+        except Exception as e:
+            health_status["status"] = "degraded"
+            health_status["checks"]["read_replica"] = {"status": "error", "message": str(e)}
+
+    # Read cache hit/miss counters for this worker
+    from shared.cache import cache
+    from shared.invalidation import listener_connected
+    health_status["checks"]["cache"] = {**cache.stats(), "invalidation_listener": listener_connected()}
+
     return health_status
 
-@app.get("/")
+@router.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus metrics for this worker; set METRICS_TOKEN to require a bearer token"""
+    from shared.metrics import render
+    token = get_settings().metrics_token
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/")
 async def root():
     return {"message": "Customer Database API v0.1.0"}
 
-# Include routers
-from services.auth.routes import router as auth_router
-from services.workspace.routes import router as workspace_router
-from services.list.routes import router as list_router
-from services.item.routes import router as item_router
-from services.relationship.routes import router as relationship_router
-from services.audit.routes import router as audit_router
-
-app.include_router(auth_router, prefix="/api/v1", tags=["auth"])
-app.include_router(workspace_router, prefix="/api/v1", tags=["workspaces"])
-app.include_router(list_router, prefix="/api/v1", tags=["lists"])
-app.include_router(item_router, prefix="/api/v1", tags=["items"])
-app.include_router(relationship_router, prefix="/api/v1", tags=["relationships"])
-app.include_router(audit_router, prefix="/api/v1", tags=["audit"])
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Build the API app. Reads settings, imports the services; connects to nothing."""
+    settings = settings or get_settings()
+    app = FastAPI(title="Customer Database API", version="0.1.0")
+    origins = allowed_origins(settings)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Total-Count", "X-Total-Count-Exact"],
+    )
+
+    # Query counts, budgets and N+1 warnings per request (see shared/query_stats.py)
+    from shared.query_stats import QueryStatsMiddleware
+    app.add_middleware(QueryStatsMiddleware)
+
+    # Request latency and in-flight requests for /metrics
+    from shared.metrics import MetricsMiddleware
+    app.add_middleware(MetricsMiddleware)
+
+    # Opt-in sampling profiler; not installed at all unless configured
+    from api_gateway.profiler import profiling_enabled
+    if profiling_enabled():
+        from api_gateway.profiler import ProfilerMiddleware, PROFILE_DUMP_DIR, profiler, router as profiler_router
+        app.add_middleware(ProfilerMiddleware)
+        app.include_router(profiler_router)
+
+        def dump_profiles():
+            """Write collected profiles to PROFILE_DUMP_DIR, when set"""
+            if PROFILE_DUMP_DIR:
+                profiler.dump(PROFILE_DUMP_DIR)
+
+        app.add_event_handler("shutdown", dump_profiles)
+
+    def announce():
+        logger.info(
+            "Starting Customer Database API (CORS origins %s, JWT_SECRET_KEY %s, DATABASE_URL %s)",
+            origins,
+            "set" if settings.jwt_secret_is_set else "NOT SET",
+            "set" if settings.database_url else "NOT SET"
+        )
+
+    def start_invalidation_listener():
+        """Listen for cache invalidations from other workers and instances"""
+        if settings.cache_invalidation_listener:
+            from shared.database import get_engine
+            from shared.invalidation import start_listener
+            start_listener(get_engine())
+
+    def warm_up():
+        """Connect and compile before uvicorn accepts this worker's first request"""
+        from api_gateway.warmup import warm_up
+        warm_up(app)
+
+    def release_connections():
+        """Runs after in-flight requests drained: stop listening, close the pools"""
+        from shared.database import dispose_engines
+        from shared.invalidation import stop_listener
+        stop_listener()
+        dispose_engines()
+
+    app.add_event_handler("startup", announce)
+    app.add_event_handler("startup", start_invalidation_listener)
+    app.add_event_handler("startup", warm_up)
+    app.add_event_handler("shutdown", release_connections)
+
+    app.include_router(router)
+
+    # Include routers
+    from services.auth.routes import router as auth_router
+    from services.workspace.routes import router as workspace_router
+    from services.list.routes import router as list_router
+    from services.item.routes import router as item_router
+    from services.relationship.routes import router as relationship_router
+    from services.audit.routes import router as audit_router
+    from services.job.routes import router as job_router
+
+    app.include_router(auth_router, prefix="/api/v1", tags=["auth"])
+    app.include_router(workspace_router, prefix="/api/v1", tags=["workspaces"])
+    app.include_router(list_router, prefix="/api/v1", tags=["lists"])
+    app.include_router(item_router, prefix="/api/v1", tags=["items"])
+    app.include_router(relationship_router, prefix="/api/v1", tags=["relationships"])
+    app.include_router(audit_router, prefix="/api/v1", tags=["audit"])
+    app.include_router(job_router, prefix="/api/v1", tags=["jobs"])
+
+    from api_gateway.admin import router as admin_router
+    app.include_router(admin_router)
+
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
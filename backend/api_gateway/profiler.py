@@ -0,0 +1,229 @@
+"""Opt-in sampling profiler for finding where a slow route spends its time.
+
+ProfilerMiddleware profiles PROFILE_SAMPLE_RATE of requests (0..1), and any
+request carrying `X-Profile: <PROFILER_TOKEN>`. While at least one profiled
+request is in flight a daemon thread samples the Python stacks of the
+threads working for them every PROFILE_INTERVAL_MS and aggregates the
+stacks per route template in the "folded" format used by flamegraph.pl and
+speedscope (`frame;frame;frame count`).
+
+A request's work runs on the event loop and in threadpool workers; a sampled
+thread is attributed to a request through the contextvars.Context its
+current callback runs in (asyncio handles and anyio worker threads both
+keep it in a local), so concurrent unprofiled requests are not counted.
+
+GET /admin/profiles lists the routes profiled so far and
+GET /admin/profiles/folded?route=... returns one route's stacks (both need
+`Authorization: Bearer <PROFILER_TOKEN>`). With PROFILE_DUMP_DIR set the
+stacks are also written there at shutdown.
+
+When neither PROFILE_SAMPLE_RATE nor PROFILER_TOKEN is set the middleware is
+not installed at all.
+"""
+import contextvars
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from api_gateway.admin import require_bearer_token
+
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILER_TOKEN = os.getenv('PROFILER_TOKEN') or None
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '5'))
+PROFILE_DUMP_DIR = os.getenv('PROFILE_DUMP_DIR') or None
+PROFILE_HEADER = 'X-Profile'
+# Distinct stacks kept per route; rarer stacks beyond it are dropped
+MAX_STACKS_PER_ROUTE = 5000
+MAX_DEPTH = 128
+
+# Frames whose locals hold the Context a thread is currently running in
+_CONTEXT_FRAMES = {'_run', 'run'}
+
+
+class _Samples:
+    """Stacks sampled for one profiled request"""
+
+    def __init__(self):
+        self.count = 0
+        self.stacks: Counter = Counter()
+
+
+# Samples of the profiled request owning the current context
+_profiled: contextvars.ContextVar[Optional[_Samples]] = contextvars.ContextVar('profiled', default=None)
+
+
+def profiling_enabled() -> bool:
+    return PROFILE_SAMPLE_RATE > 0 or PROFILER_TOKEN is not None
+
+
+class RouteProfile:
+    def __init__(self):
+        self.requests = 0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def add(self, samples: _Samples) -> None:
+        self.requests += 1
+        self.samples += samples.count
+        for stack, count in samples.stacks.items():
+            if stack in self.stacks or len(self.stacks) < MAX_STACKS_PER_ROUTE:
+                self.stacks[stack] += count
+
+    def folded(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads working for profiled requests"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self.routes: Dict[str, RouteProfile] = {}
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self) -> _Samples:
+        """Start sampling the current request (and everything it runs)"""
+        samples = _Samples()
+        _profiled.set(samples)
+        with self._lock:
+            self._active += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self._thread.start()
+            self._wake.notify()
+        return samples
+
+    def end(self, samples: _Samples, route: str) -> None:
+        """Stop sampling a request and add its stacks to its route's profile"""
+        with self._lock:
+            self._active -= 1
+            self.routes.setdefault(route, RouteProfile()).add(samples)
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                while self._active == 0:
+                    self._wake.wait()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != me:
+                    self._sample(frame)
+            time.sleep(self.interval)
+
+    def _sample(self, frame) -> None:
+        names: List[str] = []
+        samples = None
+        while frame is not None and len(names) < MAX_DEPTH:
+            code = frame.f_code
+            if samples is None and code.co_name in _CONTEXT_FRAMES:
+                samples = _samples_in(frame)
+            names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+            frame = frame.f_back
+        if samples is None:
+            return
+        stack = ';'.join(reversed(names))
+        with self._lock:
+            samples.count += 1
+            samples.stacks[stack] += 1
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                route: {'requests': p.requests, 'samples': p.samples, 'stacks': len(p.stacks)}
+                for route, p in self.routes.items()
+            }
+
+    def folded(self, route: str) -> Optional[str]:
+        with self._lock:
+            profile = self.routes.get(route)
+            return profile.folded() if profile is not None else None
+
+    def reset(self, route: Optional[str] = None) -> None:
+        with self._lock:
+            if route is None:
+                self.routes.clear()
+            else:
+                self.routes.pop(route, None)
+
+    def dump(self, directory: str) -> None:
+        """Write each route's folded stacks to <directory>/<METHOD_route>.folded"""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            profiles = {route: p.folded() for route, p in self.routes.items()}
+        for route, folded in profiles.items():
+            name = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_')
+            with open(os.path.join(directory, f'{name}.folded'), 'w') as f:
+                f.write(folded)
+
+
+def _samples_in(frame) -> Optional[_Samples]:
+    """The profiled request owning the Context a dispatching frame is running, if any"""
+    for value in frame.f_locals.values():
+        context = value if isinstance(value, contextvars.Context) else getattr(value, '_context', None)
+        if isinstance(context, contextvars.Context):
+            samples = context.get(_profiled)
+            if samples is not None:
+                return samples
+    return None
+
+
+profiler = SamplingProfiler()
+
+
+class ProfilerMiddleware(BaseHTTPMiddleware):
+    """Profiles a sample of requests, and requests carrying the profiling header"""
+
+    async def dispatch(self, request: Request, call_next):
+        requested = PROFILER_TOKEN is not None and request.headers.get(PROFILE_HEADER) == PROFILER_TOKEN
+        if not requested and (PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE):
+            return await call_next(request)
+
+        samples = profiler.begin()
+        try:
+            return await call_next(request)
+        finally:
+            route = request.scope.get('route')
+            profiler.end(samples, f"{request.method} {getattr(route, 'path', '<unmatched>')}")
+
+
+router = APIRouter()
+
+
+def _require_token(authorization: Optional[str]) -> None:
+    require_bearer_token(authorization, PROFILER_TOKEN, "Profiler access denied")
+
+
+@router.get("/admin/profiles", include_in_schema=False)
+def list_profiles(authorization: Optional[str] = Header(None)):
+    """Routes profiled so far, with request and sample counts"""
+    _require_token(authorization)
+    return profiler.summary()
+
+
+@router.get("/admin/profiles/folded", include_in_schema=False, response_class=PlainTextResponse)
+def get_folded_profile(
+    route: str = Query(..., description='"METHOD /route/{template}" as listed by /admin/profiles'),
+    reset: bool = Query(False),
+    authorization: Optional[str] = Header(None)
+):
+    """One route's folded stacks, ready for flamegraph.pl or speedscope"""
+    _require_token(authorization)
+    folded = profiler.folded(route)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="No samples for this route")
+    if reset:
+        profiler.reset(route)
+    return folded
@@ -0,0 +1,77 @@
+"""Production serving: worker sizing, warm-up and graceful drain.
+
+gunicorn.conf.py runs the app as
+
+    gunicorn -c gunicorn.conf.py api_gateway.main:app
+
+with uvicorn workers (Worker below), --preload, and worker_count() workers:
+
+- Sizing: 2 x CPUs + 1 (CPUs from the cgroup quota when there is one, so a
+  container does not size itself for the host), capped so that workers x
+  (DB_POOL_SIZE + DB_MAX_OVERFLOW + 1 listener connection) stays within
+  DB_MAX_CONNECTIONS when that is set. WEB_CONCURRENCY overrides both.
+- Warm-up (api_gateway/warmup.py): the master runs warm_code() once before
+  forking, and each worker runs warm_up() before it accepts a connection.
+- Drain: on SIGTERM gunicorn stops accepting and each worker lets in-flight
+  requests finish for up to GRACEFUL_TIMEOUT seconds (less a margin for its
+  shutdown handlers, which stop the invalidation listener and close the
+  pools) before the master kills it.
+"""
+import logging
+import math
+import os
+from typing import Optional
+
+from uvicorn.workers import UvicornWorker
+
+from shared.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds of GRACEFUL_TIMEOUT kept for shutdown handlers after requests drain
+SHUTDOWN_MARGIN_SECONDS = 5
+
+
+def available_cpus() -> float:
+    """CPUs this process may use: the cgroup v2 quota if set, else its affinity"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def connections_per_worker(settings: Settings) -> int:
+    """Primary connections one worker may hold at peak"""
+    return settings.db_pool_size + settings.db_max_overflow + (1 if settings.cache_invalidation_listener else 0)
+
+
+def worker_count(settings: Optional[Settings] = None, cpus: Optional[float] = None) -> int:
+    """Workers to run: WEB_CONCURRENCY, else 2 x CPUs + 1 within the DB_MAX_CONNECTIONS budget"""
+    settings = settings or get_settings()
+    if settings.web_concurrency:
+        return settings.web_concurrency
+    workers = 2 * math.ceil(cpus if cpus is not None else available_cpus()) + 1
+    if settings.db_max_connections:
+        budget = settings.db_max_connections // connections_per_worker(settings)
+        if budget < 1:
+            logger.warning(
+                "DB_MAX_CONNECTIONS=%s does not cover one worker's pool (%s); running 1 worker",
+                settings.db_max_connections, connections_per_worker(settings)
+            )
+        workers = min(workers, budget)
+    return max(1, workers)
+
+
+class Worker(UvicornWorker):
+    """Uvicorn worker that drains within gunicorn's graceful timeout and still runs its shutdown handlers"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(self.cfg.graceful_timeout - SHUTDOWN_MARGIN_SECONDS, 1)
@@ -0,0 +1,90 @@
+"""Getting a worker ready before it takes traffic.
+
+The first requests a fresh worker serves would otherwise pay for mapper
+configuration, building the middleware stack, connecting to the database
+(including the dialect's first-connect queries) and compiling the SQL of
+the per-request lookups.
+
+- warm_code() does the part that needs no I/O. gunicorn.conf.py runs it in
+  the master under --preload, so every forked worker inherits the result.
+- warm_up() runs from each worker's startup handler, which uvicorn completes
+  before it accepts a connection: warm_code() (a no-op when inherited), then
+  DB_POOL_SIZE connections opened in parallel and left idle in the pool, then
+  the hot queries run once with an id that matches nothing. A database that
+  cannot be reached is logged; the worker still starts and /health answers.
+
+Set WARMUP=false to skip the database part (tests, no database).
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import UUID
+
+from shared.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Matches no row; hot queries run with it to compile without touching data
+NIL_UUID = UUID(int=0)
+
+
+def warm_code(app) -> None:
+    """Warm-up that needs no database; done in the master under --preload"""
+    from sqlalchemy.orm import configure_mappers
+    configure_mappers()
+    if app.middleware_stack is None:
+        app.middleware_stack = app.build_middleware_stack()
+    app.openapi()
+
+
+def warm_pool(engine, connections: int) -> int:
+    """Open `connections` pooled connections at once; returns how many opened"""
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        attempts = [executor.submit(engine.connect) for _ in range(connections)]
+    opened = [attempt.result() for attempt in attempts if attempt.exception() is None]
+    for connection in opened:
+        connection.close()  # back to the pool, still open
+    if not opened:
+        attempts[0].result()
+    return len(opened)
+
+
+def run_hot_queries() -> None:
+    """The lookups most requests make, once each, so their SQL is compiled and cached"""
+    from shared.auth import load_active_user, load_membership
+    from shared.database import SessionLocal
+    from shared.repository import item_repository
+    from services.item.service import count_list_items, get_item, get_list_items
+
+    db = SessionLocal()
+    try:
+        load_active_user(db, NIL_UUID)
+        load_membership(db, NIL_UUID, NIL_UUID)
+        item_repository(db).get_list(NIL_UUID)
+        get_item(db, NIL_UUID)
+        get_list_items(db, NIL_UUID, 100, 0)
+        count_list_items(db, NIL_UUID)
+        db.rollback()
+    finally:
+        db.close()
+
+
+def warm_up(app) -> None:
+    """Prepare this worker before it takes traffic; failures are logged, not fatal"""
+    from shared.database import get_engine, get_read_engine
+    settings = get_settings()
+    started = time.perf_counter()
+    warm_code(app)
+    if not settings.warmup:
+        return
+    try:
+        opened = warm_pool(get_engine(), settings.db_pool_size)
+        read_engine = get_read_engine()
+        if read_engine is not None:
+            warm_pool(read_engine, settings.db_read_pool_size or settings.db_pool_size)
+        run_hot_queries()
+    except Exception:
+        logger.warning("Worker warm-up could not reach the database", exc_info=True)
+        return
+    logger.info("Worker %s warm in %.0f ms (%s connections)", os.getpid(), (time.perf_counter() - started) * 1000, opened)
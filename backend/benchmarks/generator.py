@@ -0,0 +1,298 @@
+"""Deterministic benchmark data.
+
+generate(db, spec) fills an empty database with one benchmark workspace
+(identified by its seed) plus a few small ones:
+
+- users, all with the password BENCHMARK_PASSWORD, as workspace members
+- a "Contacts" list with typed columns and spec.items items whose JSONB
+  values look like real CRM data (skewed select values, sparse fields)
+- a "Companies" list, a many-to-many relationship from contacts to
+  companies and links for most contacts
+- comments on a slice of contacts and an audit history
+
+The same spec always produces the same ids and values, so runs on different
+commits (or machines) measure the same data.
+"""
+import random
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from shared.jwt_auth import get_password_hash
+from shared.models import (
+    User, Workspace, WorkspaceMembership, List as ListModel, Column_, Item,
+    Relationship, RelationshipLink, Comment, AuditLog
+)
+from shared.rank import rank_sequence
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+INSERT_BATCH_SIZE = 5000
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+FIRST_NAMES = ['Ava', 'Ben', 'Chloe', 'Dara', 'Eli', 'Fatima', 'Gabe', 'Hana', 'Ivan', 'Jia', 'Kofi', 'Lena',
+               'Mateo', 'Nia', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sam', 'Tariq', 'Uma', 'Vera', 'Wei', 'Yara']
+LAST_NAMES = ['Anders', 'Borg', 'Chen', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Haddad', 'Ito', 'Jensen', 'Khan',
+              'Lopez', 'Mensah', 'Novak', 'Okafor', 'Patel', 'Rossi', 'Silva', 'Tanaka', 'Ueda', 'Vogel', 'Wong']
+COMPANY_WORDS = ['Acme', 'Blue', 'Cedar', 'Delta', 'Echo', 'Forge', 'Granite', 'Harbor', 'Iron', 'Juniper',
+                 'Kite', 'Lumen', 'Maple', 'North', 'Orbit', 'Pine', 'Quartz', 'River', 'Summit', 'Tidal']
+COMPANY_SUFFIXES = ['Labs', 'Systems', 'Partners', 'Logistics', 'Health', 'Foods', 'Capital', 'Studio']
+# Skewed like a real pipeline: most contacts sit in early stages
+STAGES = [('lead', 40), ('qualified', 25), ('proposal', 15), ('negotiation', 8), ('won', 7), ('lost', 5)]
+COMMENT_PHRASES = ['Called, left a voicemail.', 'Sent the proposal.', 'Asked for a follow-up next week.',
+                   'Budget approved for Q3.', 'Needs sign-off from legal.', 'Intro call went well.']
+AUDIT_ACTIONS = ['item.create', 'item.update', 'item.move', 'comment.create', 'relationship.link']
+
+CONTACT_COLUMNS = [
+    ('email', 'Email', 'email', {}),
+    ('phone', 'Phone', 'phone', {}),
+    ('company', 'Company', 'text', {}),
+    ('stage', 'Stage', 'select', {'options': [stage for stage, _ in STAGES]}),
+    ('deal_size', 'Deal size', 'number', {}),
+    ('signed_on', 'Signed on', 'date', {}),
+    ('website', 'Website', 'url', {}),
+    ('active', 'Active', 'checkbox', {}),
+    ('notes', 'Notes', 'text', {}),
+]
+COMPANY_COLUMNS = [
+    ('industry', 'Industry', 'text', {}),
+    ('employees', 'Employees', 'number', {}),
+    ('website', 'Website', 'url', {}),
+]
+
+
+@dataclass
+class DatasetSpec:
+    seed: int = 42
+    users: int = 20
+    items: int = 100_000
+    companies: int = 10_000
+    # Share of contacts linked to a company, and companies per linked contact
+    link_ratio: float = 0.8
+    links_per_item: int = 1
+    comments: int = 20_000
+    audit_entries: int = 200_000
+    extra_workspaces: int = 5
+
+
+@dataclass
+class Dataset:
+    """Ids the scenarios need, reloadable with load_dataset()"""
+    spec: DatasetSpec
+    workspace_id: uuid.UUID
+    owner_id: uuid.UUID
+    owner_email: str
+    user_emails: List[str]
+    user_roles: Dict[str, str]
+    contacts_list_id: uuid.UUID
+    companies_list_id: uuid.UUID
+    relationship_id: uuid.UUID
+    contact_ids: List[uuid.UUID] = field(repr=False)
+    company_ids: List[uuid.UUID] = field(repr=False)
+
+    def summary(self) -> Dict[str, Any]:
+        return {'workspace_id': str(self.workspace_id), **asdict(self.spec)}
+
+
+def workspace_name(seed: int) -> str:
+    return f'Benchmark workspace (seed {seed})'
+
+
+class _Ids:
+    """Deterministic UUIDs"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def __call__(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int = INSERT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(db: Session, model, rows: Iterable[Dict[str, Any]]) -> None:
+    for batch in _batches(rows):
+        db.execute(insert(model.__table__), batch)
+
+
+def _company_name(rng: random.Random, i: int) -> str:
+    return f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)} {i}"
+
+
+def _contact_values(rng: random.Random, i: int, first: str, last: str, company: str) -> Dict[str, Any]:
+    stage = rng.choices([s for s, _ in STAGES], weights=[w for _, w in STAGES])[0]
+    values: Dict[str, Any] = {
+        'email': f'{first}.{last}.{i}@example.com'.lower(),
+        'company': company,
+        'stage': stage,
+        'active': rng.random() < 0.85,
+    }
+    # Sparse fields, as in real data
+    if rng.random() < 0.7:
+        values['phone'] = f'+1 555 {rng.randrange(1000):03d} {rng.randrange(10000):04d}'
+    if rng.random() < 0.6:
+        values['deal_size'] = round(rng.lognormvariate(9, 1.2), 2)
+    if stage == 'won':
+        values['signed_on'] = (date(2024, 1, 1) + timedelta(days=rng.randrange(600))).isoformat()
+    if rng.random() < 0.4:
+        values['website'] = f'https://{company.split()[0].lower()}{i}.example.com'
+    if rng.random() < 0.3:
+        values['notes'] = ' '.join(rng.choices(COMMENT_PHRASES, k=rng.randint(1, 3)))
+    return values
+
+
+def _columns(ids: _Ids, list_id: uuid.UUID, columns) -> Iterator[Dict[str, Any]]:
+    for position, (key, name, column_type, config) in enumerate(columns):
+        yield {'id': ids(), 'list_id': list_id, 'key': key, 'name': name, 'type': column_type,
+               'position': position, 'is_required': False, 'is_unique': False, 'config': config}
+
+
+def generate(db: Session, spec: DatasetSpec) -> Dataset:
+    """Insert the benchmark dataset for spec and commit"""
+    rng = random.Random(spec.seed)
+    ids = _Ids(rng)
+    password_hash = get_password_hash(BENCHMARK_PASSWORD)
+
+    user_ids = [ids() for _ in range(spec.users)]
+    user_emails = [f'bench{spec.seed}.user{i}@example.com' for i in range(spec.users)]
+    _insert(db, User, (
+        {'id': uid, 'email': email, 'password_hash': password_hash, 'full_name': f'Bench User {i}', 'is_active': True}
+        for i, (uid, email) in enumerate(zip(user_ids, user_emails))
+    ))
+
+    owner_id = user_ids[0]
+    workspace_id = ids()
+    workspaces = [{'id': workspace_id, 'name': workspace_name(spec.seed), 'created_by': owner_id, 'settings': {}}]
+    workspaces += [
+        {'id': ids(), 'name': f'Side workspace {i} (seed {spec.seed})', 'created_by': owner_id, 'settings': {}}
+        for i in range(spec.extra_workspaces)
+    ]
+    _insert(db, Workspace, workspaces)
+    roles = ['owner'] + [rng.choice(['admin', 'editor', 'editor', 'member']) for _ in user_ids[1:]]
+    memberships = [
+        {'id': ids(), 'workspace_id': workspace_id, 'user_id': uid, 'role': role, 'status': 'accepted',
+         'accepted_at': EPOCH}
+        for uid, role in zip(user_ids, roles)
+    ]
+    memberships += [
+        {'id': ids(), 'workspace_id': w['id'], 'user_id': owner_id, 'role': 'owner', 'status': 'accepted',
+         'accepted_at': EPOCH}
+        for w in workspaces[1:]
+    ]
+    _insert(db, WorkspaceMembership, memberships)
+
+    contacts_list_id, companies_list_id = ids(), ids()
+    list_positions = rank_sequence(2)
+    _insert(db, ListModel, [
+        {'id': contacts_list_id, 'workspace_id': workspace_id, 'name': 'Contacts', 'position': list_positions[0],
+         'item_count': spec.items, 'created_by': owner_id},
+        {'id': companies_list_id, 'workspace_id': workspace_id, 'name': 'Companies', 'position': list_positions[1],
+         'item_count': spec.companies, 'created_by': owner_id},
+    ])
+    _insert(db, Column_, _columns(ids, contacts_list_id, CONTACT_COLUMNS))
+    _insert(db, Column_, _columns(ids, companies_list_id, COMPANY_COLUMNS))
+
+    company_ids = [ids() for _ in range(spec.companies)]
+    company_names = [_company_name(rng, i) for i in range(spec.companies)]
+    company_positions = rank_sequence(spec.companies)
+    _insert(db, Item, (
+        {'id': cid, 'list_id': companies_list_id, 'title': name, 'position': position,
+         'values': {'industry': rng.choice(COMPANY_SUFFIXES), 'employees': int(rng.paretovariate(1.2) * 10),
+                    'website': f'https://{name.split()[0].lower()}{i}.example.com'},
+         'created_by': owner_id, 'created_at': EPOCH + timedelta(seconds=i)}
+        for i, (cid, name, position) in enumerate(zip(company_ids, company_names, company_positions))
+    ))
+
+    contact_ids = [ids() for _ in range(spec.items)]
+    contact_positions = rank_sequence(spec.items)
+    contact_company = [rng.randrange(spec.companies) for _ in range(spec.items)] if spec.companies else []
+
+    def contacts():
+        for i, (cid, position) in enumerate(zip(contact_ids, contact_positions)):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            company = company_names[contact_company[i]] if company_ids else _company_name(rng, i)
+            yield {'id': cid, 'list_id': contacts_list_id, 'title': f'{first} {last}', 'position': position,
+                   'values': _contact_values(rng, i, first, last, company),
+                   'created_by': rng.choice(user_ids), 'created_at': EPOCH + timedelta(seconds=i)}
+    _insert(db, Item, contacts())
+
+    relationship_id = ids()
+    _insert(db, Relationship, [{
+        'id': relationship_id, 'list_id': contacts_list_id, 'name': 'Works at',
+        'target_list_id': companies_list_id, 'relationship_type': 'many_to_many'
+    }])
+
+    def links():
+        for i, cid in enumerate(contact_ids):
+            if not company_ids or rng.random() >= spec.link_ratio:
+                continue
+            targets = {contact_company[i]} | {rng.randrange(spec.companies) for _ in range(spec.links_per_item - 1)}
+            for target in sorted(targets):
+                yield {'id': ids(), 'relationship_id': relationship_id, 'source_item_id': cid,
+                       'target_item_id': company_ids[target], 'created_at': EPOCH + timedelta(seconds=i)}
+    _insert(db, RelationshipLink, links())
+
+    # Comments cluster on a few hot items, like real discussions
+    _insert(db, Comment, (
+        {'id': ids(), 'item_id': contact_ids[min(int(rng.expovariate(1 / 500)), spec.items - 1)],
+         'user_id': rng.choice(user_ids), 'content': rng.choice(COMMENT_PHRASES),
+         'created_at': EPOCH + timedelta(minutes=i)}
+        for i in range(spec.comments if spec.items else 0)
+    ))
+    _insert(db, AuditLog, (
+        {'id': ids(), 'workspace_id': workspace_id, 'user_id': rng.choice(user_ids),
+         'action': rng.choice(AUDIT_ACTIONS), 'entity_type': 'item',
+         'entity_id': contact_ids[rng.randrange(spec.items)] if spec.items else None,
+         'details': {'fields': rng.sample(['stage', 'deal_size', 'notes', 'phone'], k=rng.randint(1, 2))},
+         'created_at': EPOCH + timedelta(seconds=30 * i)}
+        for i in range(spec.audit_entries)
+    ))
+    db.commit()
+    return load_dataset(db, spec)
+
+
+def load_dataset(db: Session, spec: DatasetSpec) -> Optional[Dataset]:
+    """The dataset previously generated for spec.seed, or None"""
+    workspace = db.query(Workspace).filter(Workspace.name == workspace_name(spec.seed)).first()
+    if workspace is None:
+        return None
+    lists = {
+        l.name: l.id for l in db.query(ListModel).filter(ListModel.workspace_id == workspace.id)
+    }
+    relationship_id = db.query(Relationship.id).filter(Relationship.list_id == lists['Contacts']).scalar()
+    members = db.query(WorkspaceMembership.user_id, WorkspaceMembership.role, User.email).join(
+        User, User.id == WorkspaceMembership.user_id
+    ).filter(WorkspaceMembership.workspace_id == workspace.id).order_by(User.email).all()
+    owner = next(m for m in members if m.role == 'owner')
+
+    def item_ids(list_id):
+        return [row.id for row in db.query(Item.id).filter(Item.list_id == list_id).order_by(Item.position)]
+
+    contact_ids = item_ids(lists['Contacts'])
+    company_ids = item_ids(lists['Companies'])
+    spec = DatasetSpec(**{**asdict(spec), 'items': len(contact_ids), 'companies': len(company_ids)})
+    return Dataset(
+        spec=spec,
+        workspace_id=workspace.id,
+        owner_id=owner.user_id,
+        owner_email=owner.email,
+        user_emails=[m.email for m in members],
+        user_roles={m.email: m.role for m in members},
+        contacts_list_id=lists['Contacts'],
+        companies_list_id=lists['Companies'],
+        relationship_id=relationship_id,
+        contact_ids=contact_ids,
+        company_ids=company_ids,
+    )
@@ -0,0 +1,374 @@
+"""HTTP load test: concurrent simulated users against a real server process.
+
+The micro-benchmarks call the app in-process, one request at a time; they
+cannot show requests queueing for the connection pool or a sync call
+blocking the event loop. This starts the app under uvicorn or gunicorn on a
+local port (or targets --url), logs in N users from the benchmark dataset
+and has each repeatedly pick an action from a weighted mix - logging in,
+listing workspaces, opening and paging the grid, editing cells, reading
+and writing comments, reading the audit log - with a short think time in
+between.
+
+The report gives throughput, p50/p95/p99 and error rate per endpoint,
+checked against SLOS, and pool waits from the server's own
+db_pool_wait_seconds histogram (read from /metrics before and after, so
+with several workers it covers whichever worker answered the scrape).
+
+Everything runs locally: the server gets the benchmark DATABASE_URL, no
+REDIS_URL (in-process cache, threaded jobs) and a throwaway METRICS_TOKEN.
+"""
+import asyncio
+import math
+import os
+import random
+import re
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.generator import BENCHMARK_PASSWORD, Dataset
+
+API = '/api/v1'
+
+
+@dataclass
+class Slo:
+    p95_ms: float
+    p99_ms: float
+    max_error_rate: float = 0.01
+
+
+# Declared latency objectives per endpoint, for the benchmark dataset
+SLOS: Dict[str, Slo] = {
+    'POST /auth/login': Slo(p95_ms=800, p99_ms=1500),
+    'GET /workspaces': Slo(p95_ms=150, p99_ms=300),
+    'GET /workspaces/{workspace_id}/lists': Slo(p95_ms=150, p99_ms=300),
+    'GET /lists/{list_id}/columns': Slo(p95_ms=150, p99_ms=300),
+    'GET /lists/{list_id}/items': Slo(p95_ms=300, p99_ms=600),
+    'PATCH /items/{item_id}': Slo(p95_ms=300, p99_ms=600),
+    'GET /items/{item_id}/comments': Slo(p95_ms=150, p99_ms=300),
+    'POST /items/{item_id}/comments': Slo(p95_ms=300, p99_ms=600),
+    'GET /workspaces/{workspace_id}/audit': Slo(p95_ms=300, p99_ms=600),
+}
+# A pooled connection should be available this fast for 99% of checkouts
+POOL_WAIT_P99_MS = 50
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+class Recorder:
+    """Latencies and outcomes per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint: str, seconds: float, status: Any) -> None:
+        self.latencies[endpoint].append(seconds * 1000)
+        self.statuses[endpoint][str(status)] += 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors[endpoint] += 1
+
+    def report(self, elapsed: float, slos: Dict[str, Slo] = SLOS) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, ms in sorted(self.latencies.items()):
+            requests = len(ms)
+            row = {
+                'requests': requests,
+                'rps': round(requests / elapsed, 2),
+                'p50_ms': round(percentile(ms, 50), 1),
+                'p95_ms': round(percentile(ms, 95), 1),
+                'p99_ms': round(percentile(ms, 99), 1),
+                'error_rate': round(self.errors[endpoint] / requests, 4),
+                'statuses': dict(self.statuses[endpoint]),
+                'breaches': [],
+            }
+            slo = slos.get(endpoint)
+            if slo is not None:
+                if row['p95_ms'] > slo.p95_ms:
+                    row['breaches'].append(f"p95 {row['p95_ms']} > {slo.p95_ms} ms")
+                if row['p99_ms'] > slo.p99_ms:
+                    row['breaches'].append(f"p99 {row['p99_ms']} > {slo.p99_ms} ms")
+                if row['error_rate'] > slo.max_error_rate:
+                    row['breaches'].append(f"errors {row['error_rate']:.2%} > {slo.max_error_rate:.2%}")
+            endpoints[endpoint] = row
+        total = sum(len(ms) for ms in self.latencies.values())
+        return {
+            'elapsed_s': round(elapsed, 1),
+            'requests': total,
+            'rps': round(total / elapsed, 2) if elapsed else 0.0,
+            'error_rate': round(sum(self.errors.values()) / total, 4) if total else 0.0,
+            'endpoints': endpoints,
+        }
+
+
+_SAMPLE = re.compile(r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(?P<labels>[^}]*)\})? (?P<value>\S+)$')
+
+
+def parse_histogram(text: str, name: str, **match: str) -> Dict[str, Any]:
+    """Buckets (upper bound -> cumulative count), sum and count of one Prometheus histogram"""
+    buckets: Dict[float, float] = defaultdict(float)
+    result = {'sum': 0.0, 'count': 0.0}
+    for line in text.splitlines():
+        sample = _SAMPLE.match(line)
+        if sample is None or not sample['name'].startswith(name):
+            continue
+        labels = dict(re.findall(r'(\w+)="([^"]*)"', sample['labels'] or ''))
+        if any(labels.get(key) != value for key, value in match.items()):
+            continue
+        value = float(sample['value'])
+        suffix = sample['name'][len(name):]
+        if suffix == '_bucket':
+            buckets[float(labels['le'])] += value
+        elif suffix in ('_sum', '_count'):
+            result[suffix[1:]] += value
+    result['buckets'] = dict(sorted(buckets.items()))
+    return result
+
+
+def histogram_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """What a histogram recorded between two scrapes: count, mean and a bucket-bound p99"""
+    count = after['count'] - before['count']
+    if count <= 0:
+        return {'waits': 0, 'mean_ms': 0.0, 'p99_ms': 0.0}
+    p99 = math.inf
+    for bound, cumulative in after['buckets'].items():
+        if cumulative - before['buckets'].get(bound, 0.0) >= 0.99 * count:
+            p99 = bound
+            break
+    return {
+        'waits': int(count),
+        'mean_ms': round((after['sum'] - before['sum']) / count * 1000, 2),
+        # Upper bound of the bucket holding the 99th percentile
+        'p99_ms': p99 * 1000,
+    }
+
+
+class User:
+    """One simulated user: a login and a random walk through the mix"""
+
+    def __init__(self, client: httpx.AsyncClient, dataset: Dataset, email: str, recorder: Recorder, rng: random.Random):
+        self.client = client
+        self.dataset = dataset
+        self.email = email
+        self.can_edit = dataset.user_roles.get(email) in ('owner', 'admin', 'editor')
+        self.recorder = recorder
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+
+    async def request(self, method: str, endpoint: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, API + path, headers=self.headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(f'{method} {endpoint}', time.perf_counter() - started, type(e).__name__)
+            return None
+        self.recorder.record(f'{method} {endpoint}', time.perf_counter() - started, response.status_code)
+        return response
+
+    def contact(self):
+        return self.rng.choice(self.dataset.contact_ids)
+
+    async def login(self) -> None:
+        response = await self.request(
+            'POST', '/auth/login', '/auth/login', json={'email': self.email, 'password': BENCHMARK_PASSWORD}
+        )
+        if response is not None and response.status_code == 200:
+            self.headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+    async def workspaces(self) -> None:
+        await self.request('GET', '/workspaces', '/workspaces')
+        await self.request('GET', '/workspaces/{workspace_id}/lists', f'/workspaces/{self.dataset.workspace_id}/lists')
+
+    async def open_grid(self) -> None:
+        list_id = self.dataset.contacts_list_id
+        await self.request('GET', '/lists/{list_id}/columns', f'/lists/{list_id}/columns')
+        await self.request('GET', '/lists/{list_id}/items', f'/lists/{list_id}/items',
+                           params={'limit': 100, 'links': 'true'})
+
+    async def page_grid(self) -> None:
+        # Users mostly stay near the top of the grid
+        page = min(int(self.rng.expovariate(1 / 20)), len(self.dataset.contact_ids) // 100)
+        await self.request('GET', '/lists/{list_id}/items', f'/lists/{self.dataset.contacts_list_id}/items',
+                           params={'limit': 100, 'offset': page * 100, 'links': 'true'})
+
+    async def edit_cell(self) -> None:
+        if not self.can_edit:
+            return await self.page_grid()
+        await self.request('PATCH', '/items/{item_id}', f'/items/{self.contact()}',
+                           json={'values': {'deal_size': self.rng.randrange(1000, 100000)}})
+
+    async def comments(self) -> None:
+        item_id = self.contact()
+        await self.request('GET', '/items/{item_id}/comments', f'/items/{item_id}/comments')
+        if self.rng.random() < 0.3:
+            await self.request('POST', '/items/{item_id}/comments', f'/items/{item_id}/comments',
+                               json={'content': 'Load test note'})
+
+    async def audit(self) -> None:
+        offset = self.rng.choice([0, 0, 0, 50, 100, 500])
+        await self.request('GET', '/workspaces/{workspace_id}/audit', f'/workspaces/{self.dataset.workspace_id}/audit',
+                           params={'limit': 50, 'offset': offset})
+
+
+# Action -> relative weight
+MIX: Dict[str, int] = {
+    'login': 2,
+    'workspaces': 10,
+    'open_grid': 15,
+    'page_grid': 30,
+    'edit_cell': 20,
+    'comments': 13,
+    'audit': 10,
+}
+
+
+async def _user_loop(user: User, deadline: float, think: Tuple[float, float], start_delay: float) -> None:
+    await asyncio.sleep(start_delay)
+    await user.login()
+    actions, weights = zip(*MIX.items())
+    while time.monotonic() < deadline:
+        action: Callable = getattr(user, user.rng.choices(actions, weights)[0])
+        await action()
+        await asyncio.sleep(user.rng.uniform(*think))
+
+
+async def run_load(
+    base_url: str,
+    dataset: Dataset,
+    users: int,
+    duration: float,
+    ramp_up: float = 5.0,
+    think_ms: Tuple[float, float] = (100, 500),
+    metrics_token: Optional[str] = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Drive the server with simulated users for duration seconds and report"""
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0, limits=limits) as client:
+        metrics_headers = {'Authorization': f'Bearer {metrics_token}'} if metrics_token else {}
+
+        async def scrape() -> Optional[str]:
+            try:
+                response = await client.get('/metrics', headers=metrics_headers)
+            except httpx.HTTPError:
+                return None
+            return response.text if response.status_code == 200 else None
+
+        before = await scrape()
+        started = time.monotonic()
+        deadline = started + duration
+        think = (think_ms[0] / 1000, think_ms[1] / 1000)
+        emails = dataset.user_emails
+        await asyncio.gather(*(
+            _user_loop(
+                User(client, dataset, emails[i % len(emails)], recorder, random.Random(seed * 100_003 + i)),
+                deadline, think, ramp_up * i / users
+            )
+            for i in range(users)
+        ))
+        elapsed = time.monotonic() - started
+        after = await scrape()
+
+    report = recorder.report(elapsed)
+    report['users'] = users
+    if before is not None and after is not None:
+        wait = histogram_delta(
+            parse_histogram(before, 'db_pool_wait_seconds', engine='primary'),
+            parse_histogram(after, 'db_pool_wait_seconds', engine='primary'),
+        )
+        wait['breached'] = wait['p99_ms'] > POOL_WAIT_P99_MS
+        report['pool_wait'] = wait
+    return report
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Server:
+    """The API under uvicorn or gunicorn (uvicorn workers) on a local port"""
+
+    def __init__(self, database_url: str, server: str = 'uvicorn', workers: int = 1, env: Optional[Dict[str, str]] = None):
+        self.port = _free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.metrics_token = secrets.token_hex(8)
+        if server == 'gunicorn':
+            self.command = [
+                # The production configuration (gunicorn.conf.py) with the worker count given here
+                sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'api_gateway.main:app',
+                '-w', str(workers), '-b', f'127.0.0.1:{self.port}', '--log-level', 'warning'
+            ]
+        else:
+            self.command = [
+                sys.executable, '-m', 'uvicorn', 'api_gateway.main:app', '--host', '127.0.0.1',
+                '--port', str(self.port), '--workers', str(workers), '--log-level', 'warning'
+            ]
+        self.env = {k: v for k, v in os.environ.items() if k != 'REDIS_URL'}
+        self.env.update({'DATABASE_URL': database_url, 'METRICS_TOKEN': self.metrics_token, **(env or {})})
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> 'Server':
+        backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.process = subprocess.Popen(self.command, cwd=backend, env=self.env)
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with {self.process.returncode}")
+            try:
+                if httpx.get(f'{self.url}/health', timeout=1.0).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.25)
+        self.__exit__(None, None, None)
+        raise RuntimeError("Server did not become healthy within 60s")
+
+    def __exit__(self, *exc) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['users']} users, {report['elapsed_s']}s: {report['requests']} requests, "
+        f"{report['rps']} req/s, {report['error_rate']:.2%} errors",
+        f"{'endpoint':40} {'req':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>7}  SLO",
+    ]
+    for endpoint, row in report['endpoints'].items():
+        verdict = '; '.join(row['breaches']) if row['breaches'] else ('ok' if endpoint in SLOS else '-')
+        lines.append(
+            f"{endpoint:40} {row['requests']:6} {row['rps']:7.1f} {row['p50_ms']:8.1f} {row['p95_ms']:8.1f} "
+            f"{row['p99_ms']:8.1f} {row['error_rate']:7.2%}  {verdict}"
+        )
+    wait = report.get('pool_wait')
+    if wait is not None:
+        lines.append(
+            f"pool wait: {wait['waits']} checkouts, mean {wait['mean_ms']} ms, p99 <= {wait['p99_ms']} ms"
+            f"{'  BREACH > %s ms' % POOL_WAIT_P99_MS if wait['breached'] else ''}"
+        )
+    return '\n'.join(lines)
+
+
+def breached(report: Dict[str, Any]) -> bool:
+    return any(row['breaches'] for row in report['endpoints'].values()) or \
+        bool(report.get('pool_wait', {}).get('breached'))
@@ -0,0 +1,218 @@
+"""Benchmark scenarios.
+
+Each scenario is one timed operation against the generated dataset, either a
+service function called with its own session ("service") or an HTTP request
+through the full ASGI app, middleware included ("http"). Write scenarios
+leave the data as they found it (or change it in ways later runs tolerate),
+so a dataset can be benchmarked repeatedly.
+"""
+import itertools
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from shared.jwt_auth import create_access_token
+from shared.models import AuditLog
+from shared.schemas import ItemUpdate, RelationshipLinkCreate
+from benchmarks.generator import Dataset
+
+BULK_LINKS = 500
+
+
+class BenchContext:
+    """What scenarios run against: the dataset, sessions and an authenticated client"""
+
+    def __init__(self, dataset: Dataset, session_factory: Callable[[], Session], client: TestClient):
+        self.dataset = dataset
+        self.session_factory = session_factory
+        self.client = client
+        token = create_access_token({'sub': str(dataset.owner_id), 'email': dataset.owner_email})
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.rng = random.Random(dataset.spec.seed)
+        self._edits = itertools.count()
+
+    def next_contact(self):
+        """A different contact for every write, spread over the whole list"""
+        contacts = self.dataset.contact_ids
+        return contacts[(next(self._edits) * 7919) % len(contacts)]
+
+    def link_pairs(self) -> List[RelationshipLinkCreate]:
+        """BULK_LINKS (contact, company) pairs; scenarios only remove the ones they created"""
+        contacts, companies = self.dataset.contact_ids, self.dataset.company_ids
+        start = self.rng.randrange(len(contacts))
+        return [
+            RelationshipLinkCreate(
+                source_item_id=contacts[(start + i) % len(contacts)],
+                target_item_id=companies[-1 - (i % len(companies))]
+            )
+            for i in range(BULK_LINKS)
+        ]
+
+
+@dataclass
+class Scenario:
+    name: str
+    kind: str
+    run: Callable[[BenchContext], None]
+    description: str
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, kind: str):
+    """Register a scenario; its docstring describes it in the results"""
+    def decorator(func: Callable[[BenchContext], None]) -> Callable[[BenchContext], None]:
+        SCENARIOS[name] = Scenario(name, kind, func, (func.__doc__ or '').strip())
+        return func
+    return decorator
+
+
+def _with_session(ctx: BenchContext, work: Callable[[Session], None]) -> None:
+    db = ctx.session_factory()
+    try:
+        work(db)
+    finally:
+        db.close()
+
+
+def _ok(response) -> None:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url} -> {response.status_code}: {response.text[:200]}")
+
+
+# Service functions
+@scenario('service.items.first_page', 'service')
+def items_first_page(ctx: BenchContext) -> None:
+    """get_list_items: first 100 contacts"""
+    from services.item.service import get_list_items
+    _with_session(ctx, lambda db: get_list_items(db, ctx.dataset.contacts_list_id, 100, 0))
+
+
+@scenario('service.items.deep_page', 'service')
+def items_deep_page(ctx: BenchContext) -> None:
+    """get_list_items: 100 contacts at offset 50% of the list"""
+    from services.item.service import get_list_items
+    offset = len(ctx.dataset.contact_ids) // 2
+    _with_session(ctx, lambda db: get_list_items(db, ctx.dataset.contacts_list_id, 100, offset))
+
+
+@scenario('service.items.filter', 'service')
+def items_filter(ctx: BenchContext) -> None:
+    """get_list_items + count_list_items: contacts with stage=won (JSONB containment)"""
+    from services.item.service import count_list_items, get_list_items
+
+    def work(db):
+        get_list_items(db, ctx.dataset.contacts_list_id, 100, 0, {'stage': 'won'})
+        count_list_items(db, ctx.dataset.contacts_list_id, {'stage': 'won'})
+    _with_session(ctx, work)
+
+
+@scenario('service.items.link_summaries', 'service')
+def items_link_summaries(ctx: BenchContext) -> None:
+    """get_link_summaries for a 100-contact page"""
+    from services.item.service import get_link_summaries
+    page = ctx.dataset.contact_ids[:100]
+    _with_session(ctx, lambda db: get_link_summaries(db, page, 3))
+
+
+@scenario('service.items.update', 'service')
+def items_update(ctx: BenchContext) -> None:
+    """update_item: change one contact's deal size (validation, audit, commit)"""
+    from services.item.service import update_item
+    item_id = ctx.next_contact()
+    change = ItemUpdate(values={'deal_size': ctx.rng.randrange(1000, 100000)})
+    _with_session(ctx, lambda db: update_item(db, item_id, change, ctx.dataset.owner_id))
+
+
+@scenario('service.links.bulk', 'service')
+def links_bulk(ctx: BenchContext) -> None:
+    """create_links then delete_links for 500 pairs"""
+    from services.relationship.service import create_links, delete_links
+    pairs = ctx.link_pairs()
+
+    def work(db):
+        created = create_links(db, ctx.dataset.relationship_id, pairs, ctx.dataset.owner_id)['created']
+        created = [RelationshipLinkCreate(source_item_id=c.source_item_id, target_item_id=c.target_item_id) for c in created]
+        delete_links(db, ctx.dataset.relationship_id, created, ctx.dataset.owner_id)
+    _with_session(ctx, work)
+
+
+@scenario('service.audit.deep_page', 'service')
+def audit_deep_page(ctx: BenchContext) -> None:
+    """Audit log page of 100 at offset 10,000"""
+    def work(db):
+        db.query(AuditLog).filter(
+            AuditLog.workspace_id == ctx.dataset.workspace_id
+        ).order_by(AuditLog.created_at.desc()).limit(100).offset(10_000).all()
+    _with_session(ctx, work)
+
+
+# HTTP routes
+@scenario('http.workspaces.list', 'http')
+def http_workspaces(ctx: BenchContext) -> None:
+    """GET /workspaces"""
+    _ok(ctx.client.get('/api/v1/workspaces', headers=ctx.headers))
+
+
+@scenario('http.items.first_page', 'http')
+def http_items_first_page(ctx: BenchContext) -> None:
+    """GET /lists/{id}/items?limit=100"""
+    _ok(ctx.client.get(f'/api/v1/lists/{ctx.dataset.contacts_list_id}/items?limit=100', headers=ctx.headers))
+
+
+@scenario('http.items.links_page', 'http')
+def http_items_links_page(ctx: BenchContext) -> None:
+    """GET /lists/{id}/items?limit=100&links=true"""
+    _ok(ctx.client.get(
+        f'/api/v1/lists/{ctx.dataset.contacts_list_id}/items?limit=100&links=true', headers=ctx.headers
+    ))
+
+
+@scenario('http.items.filter', 'http')
+def http_items_filter(ctx: BenchContext) -> None:
+    """GET /lists/{id}/items filtered on stage=won"""
+    _ok(ctx.client.get(
+        f'/api/v1/lists/{ctx.dataset.contacts_list_id}/items',
+        params={'limit': 100, 'filter': '{"stage": "won"}'}, headers=ctx.headers
+    ))
+
+
+@scenario('http.items.patch', 'http')
+def http_items_patch(ctx: BenchContext) -> None:
+    """PATCH /items/{id}: one cell edit"""
+    _ok(ctx.client.patch(
+        f'/api/v1/items/{ctx.next_contact()}',
+        json={'values': {'stage': ctx.rng.choice(['lead', 'qualified', 'proposal'])}}, headers=ctx.headers
+    ))
+
+
+@scenario('http.links.bulk', 'http')
+def http_links_bulk(ctx: BenchContext) -> None:
+    """POST /relationships/{id}/links/bulk then bulk-delete, 500 pairs"""
+    body = {'links': [link.model_dump(mode='json') for link in ctx.link_pairs()]}
+    base = f'/api/v1/relationships/{ctx.dataset.relationship_id}/links'
+    response = ctx.client.post(f'{base}/bulk', json=body, headers=ctx.headers)
+    _ok(response)
+    created = [
+        {'source_item_id': link['source_item_id'], 'target_item_id': link['target_item_id']}
+        for link in response.json()['created']
+    ]
+    _ok(ctx.client.post(f'{base}/bulk-delete', json={'links': created}, headers=ctx.headers))
+
+
+@scenario('http.audit.first_page', 'http')
+def http_audit_first_page(ctx: BenchContext) -> None:
+    """GET /workspaces/{id}/audit?limit=100"""
+    _ok(ctx.client.get(f'/api/v1/workspaces/{ctx.dataset.workspace_id}/audit?limit=100', headers=ctx.headers))
+
+
+@scenario('http.audit.deep_page', 'http')
+def http_audit_deep_page(ctx: BenchContext) -> None:
+    """GET /workspaces/{id}/audit?limit=100&offset=10000"""
+    _ok(ctx.client.get(
+        f'/api/v1/workspaces/{ctx.dataset.workspace_id}/audit?limit=100&offset=10000', headers=ctx.headers
+    ))
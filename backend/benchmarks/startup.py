@@ -0,0 +1,96 @@
+"""Cold-start time of the API process.
+
+Each run starts a fresh interpreter (as a restarted or newly forked-off
+worker without --preload would) and times its phases:
+
+    import         import api_gateway.main, which builds the app
+    create_app     a second create_app() with everything imported (the
+                   factory's own cost)
+    engine         first get_engine() - the driver import and pool setup
+                   paid by the first request that touches the database
+    first_request  startup handlers plus GET /health
+    process        spawn until the probe reports, interpreter start included
+
+Nothing connects to a database: the invalidation listener and the database
+part of the worker warm-up are switched off, and /health does not query. Results use the run command's file format, so
+`python -m benchmarks compare` works on them.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r'''
+import json, time
+started = time.perf_counter()
+import api_gateway.main
+imported = time.perf_counter()
+api_gateway.main.create_app()
+created = time.perf_counter()
+from shared.database import get_engine
+get_engine()
+engine = time.perf_counter()
+from fastapi.testclient import TestClient
+ready = time.perf_counter()
+with TestClient(api_gateway.main.app) as client:
+    assert client.get("/health").status_code == 200
+served = time.perf_counter()
+print(json.dumps({"import": imported - started, "create_app": created - imported,
+                  "engine": engine - created, "first_request": served - ready}))
+'''
+
+PHASES = ('import', 'create_app', 'engine', 'first_request', 'process')
+
+
+def _env(database_url: str) -> Dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if k != 'REDIS_URL'}
+    env.update({'DATABASE_URL': database_url, 'CACHE_INVALIDATION_LISTENER': 'false', 'WARMUP': 'false'})
+    return env
+
+
+def probe(database_url: str) -> Dict[str, float]:
+    """Phase timings (seconds) of one fresh API process"""
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=_env(database_url),
+        capture_output=True, text=True, check=True
+    ).stdout
+    timings = json.loads(out.strip().splitlines()[-1])
+    timings['process'] = time.perf_counter() - started
+    return timings
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) from python -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+def slowest_imports(database_url: str, top: int) -> List[Tuple[str, int, int]]:
+    """The top modules by their own import time when importing the app"""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import api_gateway.main'], cwd=BACKEND_DIR,
+        env=_env(database_url), capture_output=True, text=True, check=True
+    ).stderr
+    return sorted(parse_importtime(stderr), key=lambda m: -m[1])[:top]
+
+
+def measure(database_url: str, runs: int, warmup: int = 1) -> Dict[str, List[float]]:
+    """Timings per phase over `runs` fresh processes (after `warmup` unrecorded ones)"""
+    for _ in range(warmup):
+        probe(database_url)
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(runs):
+        for phase, seconds in probe(database_url).items():
+            samples[phase].append(seconds)
+    return samples
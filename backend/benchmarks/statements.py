@@ -0,0 +1,96 @@
+"""Per-call cost of the hot lookups, before and after prebuilt statements.
+
+Each lookup runs in two forms on one session against the benchmark
+database: `query`, the ORM Query the code used to build on every call, and
+`cached`, the prebuilt select() it runs now (shared/auth.py,
+shared/repository.py). Ids come from the generated dataset when there is
+one; otherwise they match nothing and only the statement overhead and a
+round trip are measured.
+
+Server-side prepared statements need psycopg 3: run with
+--database-url postgresql+psycopg://... and DB_PREPARED_STATEMENTS=true to
+include them.
+"""
+import time
+from typing import Callable, Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from shared.auth import load_active_user, load_membership
+from shared.models import Item, List as ListModel, User, WorkspaceMembership
+from shared.repository import SqlItemRepository
+
+NIL_UUID = UUID(int=0)
+
+Lookup = Callable[[Session, Dict[str, UUID]], object]
+
+
+def _query_list_items(db, ids):
+    return db.query(Item).filter(
+        Item.list_id == ids['list_id'],
+        Item.archived_at.is_(None)
+    ).order_by(Item.position, Item.created_at).limit(100).offset(0).all()
+
+
+# name -> (query form, cached form)
+LOOKUPS: Dict[str, Tuple[Lookup, Lookup]] = {
+    'active_user': (
+        lambda db, ids: db.query(User).filter(User.id == ids['user_id'], User.is_active == True).first(),
+        lambda db, ids: load_active_user(db, ids['user_id']),
+    ),
+    'membership': (
+        lambda db, ids: db.query(WorkspaceMembership).filter(
+            WorkspaceMembership.workspace_id == ids['workspace_id'],
+            WorkspaceMembership.user_id == ids['user_id'],
+            WorkspaceMembership.status == 'accepted'
+        ).first(),
+        lambda db, ids: load_membership(db, ids['workspace_id'], ids['user_id']),
+    ),
+    'get_list': (
+        lambda db, ids: db.query(ListModel).filter(ListModel.id == ids['list_id']).first(),
+        lambda db, ids: SqlItemRepository(db).get_list(ids['list_id']),
+    ),
+    'get_item': (
+        lambda db, ids: db.query(Item).filter(Item.id == ids['item_id']).first(),
+        lambda db, ids: SqlItemRepository(db).get_item(ids['item_id']),
+    ),
+    'list_items': (
+        _query_list_items,
+        lambda db, ids: SqlItemRepository(db).list_items(ids['list_id'], 100, 0),
+    ),
+}
+
+
+def sample_ids(db: Session) -> Dict[str, UUID]:
+    """A live item with its list, workspace and a member, or nil ids"""
+    row = db.execute(text(
+        "SELECT i.id AS item_id, i.list_id, l.workspace_id, m.user_id "
+        "FROM items i JOIN lists l ON l.id = i.list_id "
+        "JOIN workspace_memberships m ON m.workspace_id = l.workspace_id AND m.status = 'accepted' "
+        "WHERE i.archived_at IS NULL LIMIT 1"
+    )).first()
+    if row is None:
+        return {'item_id': NIL_UUID, 'list_id': NIL_UUID, 'workspace_id': NIL_UUID, 'user_id': NIL_UUID}
+    return dict(row._mapping)
+
+
+def time_calls(db: Session, lookup: Lookup, ids: Dict[str, UUID], calls: int) -> float:
+    """Mean seconds per call over `calls` calls"""
+    started = time.perf_counter()
+    for _ in range(calls):
+        lookup(db, ids)
+    return (time.perf_counter() - started) / calls
+
+
+def measure(db: Session, calls: int, repeat: int, warmup: int = 50) -> Dict[str, List[float]]:
+    """Per-call timings of every lookup form, one sample per batch of `calls`"""
+    ids = sample_ids(db)
+    samples: Dict[str, List[float]] = {}
+    for name, forms in LOOKUPS.items():
+        for form, lookup in zip(('query', 'cached'), forms):
+            time_calls(db, lookup, ids, warmup)
+            samples[f'statements.{name}.{form}'] = [time_calls(db, lookup, ids, calls) for _ in range(repeat)]
+    db.rollback()
+    return samples
@@ -0,0 +1,30 @@
+"""Production server (see api_gateway/server.py):
+
+    gunicorn -c gunicorn.conf.py api_gateway.main:app
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_gateway.server import worker_count  # noqa: E402
+from api_gateway.warmup import warm_code  # noqa: E402
+from shared.settings import get_settings  # noqa: E402
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = 'api_gateway.server.Worker'
+workers = worker_count()
+# Import the app once in the master; workers fork with the code (and warm_code) shared
+preload_app = True
+graceful_timeout = get_settings().graceful_timeout
+# Workers that stop heartbeating (e.g. stuck in warm-up) are restarted
+timeout = 60
+keepalive = 5
+accesslog = None
+
+
+def when_ready(server):
+    # Before the first worker is forked
+    if preload_app:
+        warm_code(server.app.wsgi())
+    server.log.info("Starting %s workers", workers)
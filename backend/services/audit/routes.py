@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
@@ -7,20 +8,27 @@ from shared.database import get_db
 from shared.auth import get_current_user, get_workspace_membership, CurrentUser
 from shared.models import AuditLog
 from shared.schemas import AuditLogResponse
+from shared.coalesce import coalesced_json
+from shared.query_stats import query_budget
 
 router = APIRouter()
 
-@router.get("/workspaces/{workspace_id}/audit", response_model=List[AuditLogResponse])
+_audit_list = TypeAdapter(List[AuditLogResponse])
+
+@router.get("/workspaces/{workspace_id}/audit", response_model=List[AuditLogResponse], dependencies=[Depends(query_budget(3))])
 async def get_audit_logs(
     workspace_id: UUID,
+    request: Request,
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
     membership = Depends(get_workspace_membership),
     db: Session = Depends(get_db)
 ):
     """Get audit logs for a workspace"""
-    logs = db.query(AuditLog).filter(
-        AuditLog.workspace_id == workspace_id
-    ).order_by(AuditLog.created_at.desc()).limit(limit).offset(offset).all()
+    def produce():
+        logs = db.query(AuditLog).filter(
+            AuditLog.workspace_id == workspace_id
+        ).order_by(AuditLog.created_at.desc()).limit(limit).offset(offset).all()
+        return logs, {}
     
-    return logs
+    return await coalesced_json(request, f"workspace:{workspace_id}", _audit_list, produce)
@@ -1,4 +1,6 @@
 """Authentication service for user registration and login"""
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
@@ -9,6 +11,8 @@ from shared.models import User
 from shared.jwt_auth import create_access_token, get_password_hash, verify_password
 from shared.auth import get_current_user
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 class SignupRequest(BaseModel):
@@ -49,10 +53,6 @@ async def signup(request: SignupRequest, db: Session = Depends(get_db)):
         password_str = str(request.password)
         password_bytes = password_str.encode('utf-8')
         
-        print(f"🔍 Password validation:")
-        print(f"   Length in chars: {len(password_str)}")
-        print(f"   Length in bytes: {len(password_bytes)}")
-        
         if len(password_str) < 6:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -66,7 +66,6 @@ async def signup(request: SignupRequest, db: Session = Depends(get_db)):
             )
         
         # Create new user
-        print(f"✅ Creating user: {request.email}")
         user = User(
             email=request.email,
             password_hash=get_password_hash(password_str),
@@ -93,9 +92,7 @@ async def signup(request: SignupRequest, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Signup error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Signup failed")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create user: {str(e)}"
@@ -0,0 +1,41 @@
+"""Background jobs for the item service"""
+from sqlalchemy import text, bindparam
+
+from shared.database import SessionLocal
+from shared.models import Item
+from shared.rank import rank_sequence
+
+REBALANCE_BATCH_SIZE = 2000
+
+def rebalance_item_ranks(list_id: str) -> None:
+    """Reassign evenly spaced short rank keys to every live item in a list"""
+    db = SessionLocal()
+    try:
+        # One rebalance per list at a time; a concurrent run will cover this one
+        locked = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"),
+            {'key': f'rank:items:{list_id}'}
+        ).scalar()
+        if not locked:
+            return
+        
+        ids = [row[0] for row in db.query(Item.id).filter(
+            Item.list_id == list_id,
+            Item.archived_at.is_(None)
+        ).order_by(Item.position, Item.created_at).with_for_update()]
+        ranks = rank_sequence(len(ids))
+        
+        items = Item.__table__
+        stmt = items.update().where(items.c.id == bindparam('item_id')).values(
+            position=bindparam('rank'),
+            updated_at=items.c.updated_at  # reordering is not an edit
+        )
+        for start in range(0, len(ids), REBALANCE_BATCH_SIZE):
+            end = start + REBALANCE_BATCH_SIZE
+            db.execute(stmt, [
+                {'item_id': item_id, 'rank': rank}
+                for item_id, rank in zip(ids[start:end], ranks[start:end])
+            ])
+        db.commit()
+    finally:
+        db.close()
@@ -1,22 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 from uuid import UUID
+import json
 
 from shared.database import get_db
-from shared.auth import get_current_user, CurrentUser
-from shared.models import WorkspaceMembership, List as ListModel
+from shared.auth import get_current_user, load_membership, CurrentUser
+from shared.repository import item_repository
 from shared.schemas import (
-    ItemCreate, ItemUpdate, ItemResponse,
+    ItemCreate, ItemUpdate, ItemMove, ItemResponse, ItemWithLinksResponse, ItemLinkSummary,
     CommentCreate, CommentResponse
 )
+from shared.validation import UniqueViolation
+from shared.coalesce import coalesced_json
+from shared.query_stats import query_budget
 from services.item.service import (
-    create_item, get_list_items, get_item, update_item, archive_item,
+    create_item, get_list_items, count_list_items, get_link_summaries,
+    get_item, update_item, move_item, archive_item,
     create_comment, get_item_comments, delete_comment
 )
 
 router = APIRouter()
 
+_item_list = TypeAdapter(List[ItemResponse])
+_item_link_list = TypeAdapter(List[ItemWithLinksResponse])
+_flag = TypeAdapter(bool)
+
+
+def _list_items_budget(request: Request) -> int:
+    """User, page and counter; a filter adds the estimate and exact count, links=true the summaries"""
+    params = request.query_params
+    try:
+        links = _flag.validate_python(params.get('links', False))
+    except ValueError:
+        links = False  # the handler rejects it with a 422
+    return 4 + (2 if params.get('filter') else 0) + (1 if links else 0)
+
 # Item endpoints
 @router.post("/lists/{list_id}/items", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_item_endpoint(
@@ -27,33 +47,78 @@ async def create_item_endpoint(
 ):
     """Create a new item"""
     # Verify user has access
-    db_list = db.query(ListModel).filter(ListModel.id == list_id).first()
+    db_list = item_repository(db).get_list(list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
     
-    membership = db.query(WorkspaceMembership).filter(
-        WorkspaceMembership.workspace_id == db_list.workspace_id,
-        WorkspaceMembership.user_id == current_user.user_id,
-        WorkspaceMembership.status == 'accepted'
-    ).first()
+    membership = load_membership(db, db_list.workspace_id, current_user.user_id)
     
     if not membership:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    return create_item(db, list_id, item_data, current_user.user_id)
+    try:
+        return create_item(db, list_id, item_data, current_user.user_id)
+    except UniqueViolation as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
 
-@router.get("/lists/{list_id}/items", response_model=List[ItemResponse])
+@router.get("/lists/{list_id}/items", response_model=List[Union[ItemWithLinksResponse, ItemResponse]], dependencies=[Depends(query_budget(_list_items_budget))])
 async def list_items(
     list_id: UUID,
+    request: Request,
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    filter: Optional[str] = Query(None, description="JSON object matched against item values"),
+    exact: bool = Query(False, description="Force an exact count for filtered listings"),
+    links: bool = Query(False, description="Include per-relationship link counts and linked titles"),
+    link_items: int = Query(3, ge=0, le=20, description="Linked items listed per relationship"),
     current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all items in a list"""
-    return get_list_items(db, list_id, limit, offset)
+    """
+    Get all items in a list.
+    The total is returned in X-Total-Count; X-Total-Count-Exact says whether
+    it is exact or a planner estimate. With links=true each item carries its
+    link summaries, fetched for the whole page in one query.
+    """
+    filters = None
+    if filter:
+        try:
+            filters = json.loads(filter)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="filter must be a JSON object")
+        if not isinstance(filters, dict):
+            raise HTTPException(status_code=422, detail="filter must be a JSON object")
+    
+    def produce():
+        items = get_list_items(db, list_id, limit, offset, filters)
+        
+        # A short page means we already know the exact total
+        if len(items) < limit and (items or offset == 0):
+            total, is_exact = offset + len(items), True
+        else:
+            total, is_exact = count_list_items(db, list_id, filters, exact)
+        headers = {
+            "X-Total-Count": str(total),
+            "X-Total-Count-Exact": "true" if is_exact else "false"
+        }
+        
+        if links:
+            summaries = get_link_summaries(db, [item.id for item in items], link_items)
+            items = [
+                ItemWithLinksResponse(
+                    **ItemResponse.model_validate(item).model_dump(),
+                    links=[ItemLinkSummary(**summary) for summary in summaries.get(item.id, [])]
+                )
+                for item in items
+            ]
+        return items, headers
+    
+    # Any authenticated user may read a list's items, so the body is shared by all of them
+    return await coalesced_json(request, 'authenticated', _item_link_list if links else _item_list, produce)
 
-@router.get("/items/{item_id}", response_model=ItemResponse)
+@router.get("/items/{item_id}", response_model=ItemResponse, dependencies=[Depends(query_budget(2))])
 async def get_item_endpoint(
     item_id: UUID,
     current_user: CurrentUser = Depends(get_current_user),
@@ -79,17 +144,42 @@ async def update_item_endpoint(
         raise HTTPException(status_code=404, detail="Item not found")
     
     # Verify user has editor+ role
-    db_list = db.query(ListModel).filter(ListModel.id == db_item.list_id).first()
-    membership = db.query(WorkspaceMembership).filter(
-        WorkspaceMembership.workspace_id == db_list.workspace_id,
-        WorkspaceMembership.user_id == current_user.user_id,
-        WorkspaceMembership.status == 'accepted'
-    ).first()
+    db_list = item_repository(db).get_list(db_item.list_id)
+    membership = load_membership(db, db_list.workspace_id, current_user.user_id)
+    
+    if not membership or membership.role not in ['owner', 'admin', 'editor']:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    
+    try:
+        return update_item(db, item_id, item_update, current_user.user_id)
+    except UniqueViolation as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+@router.post("/items/{item_id}/move", response_model=ItemResponse)
+async def move_item_endpoint(
+    item_id: UUID,
+    item_move: ItemMove,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Move an item within its list"""
+    db_item = get_item(db, item_id)
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    
+    # Verify user has editor+ role
+    db_list = item_repository(db).get_list(db_item.list_id)
+    membership = load_membership(db, db_list.workspace_id, current_user.user_id)
     
     if not membership or membership.role not in ['owner', 'admin', 'editor']:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    return update_item(db, item_id, item_update, current_user.user_id)
+    try:
+        return move_item(db, item_id, item_move, current_user.user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def archive_item_endpoint(
@@ -103,12 +193,8 @@ async def archive_item_endpoint(
         raise HTTPException(status_code=404, detail="Item not found")
     
     # Verify user has editor+ role
-    db_list = db.query(ListModel).filter(ListModel.id == db_item.list_id).first()
-    membership = db.query(WorkspaceMembership).filter(
-        WorkspaceMembership.workspace_id == db_list.workspace_id,
-        WorkspaceMembership.user_id == current_user.user_id,
-        WorkspaceMembership.status == 'accepted'
-    ).first()
+    db_list = item_repository(db).get_list(db_item.list_id)
+    membership = load_membership(db, db_list.workspace_id, current_user.user_id)
     
     if not membership or membership.role not in ['owner', 'admin', 'editor']:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
@@ -1,29 +1,42 @@
 from sqlalchemy.orm import Session
 from uuid import UUID
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple
 
-from shared.models import Item, AuditLog, List as ListModel, Comment
+from shared.models import Item, AuditLog, Comment
 from shared.schemas import (
-    ItemCreate, ItemUpdate, ItemResponse,
+    ItemCreate, ItemUpdate, ItemMove, ItemResponse,
     CommentCreate, CommentResponse
 )
+from shared.rank import rank_between, needs_rebalance
+from shared.repository import item_repository
+
+# Filtered counts below this planner estimate are cheap enough to count exactly
+EXACT_COUNT_THRESHOLD = 1000
+
+# Every function takes db as a Session, or a shared.repository.MemoryStore in tests
 
 # Item operations
 def create_item(db: Session, list_id: UUID, item_data: ItemCreate, user_id: UUID) -> Item:
     """Create a new item in a list"""
+    repo = item_repository(db)
     # Get the list to find workspace_id for audit
-    db_list = db.query(ListModel).filter(ListModel.id == list_id).first()
+    db_list = repo.get_list(list_id)
+    values = repo.validator(db_list).validate(item_data.values or {})
+    
+    # Append after the current last item
+    last_rank = repo.last_position(list_id)
     
     db_item = Item(
         list_id=list_id,
         title=item_data.title,
-        values=item_data.values or {},
+        values=values,
+        position=rank_between(last_rank, None),
         created_by=user_id,
         updated_by=user_id
     )
-    db.add(db_item)
-    db.flush()
+    repo.add(db_item)
+    repo.adjust_item_count(list_id, 1)
     
     # Add audit log
     audit = AuditLog(
@@ -34,40 +47,79 @@ def create_item(db: Session, list_id: UUID, item_data: ItemCreate, user_id: UUID
         entity_id=db_item.id,
         details={'list_id': str(list_id), 'title': item_data.title}
     )
-    db.add(audit)
+    repo.add(audit)
     
-    db.commit()
-    db.refresh(db_item)
+    repo.commit()
+    repo.refresh(db_item)
+    if needs_rebalance(db_item.position):
+        repo.rebalance_later(list_id)
     return db_item
 
 def get_list_items(
     db: Session, 
     list_id: UUID, 
     limit: int = 100, 
-    offset: int = 0
+    offset: int = 0,
+    filters: Optional[Dict[str, Any]] = None
 ) -> List[Item]:
     """Get all items in a list with pagination"""
-    return db.query(Item).filter(
-        Item.list_id == list_id,
-        Item.archived_at.is_(None)
-    ).order_by(Item.position, Item.created_at).limit(limit).offset(offset).all()
+    return item_repository(db).list_items(list_id, limit, offset, filters)
+
+def get_link_summaries(db: Session, item_ids: List[UUID], top_n: int = 3) -> Dict[UUID, List[Dict[str, Any]]]:
+    """
+    Link counts and the first top_n linked items per relationship for a page
+    of items, in one query. Returns item id -> summaries.
+    """
+    if not item_ids:
+        return {}
+    return item_repository(db).link_summaries(item_ids, top_n)
+
+def count_list_items(
+    db: Session,
+    list_id: UUID,
+    filters: Optional[Dict[str, Any]] = None,
+    exact: bool = False
+) -> Tuple[int, bool]:
+    """
+    Count live items in a list.
+    Returns (count, is_exact). Unfiltered counts come from the maintained
+    lists.item_count counter; filtered counts use the planner estimate unless
+    exact is requested or the estimate is small enough to count cheaply.
+    """
+    repo = item_repository(db)
+    total = repo.item_count(list_id)
+    if not filters:
+        return total, True
+    
+    if not exact:
+        estimate = min(repo.estimate_count(list_id, filters), total)
+        if estimate > EXACT_COUNT_THRESHOLD:
+            return estimate, False
+    
+    return repo.count_matching(list_id, filters), True
 
 def get_item(db: Session, item_id: UUID) -> Optional[Item]:
     """Get a specific item"""
-    return db.query(Item).filter(Item.id == item_id).first()
+    return item_repository(db).get_item(item_id)
 
 def update_item(db: Session, item_id: UUID, item_update: ItemUpdate, user_id: UUID) -> Item:
     """Update item details"""
-    db_item = db.query(Item).filter(Item.id == item_id).first()
-    db_list = db.query(ListModel).filter(ListModel.id == db_item.list_id).first()
+    repo = item_repository(db)
+    db_item = repo.get_item(item_id)
+    db_list = repo.get_list(db_item.list_id)
     
     update_data = item_update.model_dump(exclude_unset=True)
     
+    validator = repo.validator(db_list)
+    changed_keys = []
+    
     # Handle values update - merge with existing values
     if 'values' in update_data and update_data['values'] is not None:
-        existing_values = db_item.values or {}
-        existing_values.update(update_data['values'])
-        db_item.values = existing_values
+        coerced = validator.coerce(update_data['values'])
+        changed_keys = list(coerced)
+        merged_values = {**(db_item.values or {}), **coerced}
+        validator.check_required(merged_values)
+        db_item.values = merged_values
         del update_data['values']
     
     # Update other fields
@@ -77,6 +129,11 @@ def update_item(db: Session, item_id: UUID, item_update: ItemUpdate, user_id: UU
     db_item.updated_by = user_id
     db_item.updated_at = datetime.utcnow()
     
+    # Lookup/rollup columns on linked items that read the edited fields
+    stale = [d for d in validator.dependents if d.depends_on(changed_keys, 'title' in update_data)]
+    if stale:
+        repo.refresh_dependents(stale, item_id)
+    
     # Add audit log
     audit = AuditLog(
         workspace_id=db_list.workspace_id,
@@ -86,21 +143,76 @@ def update_item(db: Session, item_id: UUID, item_update: ItemUpdate, user_id: UU
         entity_id=item_id,
         metadata=item_update.model_dump(exclude_unset=True)
     )
-    db.add(audit)
+    repo.add(audit)
+    
+    repo.commit()
+    repo.refresh(db_item)
+    return db_item
+
+def move_item(db: Session, item_id: UUID, item_move: ItemMove, user_id: UUID) -> Item:
+    """
+    Move an item by giving it a rank between its new neighbours.
+    Only the moved item's row is rewritten.
+    """
+    repo = item_repository(db)
+    db_item = repo.get_item(item_id)
+    db_list = repo.get_list(db_item.list_id)
+    
+    if item_move.after_id:
+        lower = repo.sibling_position(db_item, item_move.after_id)
+        if lower is None:
+            raise ValueError("after_id is not an item in this list")
+        upper = repo.next_position(db_item, above=lower)
+    elif item_move.before_id:
+        upper = repo.sibling_position(db_item, item_move.before_id)
+        if upper is None:
+            raise ValueError("before_id is not an item in this list")
+        lower = repo.previous_position(db_item, below=upper)
+    else:
+        lower = None
+        upper = repo.next_position(db_item)
+    
+    old_rank = db_item.position
+    db_item.position = rank_between(lower, upper)
+    db_item.updated_by = user_id
+    db_item.updated_at = datetime.utcnow()
+    
+    # Add audit log
+    audit = AuditLog(
+        workspace_id=db_list.workspace_id,
+        user_id=user_id,
+        action='item.move',
+        entity_type='item',
+        entity_id=item_id,
+        details={'from': old_rank, 'to': db_item.position}
+    )
+    repo.add(audit)
     
-    db.commit()
-    db.refresh(db_item)
+    repo.commit()
+    repo.refresh(db_item)
+    if needs_rebalance(db_item.position):
+        repo.rebalance_later(db_item.list_id)
     return db_item
 
 def archive_item(db: Session, item_id: UUID, user_id: UUID) -> Item:
     """Archive an item (soft delete)"""
-    db_item = db.query(Item).filter(Item.id == item_id).first()
-    db_list = db.query(ListModel).filter(ListModel.id == db_item.list_id).first()
+    repo = item_repository(db)
+    db_item = repo.get_item(item_id)
+    db_list = repo.get_list(db_item.list_id)
+    
+    was_live = db_item.archived_at is None
+    if was_live:
+        repo.adjust_item_count(db_item.list_id, -1)
     
     db_item.archived_at = datetime.utcnow()
     db_item.updated_at = datetime.utcnow()
     db_item.updated_by = user_id
     
+    # Archived items drop out of the lookups and rollups of items linked to them
+    dependents = repo.validator(db_list).dependents if was_live else []
+    if dependents:
+        repo.refresh_dependents(dependents, item_id)
+    
     # Add audit log
     audit = AuditLog(
         workspace_id=db_list.workspace_id,
@@ -110,25 +222,25 @@ def archive_item(db: Session, item_id: UUID, user_id: UUID) -> Item:
         entity_id=item_id,
         details={'title': db_item.title}
     )
-    db.add(audit)
+    repo.add(audit)
     
-    db.commit()
-    db.refresh(db_item)
+    repo.commit()
+    repo.refresh(db_item)
     return db_item
 
 # Comment operations
 def create_comment(db: Session, item_id: UUID, comment_data: CommentCreate, user_id: UUID) -> Comment:
     """Create a comment on an item"""
-    db_item = db.query(Item).filter(Item.id == item_id).first()
-    db_list = db.query(ListModel).filter(ListModel.id == db_item.list_id).first()
+    repo = item_repository(db)
+    db_item = repo.get_item(item_id)
+    db_list = repo.get_list(db_item.list_id)
     
     db_comment = Comment(
         item_id=item_id,
         user_id=user_id,
         content=comment_data.content
     )
-    db.add(db_comment)
-    db.flush()
+    repo.add(db_comment)
     
     # Add audit log
     audit = AuditLog(
@@ -139,23 +251,22 @@ def create_comment(db: Session, item_id: UUID, comment_data: CommentCreate, user
         entity_id=db_comment.id,
         details={'item_id': str(item_id)}
     )
-    db.add(audit)
+    repo.add(audit)
     
-    db.commit()
-    db.refresh(db_comment)
+    repo.commit()
+    repo.refresh(db_comment)
     return db_comment
 
 def get_item_comments(db: Session, item_id: UUID) -> List[Comment]:
     """Get all comments for an item"""
-    return db.query(Comment).filter(
-        Comment.item_id == item_id
-    ).order_by(Comment.created_at.desc()).all()
+    return item_repository(db).list_comments(item_id)
 
 def delete_comment(db: Session, comment_id: UUID, user_id: UUID) -> None:
     """Delete a comment"""
-    db_comment = db.query(Comment).filter(Comment.id == comment_id).first()
-    db_item = db.query(Item).filter(Item.id == db_comment.item_id).first()
-    db_list = db.query(ListModel).filter(ListModel.id == db_item.list_id).first()
+    repo = item_repository(db)
+    db_comment = repo.get_comment(comment_id)
+    db_item = repo.get_item(db_comment.item_id)
+    db_list = repo.get_list(db_item.list_id)
     
     # Add audit log before deletion
     audit = AuditLog(
@@ -166,8 +277,8 @@ def delete_comment(db: Session, comment_id: UUID, user_id: UUID) -> None:
         entity_id=comment_id,
         details={'item_id': str(db_comment.item_id)}
     )
-    db.add(audit)
-    db.commit()
+    repo.add(audit)
+    repo.commit()
     
-    db.query(Comment).filter(Comment.id == comment_id).delete()
-    db.commit()
+    repo.delete_comment(comment_id)
+    repo.commit()
@@ -0,0 +1 @@
+# Job service module
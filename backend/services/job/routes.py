@@ -0,0 +1,79 @@
+# Job service module
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List
+from uuid import UUID
+
+from shared.database import get_db
+from shared.auth import get_current_user, get_workspace_membership, CurrentUser
+from shared.models import WorkspaceMembership
+from shared.schemas import BackgroundJobResponse
+from shared.jobs import enqueue, JOB_RUNNERS
+from services.job.service import get_job, get_workspace_jobs, requeue_job
+
+router = APIRouter()
+
+@router.get("/workspaces/{workspace_id}/jobs", response_model=List[BackgroundJobResponse])
+async def list_jobs(
+    workspace_id: UUID,
+    limit: int = Query(50, ge=1, le=500),
+    membership = Depends(get_workspace_membership),
+    db: Session = Depends(get_db)
+):
+    """Get recent background jobs for a workspace"""
+    return get_workspace_jobs(db, workspace_id, limit)
+
+@router.get("/jobs/{job_id}", response_model=BackgroundJobResponse)
+async def get_job_endpoint(
+    job_id: UUID,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the status and progress of a background job"""
+    db_job = get_job(db, job_id)
+    if not db_job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    membership = db.query(WorkspaceMembership).filter(
+        WorkspaceMembership.workspace_id == db_job.workspace_id,
+        WorkspaceMembership.user_id == current_user.user_id,
+        WorkspaceMembership.status == 'accepted'
+    ).first()
+    
+    if not membership:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    return db_job
+
+@router.post("/jobs/{job_id}/resume", response_model=BackgroundJobResponse)
+async def resume_job_endpoint(
+    job_id: UUID,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Resume a failed or interrupted background job from its last checkpoint"""
+    db_job = get_job(db, job_id)
+    if not db_job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # Verify user has editor+ role
+    membership = db.query(WorkspaceMembership).filter(
+        WorkspaceMembership.workspace_id == db_job.workspace_id,
+        WorkspaceMembership.user_id == current_user.user_id,
+        WorkspaceMembership.status == 'accepted'
+    ).first()
+    
+    if not membership or membership.role not in ['owner', 'admin', 'editor']:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    
+    runner = JOB_RUNNERS.get(db_job.kind)
+    if runner is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Jobs of kind '{db_job.kind}' cannot be resumed")
+    
+    try:
+        db_job = requeue_job(db, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    
+    enqueue(runner, str(db_job.id))
+    return db_job
@@ -0,0 +1,70 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from uuid import UUID
+from typing import List, Optional, Dict, Any
+
+from shared.models import BackgroundJob
+
+def create_job(
+    db: Session, workspace_id: UUID, kind: str, params: Dict[str, Any], user_id: UUID,
+    total: Optional[int] = None
+) -> BackgroundJob:
+    """Record a queued background job (the caller commits, then enqueues)"""
+    db_job = BackgroundJob(
+        workspace_id=workspace_id,
+        kind=kind,
+        status='queued',
+        params=params,
+        progress=0,
+        total=total,
+        result={},
+        created_by=user_id
+    )
+    db.add(db_job)
+    db.flush()
+    return db_job
+
+def get_job(db: Session, job_id: UUID) -> Optional[BackgroundJob]:
+    """Get a specific background job"""
+    return db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+
+def get_workspace_jobs(db: Session, workspace_id: UUID, limit: int = 50) -> List[BackgroundJob]:
+    """Get the most recent background jobs for a workspace"""
+    return db.query(BackgroundJob).filter(
+        BackgroundJob.workspace_id == workspace_id
+    ).order_by(BackgroundJob.created_at.desc()).limit(limit).all()
+
+def has_active_job(db: Session, workspace_id: UUID, kind: str, **params: Any) -> bool:
+    """Whether a queued or running job of this kind matches the given params"""
+    query = db.query(BackgroundJob.id).filter(
+        BackgroundJob.kind == kind,
+        BackgroundJob.workspace_id == workspace_id,
+        BackgroundJob.status.in_(['queued', 'running'])
+    )
+    if params:
+        query = query.filter(BackgroundJob.params.contains(params))
+    return query.first() is not None
+
+def _held_by_worker(db: Session, job_id: UUID) -> bool:
+    """Whether a worker is still running the job (run_job holds its advisory lock)"""
+    if db.get_bind().dialect.name != 'postgresql':
+        return True
+    # Taken for this transaction only, so it also keeps a worker off the job until we commit
+    return not db.execute(
+        text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"), {'key': f'job:{job_id}'}
+    ).scalar()
+
+def requeue_job(db: Session, job_id: UUID) -> BackgroundJob:
+    """Mark an unfinished job as queued again so it resumes from its last checkpoint"""
+    db_job = db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+    if db_job.status in ('completed', 'cancelled'):
+        raise ValueError(f"Job is already {db_job.status}")
+    # A 'running' row whose worker died holds no lock and may be resumed
+    if db_job.status == 'running' and _held_by_worker(db, db_job.id):
+        raise ValueError("Job is still running")
+    
+    db_job.status = 'queued'
+    db_job.finished_at = None
+    db.commit()
+    db.refresh(db_job)
+    return db_job
@@ -0,0 +1,350 @@
+"""Background jobs for the list service"""
+import json
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import text, bindparam, select, update, literal, Text, func, or_
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from shared.database import SessionLocal, get_engine
+from shared.cache import invalidate_workspace
+from shared.column_types import compile_converter
+from shared.derived import get_derived_column
+from shared.jobs import run_job, job_runner
+from shared.models import List as ListModel, Column_, Item, BackgroundJob
+from shared.rank import rank_sequence
+from shared.schema_registry import bump_schema_version
+from shared.validation import unique_index_name
+
+# Rows rewritten per transaction when stripping a deleted column's key
+PURGE_BATCH_SIZE = int(os.getenv('COLUMN_PURGE_BATCH_SIZE', '2000'))
+# Pause between batches to cap WAL volume and give autovacuum/replicas room
+PURGE_THROTTLE_SECONDS = float(os.getenv('COLUMN_PURGE_THROTTLE_SECONDS', '0.2'))
+# SQLSTATE of a lock wait that ran into lock_timeout
+LOCK_NOT_AVAILABLE = '55P03'
+# Rows converted per transaction during a column type change
+CONVERT_BATCH_SIZE = int(os.getenv('COLUMN_CONVERT_BATCH_SIZE', '1000'))
+CONVERT_THROTTLE_SECONDS = float(os.getenv('COLUMN_CONVERT_THROTTLE_SECONDS', '0.1'))
+# Rows recomputed per transaction when backfilling a lookup/rollup column
+DERIVE_BATCH_SIZE = int(os.getenv('COLUMN_DERIVE_BATCH_SIZE', '1000'))
+DERIVE_THROTTLE_SECONDS = float(os.getenv('COLUMN_DERIVE_THROTTLE_SECONDS', '0.1'))
+# Unconvertible cells listed individually in the job report (all are counted)
+CONVERT_REPORT_LIMIT = 1000
+# Constraint violations listed individually in the job report (all are counted)
+VIOLATION_REPORT_LIMIT = 100
+
+def rebalance_list_ranks(workspace_id: str) -> None:
+    """Reassign evenly spaced short rank keys to every live list in a workspace"""
+    db = SessionLocal()
+    try:
+        # One rebalance per workspace at a time; a concurrent run will cover this one
+        locked = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"),
+            {'key': f'rank:lists:{workspace_id}'}
+        ).scalar()
+        if not locked:
+            return
+        
+        ids = [row[0] for row in db.query(ListModel.id).filter(
+            ListModel.workspace_id == workspace_id,
+            ListModel.archived_at.is_(None)
+        ).order_by(ListModel.position, ListModel.created_at).with_for_update()]
+        if not ids:
+            return
+        
+        lists = ListModel.__table__
+        stmt = lists.update().where(lists.c.id == bindparam('list_id')).values(
+            position=bindparam('rank'),
+            updated_at=lists.c.updated_at  # reordering is not an edit
+        )
+        db.execute(stmt, [
+            {'list_id': list_id, 'rank': rank}
+            for list_id, rank in zip(ids, rank_sequence(len(ids)))
+        ])
+        invalidate_workspace(db, workspace_id)
+        db.commit()
+    finally:
+        db.close()
+
+def _purge_column_key(db: Session, job: BackgroundJob) -> dict:
+    list_id = job.params['list_id']
+    key = job.params['key']
+    
+    if job.params.get('column_id'):
+        _drop_unique_index(job.params['column_id'])
+    
+    if job.total is None:
+        job.total = db.query(Item.id).filter(
+            Item.list_id == list_id,
+            Item.values.has_key(key)
+        ).count()
+        db.commit()
+    
+    remaining = db.query(Item.id).filter(Item.list_id == list_id, Item.values.has_key(key))
+    skip_locked = True
+    while True:
+        # Short lock waits; rows locked by a concurrent edit are skipped and
+        # waited for once nothing else is left
+        db.execute(text("SET LOCAL lock_timeout = '2s'"))
+        batch = select(Item.id).where(
+            Item.list_id == list_id,
+            Item.values.has_key(key)
+        ).limit(PURGE_BATCH_SIZE).with_for_update(skip_locked=skip_locked).scalar_subquery()
+        try:
+            stripped = db.execute(
+                update(Item).where(Item.id.in_(batch)).values(
+                    values=Item.values.op('-', return_type=JSONB)(literal(key, Text)),
+                    updated_at=Item.updated_at  # schema cleanup is not an edit
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+        except DBAPIError as e:
+            if getattr(e.orig, 'pgcode', None) != LOCK_NOT_AVAILABLE:
+                raise
+            db.rollback()  # still locked after lock_timeout; try again after a pause
+            stripped = 0
+        else:
+            job.progress = job.progress + stripped
+            db.commit()
+        
+        if stripped == 0:
+            # A plain count does not skip (or wait for) locked rows
+            if remaining.order_by(None).count() == 0:
+                break
+            skip_locked = False
+        else:
+            skip_locked = True
+        time.sleep(PURGE_THROTTLE_SECONDS)
+    
+    return {'rows_stripped': job.progress}
+
+@job_runner('column.purge')
+def purge_column_values(job_id: str) -> None:
+    """Strip a deleted column's key from items.values in throttled batches"""
+    run_job(job_id, _purge_column_key)
+
+# One UPDATE per batch: converted cells are passed as a JSON array of {id, v}
+_WRITE_CONVERTED = text("""
+    UPDATE items SET values = jsonb_set(items.values, ARRAY[:key], COALESCE(batch.v, 'null'::jsonb))
+    FROM jsonb_to_recordset(CAST(:batch AS JSONB)) AS batch(id uuid, v jsonb)
+    WHERE items.id = batch.id
+""")
+
+def _convert_rows(db: Session, rows, key: str, converter, report: dict) -> None:
+    """Convert (id, value) rows in place, recording cells that cannot be converted"""
+    converted = []
+    for item_id, value in rows:
+        try:
+            new_value = converter(value)
+        except ValueError as e:
+            report['failed'] += 1
+            if len(report['failures']) < CONVERT_REPORT_LIMIT:
+                report['failures'].append({'item_id': str(item_id), 'value': value, 'error': str(e)})
+            continue
+        if new_value != value or type(new_value) is not type(value):
+            converted.append({'id': str(item_id), 'v': new_value})
+    if converted:
+        db.execute(_WRITE_CONVERTED, {'key': key, 'batch': json.dumps(converted)})
+        report['converted'] += len(converted)
+
+def _convert_column(db: Session, job: BackgroundJob) -> dict:
+    column_id = job.params['column_id']
+    list_id = job.params['list_id']
+    key = job.params['key']
+    to_type = job.params['to_type']
+    
+    column = db.query(Column_).filter(Column_.id == column_id).first()
+    if column is None:
+        # Column deleted mid-conversion; its values are being purged anyway
+        job.status = 'cancelled'
+        return None
+    config = dict(column.config or {})
+    converter = compile_converter(to_type, config)
+    
+    report = dict(job.result or {})
+    report.setdefault('converted', 0)
+    report.setdefault('failed', 0)
+    report.setdefault('failures', [])
+    cursor = report.get('cursor')
+    
+    # Walk the list's items in id order; the cursor makes the job resumable
+    ids_query = db.query(Item.id).filter(Item.list_id == list_id, Item.values.has_key(key))
+    if cursor:
+        ids_query = ids_query.filter(Item.id > cursor)
+    ids = [row[0] for row in ids_query.order_by(Item.id)]
+    if job.total is None:
+        job.total = len(ids)
+    
+    for start in range(0, len(ids), CONVERT_BATCH_SIZE):
+        batch_ids = ids[start:start + CONVERT_BATCH_SIZE]
+        rows = db.query(Item.id, Item.values[key]).filter(Item.id.in_(batch_ids)).all()
+        _convert_rows(db, rows, key, converter, report)
+        
+        report['cursor'] = str(batch_ids[-1])
+        job.progress = job.progress + len(batch_ids)
+        job.result = dict(report)
+        db.commit()
+        time.sleep(CONVERT_THROTTLE_SECONDS)
+    
+    # Catch up on cells edited (in the old representation) since the job started,
+    # then flip the type in the same transaction
+    column = db.query(Column_).filter(Column_.id == column_id).with_for_update().first()
+    if column is None:
+        job.status = 'cancelled'
+        return None
+    edited = db.query(Item.id, Item.values[key]).filter(
+        Item.list_id == list_id,
+        Item.values.has_key(key),
+        Item.updated_at >= job.started_at
+    ).all()
+    _convert_rows(db, edited, key, converter, report)
+    
+    column.type = to_type
+    config.pop('conversion', None)
+    column.config = config
+    column.updated_at = datetime.utcnow()
+    bump_schema_version(db, column.list_id)
+    
+    report.pop('cursor', None)
+    return report
+
+@job_runner('column.convert')
+def convert_column_values(job_id: str) -> None:
+    """Convert a column's stored values to its new type in resumable batches, then flip the type"""
+    run_job(job_id, _convert_column)
+
+def _quote_literal(value: str) -> str:
+    """Quote a string for DDL, which cannot take bind parameters"""
+    return "'" + value.replace("'", "''") + "'"
+
+def _drop_unique_index(column_id: str) -> None:
+    with get_engine().connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {unique_index_name(column_id)}'))
+
+def _create_unique_index(column_id: str, list_id: str, key: str) -> None:
+    """Build the column's partial unique index without blocking writes"""
+    _drop_unique_index(column_id)  # clear an INVALID leftover from an earlier failed build
+    with get_engine().connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX CONCURRENTLY {unique_index_name(column_id)} "
+            f"ON items (list_id, (values->>{_quote_literal(key)})) "
+            f"WHERE list_id = {_quote_literal(str(list_id))} AND archived_at IS NULL"
+        ))
+
+def _find_violations(db: Session, list_id: str, key: str, is_unique: bool, is_required: bool) -> dict:
+    violations = {}
+    live = [Item.list_id == list_id, Item.archived_at.is_(None)]
+    value = Item.values[key].astext
+    
+    if is_required:
+        missing = db.query(Item.id).filter(
+            *live, or_(value.is_(None), func.btrim(value) == '')
+        )
+        count = missing.order_by(None).count()
+        if count:
+            violations['is_required'] = {
+                'count': count,
+                'item_ids': [str(row[0]) for row in missing.limit(VIOLATION_REPORT_LIMIT)]
+            }
+    
+    if is_unique:
+        duplicates = db.query(
+            value, func.count(Item.id), func.array_agg(Item.id)
+        ).filter(*live, value.isnot(None)).group_by(value).having(func.count(Item.id) > 1)
+        count = duplicates.order_by(None).count()
+        if count:
+            violations['is_unique'] = {
+                'count': count,
+                'duplicates': [
+                    {'value': dup_value, 'count': n, 'item_ids': [str(i) for i in ids[:10]]}
+                    for dup_value, n, ids in duplicates.limit(VIOLATION_REPORT_LIMIT)
+                ]
+            }
+    return violations
+
+def _apply_column_constraints(db: Session, job: BackgroundJob) -> dict:
+    column_id = job.params['column_id']
+    column = db.query(Column_).filter(Column_.id == column_id).first()
+    if column is None:
+        job.status = 'cancelled'
+        return None
+    list_id, key = str(column.list_id), column.key
+    enable_unique = job.params.get('is_unique') is True
+    enable_required = job.params.get('is_required') is True
+    
+    if job.params.get('is_unique') is False:
+        _drop_unique_index(column_id)
+    
+    # Check existing rows first; violations are reported, not enforced
+    violations = _find_violations(db, list_id, key, enable_unique, enable_required)
+    db.commit()
+    
+    if enable_unique and not violations:
+        try:
+            _create_unique_index(column_id, list_id, key)
+        except DBAPIError as e:
+            # A duplicate was written while the index was being built
+            _drop_unique_index(column_id)
+            violations['is_unique'] = {'count': None, 'error': str(e.orig).strip()}
+    
+    column = db.query(Column_).filter(Column_.id == column_id).with_for_update().first()
+    if column is None:
+        _drop_unique_index(column_id)
+        job.status = 'cancelled'
+        return None
+    if not violations:
+        if enable_unique:
+            column.is_unique = True
+        if enable_required:
+            column.is_required = True
+    config = dict(column.config or {})
+    config.pop('constraint_check', None)
+    column.config = config
+    bump_schema_version(db, column.list_id)
+    
+    return {'enabled': not violations, 'violations': violations}
+
+@job_runner('column.constraints')
+def apply_column_constraints(job_id: str) -> None:
+    """Verify existing rows and then enable (or drop) a column's unique/required constraints"""
+    run_job(job_id, _apply_column_constraints)
+
+# Lookup / rollup backfill
+def _derive_column(db: Session, job: BackgroundJob) -> dict:
+    derived = get_derived_column(db, job.params['column_id'])
+    if derived is None:
+        # Column or relationship deleted since the job was queued
+        job.status = 'cancelled'
+        return None
+    
+    report = dict(job.result or {})
+    cursor = report.get('cursor')
+    
+    # Walk the list's items in id order; the cursor makes the job resumable.
+    # Link and item writes keep already-visited rows current meanwhile.
+    ids_query = db.query(Item.id).filter(Item.list_id == derived.list_id)
+    if cursor:
+        ids_query = ids_query.filter(Item.id > cursor)
+    ids = [row[0] for row in ids_query.order_by(Item.id)]
+    if job.total is None:
+        job.total = len(ids)
+    
+    for start in range(0, len(ids), DERIVE_BATCH_SIZE):
+        batch_ids = ids[start:start + DERIVE_BATCH_SIZE]
+        derived.refresh_items(db, batch_ids)
+        
+        report['cursor'] = str(batch_ids[-1])
+        job.progress = job.progress + len(batch_ids)
+        job.result = dict(report)
+        db.commit()
+        time.sleep(DERIVE_THROTTLE_SECONDS)
+    
+    report.pop('cursor', None)
+    return report
+
+@job_runner('column.derive')
+def derive_column_values(job_id: str) -> None:
+    """Compute a lookup/rollup column for every item of its list in resumable batches"""
+    run_job(job_id, _derive_column)
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
@@ -6,17 +7,23 @@ from uuid import UUID
 from shared.database import get_db
 from shared.auth import get_current_user, get_workspace_membership, require_role, CurrentUser
 from shared.models import WorkspaceMembership
+from shared.coalesce import coalesced_json
+from shared.query_stats import query_budget
 from shared.schemas import (
-    ListCreate, ListUpdate, ListResponse,
-    ColumnCreate, ColumnUpdate, ColumnResponse
+    ListCreate, ListUpdate, ListMove, ListResponse,
+    ColumnCreate, ColumnUpdate, ColumnResponse,
+    BackgroundJobResponse
 )
 from services.list.service import (
-    create_list, get_workspace_lists, get_list, update_list, archive_list,
+    create_list, get_workspace_lists, get_list, update_list, move_list, archive_list,
     create_column, get_list_columns, get_column, update_column, delete_column
 )
 
 router = APIRouter()
 
+_list_list = TypeAdapter(List[ListResponse])
+_column_list = TypeAdapter(List[ColumnResponse])
+
 # List endpoints
 @router.post("/workspaces/{workspace_id}/lists", response_model=ListResponse, status_code=status.HTTP_201_CREATED)
 async def create_list_endpoint(
@@ -29,16 +36,20 @@ async def create_list_endpoint(
     """Create a new list"""
     return create_list(db, workspace_id, list_data, current_user.user_id)
 
-@router.get("/workspaces/{workspace_id}/lists", response_model=List[ListResponse])
+@router.get("/workspaces/{workspace_id}/lists", response_model=List[ListResponse], dependencies=[Depends(query_budget(4))])
 async def list_lists(
     workspace_id: UUID,
+    request: Request,
     membership = Depends(get_workspace_membership),
     db: Session = Depends(get_db)
 ):
     """Get all lists in a workspace"""
-    return get_workspace_lists(db, workspace_id)
+    return await coalesced_json(
+        request, f"workspace:{workspace_id}", _list_list,
+        lambda: (get_workspace_lists(db, workspace_id), {})
+    )
 
-@router.get("/lists/{list_id}", response_model=ListResponse)
+@router.get("/lists/{list_id}", response_model=ListResponse, dependencies=[Depends(query_budget(5))])
 async def get_list_endpoint(
     list_id: UUID,
     current_user: CurrentUser = Depends(get_current_user),
@@ -85,6 +96,33 @@ async def update_list_endpoint(
     
     return update_list(db, list_id, list_update, current_user.user_id)
 
+@router.post("/lists/{list_id}/move", response_model=ListResponse)
+async def move_list_endpoint(
+    list_id: UUID,
+    list_move: ListMove,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Move a list within its workspace"""
+    db_list = get_list(db, list_id)
+    if not db_list:
+        raise HTTPException(status_code=404, detail="List not found")
+    
+    # Verify user has editor+ role
+    membership = db.query(WorkspaceMembership).filter(
+        WorkspaceMembership.workspace_id == db_list.workspace_id,
+        WorkspaceMembership.user_id == current_user.user_id,
+        WorkspaceMembership.status == 'accepted'
+    ).first()
+    
+    if not membership or membership.role not in ['owner', 'admin', 'editor']:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    
+    try:
+        return move_list(db, list_id, list_move, current_user.user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 @router.delete("/lists/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def archive_list_endpoint(
     list_id: UUID,
@@ -132,16 +170,24 @@ async def create_column_endpoint(
     if not membership or membership.role not in ['owner', 'admin', 'editor']:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    return create_column(db, list_id, column_data, current_user.user_id)
+    try:
+        return create_column(db, list_id, column_data, current_user.user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
-@router.get("/lists/{list_id}/columns", response_model=List[ColumnResponse])
+@router.get("/lists/{list_id}/columns", response_model=List[ColumnResponse], dependencies=[Depends(query_budget(3))])
 async def list_columns(
     list_id: UUID,
+    request: Request,
     current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all columns for a list"""
-    return get_list_columns(db, list_id)
+    # Any authenticated user may read a list's columns, so the body is shared by all of them
+    return await coalesced_json(
+        request, 'authenticated', _column_list,
+        lambda: (get_list_columns(db, list_id), {})
+    )
 
 @router.patch("/columns/{column_id}", response_model=ColumnResponse)
 async def update_column_endpoint(
@@ -167,15 +213,18 @@ async def update_column_endpoint(
     if not membership or membership.role not in ['owner', 'admin', 'editor']:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    return update_column(db, column_id, column_update, current_user.user_id)
+    try:
+        return update_column(db, column_id, column_update, current_user.user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
-@router.delete("/columns/{column_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/columns/{column_id}", response_model=BackgroundJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def delete_column_endpoint(
     column_id: UUID,
     current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a column"""
+    """Delete a column; returns the job that purges its values from items"""
     db_column = get_column(db, column_id)
     if not db_column:
         raise HTTPException(status_code=404, detail="Column not found")
@@ -192,5 +241,4 @@ async def delete_column_endpoint(
     if not membership or membership.role not in ['owner', 'admin', 'editor']:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    delete_column(db, column_id, current_user.user_id)
-    return None
+    return delete_column(db, column_id, current_user.user_id)
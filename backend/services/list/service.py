@@ -1,26 +1,47 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from uuid import UUID
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from shared.models import List as ListModel, Column_, Item, AuditLog
+from shared.models import List as ListModel, Column_, Item, AuditLog, BackgroundJob
 from shared.schemas import (
-    ListCreate, ListUpdate, ListResponse,
+    ListCreate, ListUpdate, ListMove, ListResponse, ListItemCount,
     ColumnCreate, ColumnUpdate, ColumnResponse
 )
+from shared.rank import rank_between, needs_rebalance
+from shared.cache import cache, invalidate_workspace, item_counts_scope, workspace_of_list
+from shared.jobs import enqueue
+from shared.column_types import COLUMN_TYPES
+from shared.derived import DERIVED_TYPES, resolve_config, related_list_id
+from shared.schema_registry import bump_schema_version
+from services.list.jobs import (
+    rebalance_list_ranks, purge_column_values, convert_column_values, apply_column_constraints,
+    derive_column_values
+)
+from services.job.service import create_job, has_active_job
 
 # List operations
 def create_list(db: Session, workspace_id: UUID, list_data: ListCreate, user_id: UUID) -> ListModel:
     """Create a new list in a workspace"""
+    # Append after the current last list
+    last_rank = db.query(func.max(ListModel.position)).filter(
+        ListModel.workspace_id == workspace_id,
+        ListModel.archived_at.is_(None)
+    ).scalar()
+    
     db_list = ListModel(
         workspace_id=workspace_id,
         name=list_data.name,
         description=list_data.description,
+        position=rank_between(last_rank, None),
         created_by=user_id
     )
     db.add(db_list)
     db.flush()
     
+    invalidate_workspace(db, workspace_id)
+    
     # Add audit log
     audit = AuditLog(
         workspace_id=workspace_id,
@@ -34,18 +55,51 @@ def create_list(db: Session, workspace_id: UUID, list_data: ListCreate, user_id:
     
     db.commit()
     db.refresh(db_list)
+    if needs_rebalance(db_list.position):
+        enqueue(rebalance_list_ranks, str(workspace_id))
     return db_list
 
-def get_workspace_lists(db: Session, workspace_id: UUID) -> List[ListModel]:
-    """Get all lists in a workspace"""
-    return db.query(ListModel).filter(
-        ListModel.workspace_id == workspace_id,
-        ListModel.archived_at.is_(None)
-    ).order_by(ListModel.position, ListModel.created_at).all()
+def _item_counts(db: Session, workspace_id) -> Dict[UUID, int]:
+    """Item counts of a workspace's lists, cached apart from the list snapshots"""
+    counts = cache.get(
+        'item_counts', item_counts_scope(workspace_id), workspace_id,
+        lambda: db.query(ListModel.id, ListModel.item_count).filter(ListModel.workspace_id == workspace_id).all(),
+        ListItemCount, many=True
+    )
+    return {count.id: count.item_count for count in counts}
+
+def _with_item_counts(db: Session, workspace_id, lists: List[ListResponse]) -> List[ListResponse]:
+    counts = _item_counts(db, workspace_id)
+    return [
+        db_list.model_copy(update={'item_count': counts.get(db_list.id, db_list.item_count)})
+        for db_list in lists
+    ]
 
-def get_list(db: Session, list_id: UUID) -> Optional[ListModel]:
-    """Get a specific list"""
-    return db.query(ListModel).filter(ListModel.id == list_id).first()
+def get_workspace_lists(db: Session, workspace_id: UUID) -> List[ListResponse]:
+    """Get all lists in a workspace (cached snapshots with current item counts)"""
+    lists = cache.get(
+        'lists', workspace_id, workspace_id,
+        lambda: db.query(ListModel).filter(
+            ListModel.workspace_id == workspace_id,
+            ListModel.archived_at.is_(None)
+        ).order_by(ListModel.position, ListModel.created_at).all(),
+        ListResponse, many=True
+    )
+    return _with_item_counts(db, workspace_id, lists)
+
+def get_list(db: Session, list_id: UUID) -> Optional[ListResponse]:
+    """Get a specific list (a cached snapshot with its current item count)"""
+    workspace_id = workspace_of_list(db, list_id)
+    if workspace_id is None:
+        return None
+    db_list = cache.get(
+        'list', workspace_id, list_id,
+        lambda: db.query(ListModel).filter(ListModel.id == list_id).first(),
+        ListResponse
+    )
+    if db_list is None:
+        return None
+    return _with_item_counts(db, workspace_id, [db_list])[0]
 
 def update_list(db: Session, list_id: UUID, list_update: ListUpdate, user_id: UUID) -> ListModel:
     """Update list details"""
@@ -57,6 +111,8 @@ def update_list(db: Session, list_id: UUID, list_update: ListUpdate, user_id: UU
     
     db_list.updated_at = datetime.utcnow()
     
+    invalidate_workspace(db, db_list.workspace_id)
+    
     # Add audit log
     audit = AuditLog(
         workspace_id=db_list.workspace_id,
@@ -72,12 +128,68 @@ def update_list(db: Session, list_id: UUID, list_update: ListUpdate, user_id: UU
     db.refresh(db_list)
     return db_list
 
+def move_list(db: Session, list_id: UUID, list_move: ListMove, user_id: UUID) -> ListModel:
+    """
+    Move a list by giving it a rank between its new neighbours.
+    Only the moved list's row is rewritten.
+    """
+    db_list = db.query(ListModel).filter(ListModel.id == list_id).first()
+    
+    siblings = [
+        ListModel.workspace_id == db_list.workspace_id,
+        ListModel.archived_at.is_(None),
+        ListModel.id != list_id
+    ]
+    
+    if list_move.after_id:
+        lower = db.query(ListModel.position).filter(*siblings, ListModel.id == list_move.after_id).scalar()
+        if lower is None:
+            raise ValueError("after_id is not a list in this workspace")
+        upper = db.query(ListModel.position).filter(
+            *siblings, ListModel.position > lower
+        ).order_by(ListModel.position).limit(1).scalar()
+    elif list_move.before_id:
+        upper = db.query(ListModel.position).filter(*siblings, ListModel.id == list_move.before_id).scalar()
+        if upper is None:
+            raise ValueError("before_id is not a list in this workspace")
+        lower = db.query(ListModel.position).filter(
+            *siblings, ListModel.position < upper
+        ).order_by(ListModel.position.desc()).limit(1).scalar()
+    else:
+        lower = None
+        upper = db.query(ListModel.position).filter(*siblings).order_by(ListModel.position).limit(1).scalar()
+    
+    old_rank = db_list.position
+    db_list.position = rank_between(lower, upper)
+    db_list.updated_at = datetime.utcnow()
+    
+    invalidate_workspace(db, db_list.workspace_id)
+    
+    # Add audit log
+    audit = AuditLog(
+        workspace_id=db_list.workspace_id,
+        user_id=user_id,
+        action='list.move',
+        entity_type='list',
+        entity_id=list_id,
+        details={'from': old_rank, 'to': db_list.position}
+    )
+    db.add(audit)
+    
+    db.commit()
+    db.refresh(db_list)
+    if needs_rebalance(db_list.position):
+        enqueue(rebalance_list_ranks, str(db_list.workspace_id))
+    return db_list
+
 def archive_list(db: Session, list_id: UUID, user_id: UUID) -> ListModel:
     """Archive a list (soft delete)"""
     db_list = db.query(ListModel).filter(ListModel.id == list_id).first()
     db_list.archived_at = datetime.utcnow()
     db_list.updated_at = datetime.utcnow()
     
+    invalidate_workspace(db, db_list.workspace_id)
+    
     # Add audit log
     audit = AuditLog(
         workspace_id=db_list.workspace_id,
@@ -94,24 +206,70 @@ def archive_list(db: Session, list_id: UUID, user_id: UUID) -> ListModel:
     return db_list
 
 # Column operations
+def _start_constraint_check(
+    db: Session, db_list: ListModel, db_column: Column_, changes: dict, user_id: UUID
+) -> BackgroundJob:
+    """
+    Record a job that verifies existing rows before unique/required flags are
+    enabled (and builds or drops the unique index). The flags flip when it
+    succeeds; config['constraint_check'] marks the pending change.
+    """
+    db_job = create_job(
+        db, db_list.workspace_id, 'column.constraints',
+        {'column_id': str(db_column.id), **changes},
+        user_id
+    )
+    db_column.config = {**(db_column.config or {}), 'constraint_check': {'job_id': str(db_job.id), **changes}}
+    return db_job
+
+def _start_derive(db: Session, db_list: ListModel, db_column: Column_, user_id: UUID) -> Optional[BackgroundJob]:
+    """
+    Record a job that computes a lookup/rollup column for existing items; link
+    and item writes keep it current afterwards. The list it reads from gets a
+    new schema version so its item writes start refreshing the column.
+    """
+    read_list_id = related_list_id(db, db_list.id, db_column.config)
+    if read_list_id is not None:
+        bump_schema_version(db, read_list_id)
+    if db_list.item_count == 0:
+        return None
+    return create_job(db, db_list.workspace_id, 'column.derive', {'column_id': str(db_column.id)}, user_id)
+
 def create_column(db: Session, list_id: UUID, column_data: ColumnCreate, user_id: UUID) -> Column_:
     """Create a new column in a list"""
     # Get the list to find workspace_id for audit
     db_list = db.query(ListModel).filter(ListModel.id == list_id).first()
     
+    # Reusing a key while its old values are still being purged would resurrect or lose them
+    if has_active_job(db, db_list.workspace_id, 'column.purge', list_id=str(list_id), key=column_data.key):
+        raise ValueError(f"Values of a deleted column '{column_data.key}' are still being removed; try again shortly")
+    
+    config = column_data.config or {}
+    is_derived = column_data.type in DERIVED_TYPES
+    if is_derived:
+        if column_data.is_unique or column_data.is_required:
+            raise ValueError("Lookup and rollup columns cannot be unique or required")
+        config = resolve_config(db, list_id, column_data.type, config)
+    
     db_column = Column_(
         list_id=list_id,
         key=column_data.key,
         name=column_data.name,
         type=column_data.type,
         position=column_data.position,
-        is_required=column_data.is_required,
-        is_unique=column_data.is_unique,
-        config=column_data.config or {}
+        is_required=False,
+        is_unique=False,
+        config=config
     )
     db.add(db_column)
     db.flush()
     
+    # Constraints are enabled by a background check, never by locking items
+    changes = {flag: True for flag in ('is_unique', 'is_required') if getattr(column_data, flag)}
+    db_job = _start_constraint_check(db, db_list, db_column, changes, user_id) if changes else None
+    derive_job = _start_derive(db, db_list, db_column, user_id) if is_derived else None
+    bump_schema_version(db, list_id)
+    
     # Add audit log
     audit = AuditLog(
         workspace_id=db_list.workspace_id,
@@ -125,13 +283,24 @@ def create_column(db: Session, list_id: UUID, column_data: ColumnCreate, user_id
     
     db.commit()
     db.refresh(db_column)
+    if db_job is not None:
+        enqueue(apply_column_constraints, str(db_job.id))
+    if derive_job is not None:
+        enqueue(derive_column_values, str(derive_job.id))
     return db_column
 
-def get_list_columns(db: Session, list_id: UUID) -> List[Column_]:
-    """Get all columns for a list"""
-    return db.query(Column_).filter(
-        Column_.list_id == list_id
-    ).order_by(Column_.position, Column_.created_at).all()
+def get_list_columns(db: Session, list_id: UUID) -> List[ColumnResponse]:
+    """Get all columns for a list (cached snapshots)"""
+    workspace_id = workspace_of_list(db, list_id)
+    if workspace_id is None:
+        return []
+    return cache.get(
+        'columns', workspace_id, list_id,
+        lambda: db.query(Column_).filter(
+            Column_.list_id == list_id
+        ).order_by(Column_.position, Column_.created_at).all(),
+        ColumnResponse, many=True
+    )
 
 def get_column(db: Session, column_id: UUID) -> Optional[Column_]:
     """Get a specific column"""
@@ -143,10 +312,85 @@ def update_column(db: Session, column_id: UUID, column_update: ColumnUpdate, use
     db_list = db.query(ListModel).filter(ListModel.id == db_column.list_id).first()
     
     update_data = column_update.model_dump(exclude_unset=True)
+    new_type = update_data.pop('type', None)
+    flags = {flag: update_data.pop(flag) for flag in ('is_unique', 'is_required') if flag in update_data}
+    
+    is_derived = db_column.type in DERIVED_TYPES
+    if new_type is not None and new_type != db_column.type and (is_derived or new_type in DERIVED_TYPES):
+        raise ValueError("Columns cannot be converted to or from lookup and rollup types")
+    derive_job = None
+    if is_derived:
+        if any(flags.values()):
+            raise ValueError("Lookup and rollup columns cannot be unique or required")
+        if update_data.get('config') is not None:
+            old_config = db_column.config or {}
+            update_data['config'] = resolve_config(db, db_column.list_id, db_column.type, update_data['config'])
+            old_list_id = related_list_id(db, db_column.list_id, old_config)
+            if old_list_id is not None:
+                bump_schema_version(db, old_list_id)
+            db_column.config = update_data['config']
+            derive_job = _start_derive(db, db_list, db_column, user_id)
+    pending = {
+        marker: (db_column.config or {}).get(marker)
+        for marker in ('conversion', 'constraint_check')
+        if (db_column.config or {}).get(marker)
+    }
     for field, value in update_data.items():
         setattr(db_column, field, value)
+    if pending and 'config' in update_data:
+        # Config edits must not drop in-flight conversion / constraint markers
+        db_column.config = {**(db_column.config or {}), **pending}
+    conversion = pending.get('conversion')
+    
+    # Turning a constraint off is immediate; turning one on is verified in the background
+    constraint_changes = {}
+    for flag, value in flags.items():
+        if value is None or value == getattr(db_column, flag):
+            continue
+        if value:
+            constraint_changes[flag] = True
+        else:
+            setattr(db_column, flag, False)
+            if flag == 'is_unique':
+                constraint_changes[flag] = False  # drop the backing index
+    constraint_job = None
+    if constraint_changes:
+        if pending.get('constraint_check'):
+            raise ValueError("A constraint change for this column is already being applied")
+        constraint_job = _start_constraint_check(db, db_list, db_column, constraint_changes, user_id)
+    update_data.update(flags)
+    
+    # A type change with existing values converts them in the background and
+    # flips the type when done. Until then config['conversion'] tells readers
+    # that values may be in either representation.
+    db_job = None
+    if new_type is not None and new_type != db_column.type:
+        if new_type not in COLUMN_TYPES:
+            raise ValueError(f"Unknown column type '{new_type}'")
+        if conversion:
+            raise ValueError("This column is already being converted to another type")
+        
+        if db_list.item_count == 0:
+            db_column.type = new_type
+        else:
+            db_job = create_job(
+                db, db_list.workspace_id, 'column.convert',
+                {
+                    'column_id': str(column_id),
+                    'list_id': str(db_column.list_id),
+                    'key': db_column.key,
+                    'from_type': db_column.type,
+                    'to_type': new_type
+                },
+                user_id
+            )
+            config = dict(db_column.config or {})
+            config['conversion'] = {'to': new_type, 'job_id': str(db_job.id)}
+            db_column.config = config
+        update_data['type'] = new_type
     
     db_column.updated_at = datetime.utcnow()
+    bump_schema_version(db, db_column.list_id)
     
     # Add audit log
     audit = AuditLog(
@@ -161,10 +405,20 @@ def update_column(db: Session, column_id: UUID, column_update: ColumnUpdate, use
     
     db.commit()
     db.refresh(db_column)
+    if db_job is not None:
+        enqueue(convert_column_values, str(db_job.id))
+    if constraint_job is not None:
+        enqueue(apply_column_constraints, str(constraint_job.id))
+    if derive_job is not None:
+        enqueue(derive_column_values, str(derive_job.id))
     return db_column
 
-def delete_column(db: Session, column_id: UUID, user_id: UUID) -> None:
-    """Delete a column"""
+def delete_column(db: Session, column_id: UUID, user_id: UUID) -> BackgroundJob:
+    """
+    Delete a column.
+    Stripping its key from every item's values happens in a background job,
+    which is returned so callers can follow its progress.
+    """
     db_column = db.query(Column_).filter(Column_.id == column_id).first()
     db_list = db.query(ListModel).filter(ListModel.id == db_column.list_id).first()
     
@@ -178,7 +432,21 @@ def delete_column(db: Session, column_id: UUID, user_id: UUID) -> None:
         details={'column_name': db_column.name}
     )
     db.add(audit)
-    db.commit()
     
+    db_job = create_job(
+        db, db_list.workspace_id, 'column.purge',
+        {'list_id': str(db_column.list_id), 'key': db_column.key, 'column_id': str(column_id)},
+        user_id
+    )
+    
+    if db_column.type in DERIVED_TYPES:
+        read_list_id = related_list_id(db, db_list.id, db_column.config or {})
+        if read_list_id is not None:
+            bump_schema_version(db, read_list_id)
     db.query(Column_).filter(Column_.id == column_id).delete()
+    bump_schema_version(db, db_list.id)
     db.commit()
+    db.refresh(db_job)
+    
+    enqueue(purge_column_values, str(db_job.id))
+    return db_job
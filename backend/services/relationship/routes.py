@@ -1,21 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from shared.database import get_db
-from shared.auth import get_current_user, CurrentUser
+from shared.auth import get_current_user, get_workspace_membership, CurrentUser
+from shared.cache import workspace_of_list
+from shared.models import WorkspaceMembership, Item, List as ListModel
 from shared.schemas import (
     RelationshipCreate, RelationshipResponse,
-    RelationshipLinkCreate, RelationshipLinkResponse
+    RelationshipLinkCreate, RelationshipLinkResponse,
+    RelationshipLinkBulk, RelationshipLinkSet, RelationshipLinkBulkResponse,
+    ItemGraphResponse
 )
 from services.relationship.service import (
     create_relationship, get_list_relationships, get_relationship, delete_relationship,
-    create_link, get_relationship_links, delete_link
+    create_link, get_relationship_links, delete_link,
+    create_links, delete_links, set_item_links,
+    get_item_graph, GRAPH_MAX_DEPTH, GRAPH_MAX_FANOUT
 )
 
 router = APIRouter()
 
+# Roles that may change a workspace's links
+EDITOR_ROLES = ['owner', 'admin', 'editor']
+
+async def _relationship_for_editor(db: Session, relationship_id: UUID, current_user: CurrentUser):
+    """The relationship, once the user may edit links in its workspace (404/403 otherwise)"""
+    db_relationship = get_relationship(db, relationship_id)
+    if not db_relationship:
+        raise HTTPException(status_code=404, detail="Relationship not found")
+    workspace_id = workspace_of_list(db, db_relationship.list_id)
+    if workspace_id is None:
+        # Its list was deleted; the relationship goes with it
+        raise HTTPException(status_code=404, detail="Relationship not found")
+    membership = await get_workspace_membership(UUID(workspace_id), current_user, db)
+    if membership.role not in EDITOR_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Insufficient permissions. Required roles: {', '.join(EDITOR_ROLES)}"
+        )
+    return db_relationship
+
 # Relationship endpoints
 @router.post("/lists/{list_id}/relationships", response_model=RelationshipResponse, status_code=status.HTTP_201_CREATED)
 async def create_relationship_endpoint(
@@ -64,6 +90,46 @@ async def create_link_endpoint(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
+@router.post("/relationships/{relationship_id}/links/bulk", response_model=RelationshipLinkBulkResponse)
+async def create_links_endpoint(
+    relationship_id: UUID,
+    link_data: RelationshipLinkBulk,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create many links at once, skipping pairs that are already linked"""
+    await _relationship_for_editor(db, relationship_id, current_user)
+    try:
+        return create_links(db, relationship_id, link_data.links, current_user.user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+@router.post("/relationships/{relationship_id}/links/bulk-delete", response_model=RelationshipLinkBulkResponse)
+async def delete_links_endpoint(
+    relationship_id: UUID,
+    link_data: RelationshipLinkBulk,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Remove many links at once"""
+    await _relationship_for_editor(db, relationship_id, current_user)
+    return delete_links(db, relationship_id, link_data.links, current_user.user_id)
+
+@router.put("/relationships/{relationship_id}/items/{item_id}/links", response_model=RelationshipLinkBulkResponse)
+async def set_item_links_endpoint(
+    relationship_id: UUID,
+    item_id: UUID,
+    link_data: RelationshipLinkSet,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Replace the links of an item with exactly the given targets"""
+    await _relationship_for_editor(db, relationship_id, current_user)
+    try:
+        return set_item_links(db, relationship_id, item_id, link_data.target_item_ids, current_user.user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
 @router.get("/relationships/{relationship_id}/links", response_model=List[RelationshipLinkResponse])
 async def list_links(
     relationship_id: UUID,
@@ -82,3 +148,36 @@ async def delete_link_endpoint(
     """Delete a relationship link"""
     delete_link(db, link_id, current_user.user_id)
     return None
+
+# Graph traversal endpoints
+@router.get("/items/{item_id}/graph", response_model=ItemGraphResponse)
+async def get_item_graph_endpoint(
+    item_id: UUID,
+    path: Optional[str] = Query(None, description="Dot-separated relationship names, e.g. owners.properties"),
+    depth: int = Query(2, ge=1, le=GRAPH_MAX_DEPTH),
+    fanout: int = Query(100, ge=1, le=GRAPH_MAX_FANOUT),
+    max_nodes: int = Query(1000, ge=1, le=5000),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the items reachable from an item through relationship links"""
+    db_item = db.query(Item).filter(Item.id == item_id).first()
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    
+    # Verify user has access
+    db_list = db.query(ListModel).filter(ListModel.id == db_item.list_id).first()
+    membership = db.query(WorkspaceMembership).filter(
+        WorkspaceMembership.workspace_id == db_list.workspace_id,
+        WorkspaceMembership.user_id == current_user.user_id,
+        WorkspaceMembership.status == 'accepted'
+    ).first()
+    
+    if not membership:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    steps = [name for name in path.split('.') if name] if path else None
+    try:
+        return get_item_graph(db, db_item, db_list.workspace_id, steps, depth, fanout, max_nodes)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
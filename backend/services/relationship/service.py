@@ -1,9 +1,12 @@
+from sqlalchemy import text, insert, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from uuid import UUID
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 
-from shared.models import Relationship, RelationshipLink, AuditLog, List as ListModel
+from shared.models import Relationship, RelationshipLink, AuditLog, Item, List as ListModel
+from shared.derived import refresh_for_links
 from shared.schemas import (
     RelationshipCreate, RelationshipResponse,
     RelationshipLinkCreate, RelationshipLinkResponse
@@ -76,49 +79,131 @@ def delete_relationship(db: Session, relationship_id: UUID, user_id: UUID) -> No
     db.commit()
 
 # Relationship link operations
+_LINK_COLUMNS = (
+    RelationshipLink.id, RelationshipLink.relationship_id,
+    RelationshipLink.source_item_id, RelationshipLink.target_item_id,
+    RelationshipLink.created_at
+)
+
+def _insert_links(db: Session, relationship_id: UUID, pairs: Iterable[Tuple[UUID, UUID]]) -> list:
+    """Insert links in one statement, skipping pairs that are already linked; returns the new rows"""
+    rows = [
+        {'relationship_id': relationship_id, 'source_item_id': source_id, 'target_item_id': target_id}
+        for source_id, target_id in dict.fromkeys(pairs)
+    ]
+    if not rows:
+        return []
+    stmt = pg_insert(RelationshipLink).values(rows).on_conflict_do_nothing(
+        constraint='uq_relationship_link'
+    ).returning(*_LINK_COLUMNS)
+    return db.execute(stmt).all()
+
+def _check_link_items(
+    db: Session, db_relationship: Relationship, source_ids: Iterable[UUID], target_ids: Iterable[UUID]
+) -> None:
+    """Raise ValueError unless sources belong to the relationship's list and targets to its target list"""
+    source_ids, target_ids = set(source_ids), set(target_ids)
+    found = dict(db.query(Item.id, Item.list_id).filter(Item.id.in_(source_ids | target_ids)).all())
+    if any(found.get(item_id) != db_relationship.list_id for item_id in source_ids):
+        raise ValueError("Source items must belong to the relationship's list")
+    if any(found.get(item_id) != db_relationship.target_list_id for item_id in target_ids):
+        raise ValueError("Target items must belong to the relationship's target list")
+
+def _audit_links(db: Session, workspace_id: UUID, user_id: UUID, created: list = (), deleted: list = ()) -> None:
+    """Write one audit row per created or deleted link in a single batched INSERT"""
+    entries = [('relationship.link', link) for link in created] + [('relationship.unlink', link) for link in deleted]
+    if not entries:
+        return
+    db.execute(insert(AuditLog), [
+        {
+            'workspace_id': workspace_id,
+            'user_id': user_id,
+            'action': action,
+            'entity_type': 'relationship_link',
+            'entity_id': link.id,
+            'details': {
+                'relationship_id': str(link.relationship_id),
+                'source_item_id': str(link.source_item_id),
+                'target_item_id': str(link.target_item_id)
+            }
+        }
+        for action, link in entries
+    ])
+
+def _relationship_workspace(db: Session, db_relationship: Relationship) -> UUID:
+    return db.query(ListModel.workspace_id).filter(ListModel.id == db_relationship.list_id).scalar()
+
 def create_link(
     db: Session, relationship_id: UUID, link_data: RelationshipLinkCreate, user_id: UUID
 ) -> RelationshipLink:
     """Create a link between two items"""
     db_relationship = db.query(Relationship).filter(Relationship.id == relationship_id).first()
-    db_list = db.query(ListModel).filter(ListModel.id == db_relationship.list_id).first()
-    
-    # Check if link already exists
-    existing = db.query(RelationshipLink).filter(
-        RelationshipLink.relationship_id == relationship_id,
-        RelationshipLink.source_item_id == link_data.source_item_id,
-        RelationshipLink.target_item_id == link_data.target_item_id
-    ).first()
+    workspace_id = _relationship_workspace(db, db_relationship)
     
-    if existing:
+    created = _insert_links(db, relationship_id, [(link_data.source_item_id, link_data.target_item_id)])
+    if not created:
+        db.rollback()
         raise ValueError("Link already exists")
     
-    db_link = RelationshipLink(
-        relationship_id=relationship_id,
-        source_item_id=link_data.source_item_id,
-        target_item_id=link_data.target_item_id
-    )
-    db.add(db_link)
-    db.flush()
+    refresh_for_links(db, relationship_id, created)
+    _audit_links(db, workspace_id, user_id, created=created)
+    db.commit()
+    return created[0]
+
+def create_links(
+    db: Session, relationship_id: UUID, links: List[RelationshipLinkCreate], user_id: UUID
+) -> Dict[str, list]:
+    """Create many links at once; pairs that are already linked are skipped"""
+    db_relationship = db.query(Relationship).filter(Relationship.id == relationship_id).first()
+    pairs = [(link.source_item_id, link.target_item_id) for link in links]
+    _check_link_items(db, db_relationship, (p[0] for p in pairs), (p[1] for p in pairs))
     
-    # Add audit log
-    audit = AuditLog(
-        workspace_id=db_list.workspace_id,
-        user_id=user_id,
-        action='relationship.link',
-        entity_type='relationship_link',
-        entity_id=db_link.id,
-        details={
-            'relationship_id': str(relationship_id),
-            'source_item_id': str(link_data.source_item_id),
-            'target_item_id': str(link_data.target_item_id)
-        }
+    created = _insert_links(db, relationship_id, pairs)
+    refresh_for_links(db, relationship_id, created)
+    _audit_links(db, _relationship_workspace(db, db_relationship), user_id, created=created)
+    db.commit()
+    return {'created': created, 'deleted': []}
+
+def delete_links(
+    db: Session, relationship_id: UUID, links: List[RelationshipLinkCreate], user_id: UUID
+) -> Dict[str, list]:
+    """Remove many links at once; pairs that are not linked are ignored"""
+    db_relationship = db.query(Relationship).filter(Relationship.id == relationship_id).first()
+    pairs = list(dict.fromkeys((link.source_item_id, link.target_item_id) for link in links))
+    deleted = []
+    if pairs:
+        deleted = db.execute(
+            delete(RelationshipLink).where(
+                RelationshipLink.relationship_id == relationship_id,
+                tuple_(RelationshipLink.source_item_id, RelationshipLink.target_item_id).in_(pairs)
+            ).returning(*_LINK_COLUMNS)
+        ).all()
+    refresh_for_links(db, relationship_id, deleted)
+    _audit_links(db, _relationship_workspace(db, db_relationship), user_id, deleted=deleted)
+    db.commit()
+    return {'created': [], 'deleted': deleted}
+
+def set_item_links(
+    db: Session, relationship_id: UUID, source_item_id: UUID, target_item_ids: List[UUID], user_id: UUID
+) -> Dict[str, list]:
+    """Make the given targets exactly the set of items linked from source_item_id"""
+    db_relationship = db.query(Relationship).filter(Relationship.id == relationship_id).first()
+    target_item_ids = list(dict.fromkeys(target_item_ids))
+    _check_link_items(db, db_relationship, [source_item_id], target_item_ids)
+    
+    created = _insert_links(db, relationship_id, ((source_item_id, t) for t in target_item_ids))
+    stale = delete(RelationshipLink).where(
+        RelationshipLink.relationship_id == relationship_id,
+        RelationshipLink.source_item_id == source_item_id
     )
-    db.add(audit)
+    if target_item_ids:
+        stale = stale.where(RelationshipLink.target_item_id.not_in(target_item_ids))
+    deleted = db.execute(stale.returning(*_LINK_COLUMNS)).all()
+    refresh_for_links(db, relationship_id, created + deleted)
     
+    _audit_links(db, _relationship_workspace(db, db_relationship), user_id, created, deleted)
     db.commit()
-    db.refresh(db_link)
-    return db_link
+    return {'created': created, 'deleted': deleted}
 
 def get_relationship_links(db: Session, relationship_id: UUID) -> List[RelationshipLink]:
     """Get all links for a relationship"""
@@ -148,7 +233,149 @@ def delete_link(db: Session, link_id: UUID, user_id: UUID) -> None:
         }
     )
     db.add(audit)
+    relationship_id = db_link.relationship_id
+    ends = RelationshipLinkCreate(source_item_id=db_link.source_item_id, target_item_id=db_link.target_item_id)
     db.commit()
     
     db.query(RelationshipLink).filter(RelationshipLink.id == link_id).delete()
+    refresh_for_links(db, relationship_id, [ends])
     db.commit()
+
+# Graph traversal
+GRAPH_MAX_DEPTH = 5
+GRAPH_MAX_FANOUT = 1000
+GRAPH_MAX_ROWS = 5000
+
+# One recursive CTE walks relationship_links hop by hop. Each hop follows
+# links out of (idx_rel_links_source) or into (idx_rel_links_target) the
+# current item, optionally restricted to the relationship and direction of
+# that step of the path. Cycles are cut per path; rows are capped so a dense
+# graph stops expanding as soon as enough has been found.
+_GRAPH_WALK = text("""
+WITH RECURSIVE walk(depth, item_id, link_id, relationship_id, from_id, forward, visited) AS (
+    SELECT 0, CAST(:root_id AS uuid), CAST(NULL AS uuid), CAST(NULL AS uuid),
+           CAST(NULL AS uuid), CAST(NULL AS boolean), ARRAY[CAST(:root_id AS uuid)]
+    UNION ALL
+    SELECT w.depth + 1, hop.item_id, hop.link_id, hop.relationship_id, w.item_id, hop.forward,
+           w.visited || hop.item_id
+    FROM walk w
+    CROSS JOIN LATERAL (
+        SELECT candidate.*
+        FROM (
+            SELECT l.target_item_id AS item_id, l.id AS link_id, l.relationship_id, true AS forward
+            FROM relationship_links l
+            WHERE l.source_item_id = w.item_id
+              AND (:any_step OR (
+                  l.relationship_id = (CAST(:step_rels AS uuid[]))[w.depth + 1]
+                  AND (CAST(:step_forward AS boolean[]))[w.depth + 1]
+              ))
+            UNION ALL
+            SELECT l.source_item_id, l.id, l.relationship_id, false
+            FROM relationship_links l
+            WHERE l.target_item_id = w.item_id
+              AND (:any_step OR (
+                  l.relationship_id = (CAST(:step_rels AS uuid[]))[w.depth + 1]
+                  AND NOT (CAST(:step_forward AS boolean[]))[w.depth + 1]
+              ))
+        ) AS candidate
+        JOIN items i ON i.id = candidate.item_id AND i.archived_at IS NULL
+        JOIN lists ls ON ls.id = i.list_id AND ls.workspace_id = CAST(:workspace_id AS uuid)
+        WHERE NOT candidate.item_id = ANY(w.visited)
+        LIMIT :fanout
+    ) AS hop
+    WHERE w.depth < :max_depth
+)
+SELECT w.depth, w.item_id, w.link_id, w.relationship_id, w.from_id, w.forward,
+       i.list_id, i.title, i.values
+FROM (SELECT * FROM walk LIMIT :max_rows) AS w
+JOIN items i ON i.id = w.item_id
+""")
+
+def _resolve_graph_path(db: Session, start_list_id: UUID, path: List[str]) -> List[tuple]:
+    """Turn relationship names into (relationship_id, forward) steps starting from a list"""
+    relationships = db.query(Relationship).filter(
+        Relationship.name.in_(set(path))
+    ).all()
+    
+    steps = []
+    current_list_id = start_list_id
+    for name in path:
+        # Prefer following a relationship out of the current list, else walk one in reverse
+        forward = next((r for r in relationships if r.name == name and r.list_id == current_list_id), None)
+        if forward:
+            steps.append((forward.id, True))
+            current_list_id = forward.target_list_id
+            continue
+        reverse = next((r for r in relationships if r.name == name and r.target_list_id == current_list_id), None)
+        if reverse:
+            steps.append((reverse.id, False))
+            current_list_id = reverse.list_id
+            continue
+        raise ValueError(f"No relationship named '{name}' connects to this step of the path")
+    return steps
+
+def get_item_graph(
+    db: Session,
+    db_item: Item,
+    workspace_id: UUID,
+    path: Optional[List[str]] = None,
+    depth: int = 2,
+    fanout: int = 100,
+    max_nodes: int = 1000
+) -> Dict[str, Any]:
+    """
+    Traverse relationship links from an item in a single recursive query.
+    With a path (relationship names), each hop follows that relationship;
+    without one, every relationship is followed in both directions.
+    Returns de-duplicated nodes and edges.
+    """
+    steps = _resolve_graph_path(db, db_item.list_id, path) if path else []
+    max_depth = min(len(steps), depth) if steps else depth
+    max_rows = min(max_nodes * 4, GRAPH_MAX_ROWS)
+    
+    rows = db.execute(_GRAPH_WALK, {
+        'root_id': str(db_item.id),
+        'workspace_id': str(workspace_id),
+        'any_step': not steps,
+        'step_rels': [str(rel_id) for rel_id, _ in steps],
+        'step_forward': [forward for _, forward in steps],
+        'fanout': fanout,
+        'max_depth': max_depth,
+        'max_rows': max_rows
+    }).all()
+    
+    nodes: Dict[UUID, Dict[str, Any]] = {}
+    edges: Dict[UUID, Dict[str, Any]] = {}
+    dropped = False
+    for row in rows:
+        if row.item_id not in nodes:
+            if len(nodes) >= max_nodes:
+                dropped = True
+                continue
+            nodes[row.item_id] = {
+                'id': row.item_id,
+                'list_id': row.list_id,
+                'title': row.title,
+                'values': row.values or {},
+                'depth': row.depth
+            }
+        if row.link_id is not None and row.link_id not in edges:
+            source, target = (row.from_id, row.item_id) if row.forward else (row.item_id, row.from_id)
+            edges[row.link_id] = {
+                'id': row.link_id,
+                'relationship_id': row.relationship_id,
+                'source_item_id': source,
+                'target_item_id': target
+            }
+    
+    # Drop edges whose far end was cut by max_nodes
+    kept_edges = [
+        e for e in edges.values()
+        if e['source_item_id'] in nodes and e['target_item_id'] in nodes
+    ]
+    return {
+        'root_id': db_item.id,
+        'nodes': list(nodes.values()),
+        'edges': kept_edges,
+        'truncated': dropped or len(rows) >= max_rows
+    }
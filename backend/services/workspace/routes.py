@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
 
 from shared.database import get_db
 from shared.auth import get_current_user, get_workspace_membership, require_role, CurrentUser
+from shared.coalesce import coalesced_json
+from shared.query_stats import query_budget
 from shared.schemas import (
     WorkspaceCreate, WorkspaceUpdate, WorkspaceResponse,
     InviteCreate, MembershipResponse, RoleUpdate
@@ -18,6 +21,8 @@ from services.workspace.service import (
 
 router = APIRouter()
 
+_member_list = TypeAdapter(List[MembershipResponse])
+
 @router.post("/workspaces", response_model=WorkspaceResponse, status_code=status.HTTP_201_CREATED)
 async def create_workspace_endpoint(
     workspace: WorkspaceCreate,
@@ -35,7 +40,7 @@ async def list_workspaces(
     """Get all workspaces for current user"""
     return get_user_workspaces(db, current_user.user_id)
 
-@router.get("/workspaces/{workspace_id}", response_model=WorkspaceResponse)
+@router.get("/workspaces/{workspace_id}", response_model=WorkspaceResponse, dependencies=[Depends(query_budget(3))])
 async def get_workspace_endpoint(
     workspace_id: UUID,
     membership = Depends(get_workspace_membership),
@@ -95,14 +100,18 @@ async def accept_invite_endpoint(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
-@router.get("/workspaces/{workspace_id}/members", response_model=List[MembershipResponse])
+@router.get("/workspaces/{workspace_id}/members", response_model=List[MembershipResponse], dependencies=[Depends(query_budget(3))])
 async def list_members(
     workspace_id: UUID,
+    request: Request,
     membership = Depends(get_workspace_membership),
     db: Session = Depends(get_db)
 ):
     """Get all members of a workspace"""
-    return get_workspace_members(db, workspace_id)
+    return await coalesced_json(
+        request, f"workspace:{workspace_id}", _member_list,
+        lambda: (get_workspace_members(db, workspace_id), {})
+    )
 
 @router.patch("/workspaces/{workspace_id}/members/{membership_id}/role", response_model=MembershipResponse)
 async def update_role_endpoint(
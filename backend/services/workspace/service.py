@@ -5,6 +5,8 @@ from typing import List, Optional
 import secrets
 
 from shared.models import Workspace, WorkspaceMembership, AuditLog
+from shared.cache import cache, invalidate_workspace
+from shared.auth import invalidate_memberships
 from shared.schemas import (
     WorkspaceCreate, WorkspaceUpdate, WorkspaceResponse,
     InviteCreate, MembershipResponse, RoleUpdate
@@ -56,9 +58,13 @@ def get_user_workspaces(db: Session, user_id: UUID) -> List[Workspace]:
     workspace_ids = [m.workspace_id for m in memberships]
     return db.query(Workspace).filter(Workspace.id.in_(workspace_ids)).all()
 
-def get_workspace(db: Session, workspace_id: UUID) -> Optional[Workspace]:
-    """Get a single workspace by ID"""
-    return db.query(Workspace).filter(Workspace.id == workspace_id).first()
+def get_workspace(db: Session, workspace_id: UUID) -> Optional[WorkspaceResponse]:
+    """Get a single workspace by ID (a cached snapshot)"""
+    return cache.get(
+        'workspace', workspace_id, workspace_id,
+        lambda: db.query(Workspace).filter(Workspace.id == workspace_id).first(),
+        WorkspaceResponse
+    )
 
 def update_workspace(
     db: Session, workspace_id: UUID, workspace_update: WorkspaceUpdate, user_id: UUID
@@ -71,6 +77,7 @@ def update_workspace(
         setattr(db_workspace, field, value)
     
     db_workspace.updated_at = datetime.utcnow()
+    invalidate_workspace(db, workspace_id)
     
     # Add audit log
     audit = AuditLog(
@@ -102,6 +109,8 @@ def delete_workspace(db: Session, workspace_id: UUID, user_id: UUID) -> None:
     db.commit()
     
     db.query(Workspace).filter(Workspace.id == workspace_id).delete()
+    invalidate_workspace(db, workspace_id)
+    invalidate_memberships(db, workspace_id)
     db.commit()
 
 def invite_member(
@@ -161,6 +170,7 @@ def accept_invite(db: Session, invite_token: str, user_id: UUID) -> WorkspaceMem
     membership.user_id = user_id
     membership.status = 'accepted'
     membership.accepted_at = datetime.utcnow()
+    invalidate_memberships(db, membership.workspace_id)
     
     # Add audit log
     audit = AuditLog(
@@ -205,6 +215,7 @@ def update_member_role(
     old_role = membership.role
     membership.role = role_update.role
     membership.updated_at = datetime.utcnow()
+    invalidate_memberships(db, membership.workspace_id)
     
     # Add audit log
     audit = AuditLog(
@@ -250,5 +261,7 @@ def remove_member(db: Session, membership_id: UUID, remover_id: UUID) -> None:
     db.add(audit)
     db.commit()
     
+    workspace_id = membership.workspace_id
     db.query(WorkspaceMembership).filter(WorkspaceMembership.id == membership_id).delete()
+    invalidate_memberships(db, workspace_id)
     db.commit()
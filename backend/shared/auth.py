@@ -1,16 +1,55 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 import os
 from typing import Optional
 from uuid import UUID
 
-from .database import get_db
+from .database import bind_user, get_db, use_primary
 from .models import WorkspaceMembership, User
 from .jwt_auth import decode_access_token
+from .cache import LocalCache
+from .invalidation import publish, subscribe
+from .schemas import MembershipResponse
 
 security = HTTPBearer()
 
+# Per-process caches of the lookups made on every request, kept fresh by the
+# invalidation bus: active user ids, and (workspace_id, user_id) -> membership.
+# Deactivate users through POST /admin/users/{id}/deactivate (api_gateway/admin.py),
+# which calls invalidate_user; a user deactivated directly in the database keeps
+# authenticating until their entry expires (CACHE_BUS_LOCAL_TTL_SECONDS, 60 by default).
+_active_users = LocalCache()
+_memberships = LocalCache()
+
+def invalidate_memberships(db: Session, workspace_id: UUID) -> None:
+    """Drop cached memberships of a workspace in every process once db's transaction commits"""
+    publish(db, 'membership', workspace_id)
+
+def invalidate_user(db: Session, user_id: UUID) -> None:
+    """Drop a user's cached active status in every process once db's transaction commits"""
+    publish(db, 'user', user_id)
+
+subscribe('membership', lambda workspace_id, version, local: _memberships.evict(lambda key: key[0] == workspace_id))
+subscribe('user', lambda user_id, version, local: _active_users.evict(lambda key: key == user_id))
+
+# Built once; each call only binds parameters (see shared/repository.py)
+_ACTIVE_USER = select(User).where(User.id == bindparam('user_id'), User.is_active == True).limit(1)
+_MEMBERSHIP = select(WorkspaceMembership).where(
+    WorkspaceMembership.workspace_id == bindparam('workspace_id'),
+    WorkspaceMembership.user_id == bindparam('user_id'),
+    WorkspaceMembership.status == 'accepted'
+).limit(1)
+
+def load_active_user(db: Session, user_id: UUID) -> Optional[User]:
+    """The user, if it exists and is active"""
+    return db.execute(_ACTIVE_USER, {'user_id': user_id}).scalars().first()
+
+def load_membership(db: Session, workspace_id: UUID, user_id: UUID) -> Optional[WorkspaceMembership]:
+    """The user's accepted membership in a workspace"""
+    return db.execute(_MEMBERSHIP, {'workspace_id': workspace_id, 'user_id': user_id}).scalars().first()
+
 class CurrentUser:
     def __init__(self, user_id: UUID, email: str):
         self.user_id = user_id
@@ -46,14 +85,19 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        bind_user(db, user_id)
+        
         # Verify user exists and is active
-        user = db.query(User).filter(User.id == UUID(user_id), User.is_active == True).first()
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found or inactive",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        if not _active_users.get(user_id):
+            with use_primary():
+                user = load_active_user(db, UUID(user_id))
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found or inactive",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            _active_users.set(user_id, True)
         
         return CurrentUser(user_id=UUID(user_id), email=email)
         
@@ -70,21 +114,23 @@ async def get_workspace_membership(
     workspace_id: UUID,
     current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
-) -> WorkspaceMembership:
+) -> MembershipResponse:
     """
-    Get the user's membership in a workspace
+    Get the user's membership in a workspace (a cached snapshot)
     """
-    membership = db.query(WorkspaceMembership).filter(
-        WorkspaceMembership.workspace_id == workspace_id,
-        WorkspaceMembership.user_id == current_user.user_id,
-        WorkspaceMembership.status == 'accepted'
-    ).first()
-    
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have access to this workspace"
-        )
+    key = (str(workspace_id), str(current_user.user_id))
+    membership = _memberships.get(key)
+    if membership is None:
+        with use_primary():
+            db_membership = load_membership(db, workspace_id, current_user.user_id)
+        
+        if not db_membership:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have access to this workspace"
+            )
+        membership = MembershipResponse.model_validate(db_membership)
+        _memberships.set(key, membership)
     
     return membership
 
@@ -95,7 +141,7 @@ def require_role(allowed_roles: list[str]):
     """
     async def role_checker(
         workspace_id: UUID,
-        membership: WorkspaceMembership = Depends(get_workspace_membership)
+        membership: MembershipResponse = Depends(get_workspace_membership)
     ):
         if membership.role not in allowed_roles:
             raise HTTPException(
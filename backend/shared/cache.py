@@ -0,0 +1,388 @@
+"""Two-tier read cache for hot, rarely changing metadata.
+
+Workspaces, their lists and list columns are read on almost every grid
+request. ReadCache keeps them in a small per-process LRU (tier 1) in front
+of Redis (tier 2, only when REDIS_URL is set) and falls back to the loader,
+i.e. Postgres, on a miss.
+
+Entries are keyed by a per-workspace version. Writes never delete entries;
+they bump the workspace version after their transaction commits (see
+invalidate_workspace / invalidate_list), so every process stops reading the
+old entries as soon as it sees the new version. Other processes hear of the
+bump through the invalidation bus (shared.invalidation); while their bus
+listener is down, tier 1 only trusts entries and versions for
+CACHE_LOCAL_TTL_SECONDS, which bounds staleness.
+
+Lists' item counts change with every item create and archive, so they are
+cached under their own per-workspace version (item_counts_scope) and laid
+over the list snapshots when served; invalidate_item_counts retires only
+them.
+
+Concurrent misses for the same entry are collapsed (singleflight): one
+thread per process runs the loader and, with Redis, one process at a time
+fills a key while the others briefly wait for it. Redis failures degrade to
+tier 1 + Postgres and never fail a request.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from shared.database import use_primary
+from shared.invalidation import publish, subscribe, on_state_change
+from shared.metrics import CACHE_HIT_RATIO, CACHE_LOOKUPS
+from shared.models import List as ListModel
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOCAL_SIZE = int(os.getenv('CACHE_LOCAL_SIZE', '2048'))
+# How long tier 1 trusts an entry or workspace version without asking Redis
+CACHE_LOCAL_TTL_SECONDS = float(os.getenv('CACHE_LOCAL_TTL_SECONDS', '2'))
+# ... while the invalidation bus listener is connected and delivering changes
+CACHE_BUS_LOCAL_TTL_SECONDS = float(os.getenv('CACHE_BUS_LOCAL_TTL_SECONDS', '60'))
+CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', '300'))
+# How long other processes wait for the process filling a Redis key
+CACHE_FILL_WAIT_SECONDS = 0.5
+KEY_PREFIX = 'cdb:cache'
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ReadCache:
+    """Per-process LRU in front of an optional Redis, versioned per workspace"""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        max_size: int = CACHE_LOCAL_SIZE,
+        local_ttl: float = CACHE_LOCAL_TTL_SECONDS,
+        ttl: int = CACHE_TTL_SECONDS
+    ):
+        self.redis_url = redis_url
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self._redis = None
+        self._local: 'OrderedDict[Tuple, Tuple[float, Any]]' = OrderedDict()
+        self._versions: Dict[str, Tuple[float, int]] = {}
+        self._flights: Dict[Tuple, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'redis_hits': 0, 'misses': 0, 'loads': 0, 'redis_errors': 0}
+
+    # Redis plumbing
+    def _client(self):
+        if self.redis_url and self._redis is None:
+            from redis import Redis
+            self._redis = Redis.from_url(self.redis_url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        return self._redis
+
+    def _redis_call(self, method: str, *args, _fallback: Any = None, **kwargs) -> Any:
+        """Call a Redis method, returning _fallback when Redis is not configured or fails"""
+        try:
+            client = self._client()
+            if client is None:
+                return _fallback
+            return getattr(client, method)(*args, **kwargs)
+        except Exception:
+            self._count('redis_errors')
+            logger.warning("Read cache: Redis %s failed", method, exc_info=True)
+            return _fallback
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    # Versions
+    def _version(self, workspace_id: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            known = self._versions.get(workspace_id)
+            if known and (known[0] > now or self._client() is None):
+                return known[1]
+        remote = self._redis_call('get', f'{KEY_PREFIX}:ver:{workspace_id}')
+        version = max(int(remote) if remote is not None else 0, known[1] if known else 0)
+        with self._lock:
+            self._versions[workspace_id] = (now + self.local_ttl, version)
+        return version
+
+    def invalidate_workspace(self, workspace_id: Any, shared: bool = True) -> None:
+        """
+        Retire every cached entry of a workspace. Call after the write commits;
+        shared=False only retires this process's entries (the writer already
+        bumped the Redis version).
+        """
+        workspace_id = str(workspace_id)
+        remote = self._redis_call('incr', f'{KEY_PREFIX}:ver:{workspace_id}') if shared else None
+        with self._lock:
+            known = self._versions.get(workspace_id)
+            local = (known[1] if known else 0) + 1
+            version = max(int(remote), local) if remote is not None else local
+            self._versions[workspace_id] = (time.monotonic() + self.local_ttl, version)
+
+    # Entries
+    def get(
+        self,
+        namespace: str,
+        workspace_id: Any,
+        key: Any,
+        loader: Callable[[], Any],
+        schema: Type[BaseModel],
+        many: bool = False
+    ) -> Any:
+        """
+        Return the cached snapshot(s) for key, loading ORM rows with loader()
+        and converting them with schema on a miss. A loader result of None is
+        returned but not cached.
+        """
+        workspace_id = str(workspace_id)
+        version = self._version(workspace_id)
+        entry_key = (namespace, workspace_id, version, str(key))
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._local.get(entry_key)
+            if cached is not None and cached[0] > now:
+                self._local.move_to_end(entry_key)
+                self._stats['local_hits'] += 1
+                return cached[1]
+            flight = self._flights.get(entry_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[entry_key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = self._fill(entry_key, loader, schema, many)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(entry_key, None)
+            flight.done.set()
+
+    def _fill(self, entry_key: Tuple, loader: Callable[[], Any], schema: Type[BaseModel], many: bool) -> Any:
+        redis_key = f'{KEY_PREFIX}:' + ':'.join(str(part) for part in entry_key)
+        value = self._from_redis(redis_key, schema, many)
+        if value is not None:
+            self._count('redis_hits')
+        else:
+            self._count('misses')
+            # Only one process loads a cold key; the rest wait briefly for its result
+            lock_key = f'{redis_key}:fill'
+            filling = self._redis_call('set', lock_key, '1', nx=True, px=int(CACHE_FILL_WAIT_SECONDS * 2000), _fallback=True)
+            if not filling:
+                value = self._wait_for_fill(redis_key, schema, many)
+            if value is None:
+                value = self._load(loader, schema, many)
+                if value is not None:
+                    payload = json.dumps(
+                        [v.model_dump(mode='json') for v in value] if many else value.model_dump(mode='json')
+                    )
+                    self._redis_call('set', redis_key, payload, ex=self.ttl)
+                if filling:
+                    self._redis_call('delete', lock_key)
+                if value is None:
+                    return None
+
+        with self._lock:
+            self._local[entry_key] = (time.monotonic() + self.local_ttl, value)
+            self._local.move_to_end(entry_key)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+        return value
+
+    def _from_redis(self, redis_key: str, schema: Type[BaseModel], many: bool) -> Any:
+        payload = self._redis_call('get', redis_key)
+        if payload is None:
+            return None
+        data = json.loads(payload)
+        return [schema.model_validate(v) for v in data] if many else schema.model_validate(data)
+
+    def _wait_for_fill(self, redis_key: str, schema: Type[BaseModel], many: bool) -> Any:
+        deadline = time.monotonic() + CACHE_FILL_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(0.02)
+            value = self._from_redis(redis_key, schema, many)
+            if value is not None:
+                return value
+        return None
+
+    def _load(self, loader: Callable[[], Any], schema: Type[BaseModel], many: bool) -> Any:
+        self._count('loads')
+        # Never cache replica lag under a version that is already newer
+        with use_primary():
+            rows = loader()
+        if rows is None:
+            return None
+        return [schema.model_validate(row) for row in rows] if many else schema.model_validate(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['local_entries'] = len(self._local)
+        lookups = stats['local_hits'] + stats['redis_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['local_hits'] + stats['redis_hits']) / lookups, 4) if lookups else None
+        stats['redis'] = self.redis_url is not None
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+            self._versions.clear()
+
+
+cache = ReadCache(os.getenv('REDIS_URL') or None)
+
+
+class LocalCache:
+    """
+    Small per-process LRU with a TTL, for lookups kept fresh by the
+    invalidation bus (see shared.auth). Missing keys return None.
+    """
+
+    def __init__(self, max_size: int = CACHE_LOCAL_SIZE):
+        self.max_size = max_size
+        self.ttl = CACHE_LOCAL_TTL_SECONDS
+        self._entries: 'OrderedDict[Any, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        _local_caches.append(self)
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, match: Callable[[Any], bool]) -> None:
+        """Drop every entry whose key satisfies match"""
+        with self._lock:
+            for key in [key for key in self._entries if match(key)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_local_caches: 'list[LocalCache]' = []
+
+# list id -> workspace id; lists never change workspace
+_list_workspaces: 'OrderedDict[str, str]' = OrderedDict()
+_list_workspaces_lock = threading.Lock()
+
+
+def workspace_of_list(db: Session, list_id: Any) -> Optional[str]:
+    """The workspace a list belongs to, from memory when known"""
+    list_id = str(list_id)
+    workspace_id = _list_workspaces.get(list_id)
+    if workspace_id is None:
+        found = db.query(ListModel.workspace_id).filter(ListModel.id == list_id).scalar()
+        if found is None:
+            return None
+        workspace_id = str(found)
+        with _list_workspaces_lock:
+            _list_workspaces[list_id] = workspace_id
+            while len(_list_workspaces) > CACHE_LOCAL_SIZE * 4:
+                _list_workspaces.popitem(last=False)
+    return workspace_id
+
+
+def clear_local_caches() -> None:
+    """Forget everything cached in this process (for tests and benchmarks)"""
+    cache.clear()
+    for local in _local_caches:
+        local.clear()
+    with _list_workspaces_lock:
+        _list_workspaces.clear()
+
+
+def invalidate_workspace(db: Session, workspace_id: Any) -> None:
+    """Retire the workspace's cached metadata, in every process, once db's transaction commits"""
+    publish(db, 'workspace', workspace_id)
+
+
+def invalidate_list(db: Session, list_id: Any) -> None:
+    """Retire the cached metadata of a list's workspace once db's transaction commits"""
+    workspace_id = workspace_of_list(db, list_id)
+    if workspace_id is not None:
+        invalidate_workspace(db, workspace_id)
+
+
+def item_counts_scope(workspace_id: Any) -> str:
+    """Version scope of a workspace's list item counts, kept apart from its metadata"""
+    return f'{workspace_id}:item_counts'
+
+
+def invalidate_item_counts(db: Session, list_id: Any) -> None:
+    """Retire the cached item counts of a list's workspace once db's transaction commits"""
+    workspace_id = workspace_of_list(db, list_id)
+    if workspace_id is not None:
+        publish(db, 'item_counts', workspace_id)
+
+
+def _on_workspace_change(workspace_id: str, version: Optional[int], local: bool) -> None:
+    cache.invalidate_workspace(workspace_id, shared=local)
+    cache.invalidate_workspace(item_counts_scope(workspace_id), shared=local)
+
+
+def _on_item_counts_change(workspace_id: str, version: Optional[int], local: bool) -> None:
+    cache.invalidate_workspace(item_counts_scope(workspace_id), shared=local)
+
+
+def _on_bus_state(connected: bool) -> None:
+    # Changes may have been missed while disconnected; rely on short TTLs until reconnected
+    ttl = CACHE_BUS_LOCAL_TTL_SECONDS if connected else CACHE_LOCAL_TTL_SECONDS
+    cache.local_ttl = ttl
+    cache.clear()
+    for local_cache in _local_caches:
+        local_cache.ttl = ttl
+        local_cache.clear()
+
+
+def _cache_lookups() -> Dict[Tuple, float]:
+    stats = cache.stats()
+    return {(result,): stats[result] for result in ('local_hits', 'redis_hits', 'misses')}
+
+
+def _cache_hit_ratio() -> Dict[Tuple, float]:
+    ratio = cache.stats()['hit_ratio']
+    return {} if ratio is None else {(): ratio}
+
+
+subscribe('workspace', _on_workspace_change)
+subscribe('item_counts', _on_item_counts_change)
+on_state_change(_on_bus_state)
+CACHE_LOOKUPS.add_collector(_cache_lookups)
+CACHE_HIT_RATIO.add_collector(_cache_hit_ratio)
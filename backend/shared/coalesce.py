@@ -0,0 +1,108 @@
+"""Request coalescing for idempotent read endpoints.
+
+When many clients request the same thing at once (a team opening the same
+big list at 9am), only the first request - the leader - runs the database
+query and serialises the body; identical requests arriving while it runs
+await the leader's result and return the same bytes.
+
+Requests are identical when they share the route, path parameters,
+normalised query string and authorisation scope. Every request still runs
+its own authentication and permission dependencies first; the scope names
+what the shared body may depend on (e.g. "workspace:<id>" for bodies every
+member of the workspace may see), so a body is never shared across scopes.
+
+Coalescing is opt-in: endpoints render through coalesced_json(), and it is
+only active when REQUEST_COALESCING=true. Leaders run in the threadpool so
+followers can queue up on the event loop, and at most
+REQUEST_COALESCING_MAX_INFLIGHT distinct leaders run at a time per process,
+which bounds the database load a thundering herd can cause.
+"""
+import asyncio
+import os
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+
+COALESCE_ENABLED = os.getenv('REQUEST_COALESCING', 'false').lower() == 'true'
+COALESCE_MAX_INFLIGHT = int(os.getenv('REQUEST_COALESCING_MAX_INFLIGHT', '8'))
+
+Rendered = Tuple[bytes, Dict[str, str]]
+
+
+class Coalescer:
+    """Shares in-flight results between concurrent calls with the same key"""
+
+    def __init__(self, max_inflight: int = COALESCE_MAX_INFLIGHT):
+        self.max_inflight = max_inflight
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self.stats = {'leaders': 0, 'followers': 0}
+
+    def _limit(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_inflight)
+            self._loop = loop
+        return self._semaphore
+
+    async def _lead(self, key: Hashable, produce: Callable[[], Any]) -> Any:
+        try:
+            async with self._limit():
+                return await run_in_threadpool(produce)
+        finally:
+            self._inflight.pop(key, None)
+
+    async def run(self, key: Hashable, produce: Callable[[], Any]) -> Any:
+        """Return produce()'s result, running it once for all concurrent callers with key"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats['followers'] += 1
+        else:
+            # The shared work runs in its own task, so a leader whose client
+            # disconnects only stops waiting; followers still get the result
+            task = asyncio.ensure_future(self._lead(key, produce))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())  # don't warn when nobody is left waiting
+            self._inflight[key] = task
+            self.stats['leaders'] += 1
+        return await asyncio.shield(task)
+
+
+coalescer = Coalescer()
+
+
+def request_key(request: Request, scope: str) -> Tuple:
+    """Identity of a request for coalescing: route, parameters, normalised query and scope"""
+    route = request.scope.get('route')
+    return (
+        request.method,
+        getattr(route, 'path', request.url.path),
+        tuple(sorted((k, str(v)) for k, v in request.path_params.items())),
+        tuple(sorted(parse_qsl(request.url.query, keep_blank_values=True))),
+        scope
+    )
+
+
+async def coalesced_json(
+    request: Request,
+    scope: str,
+    adapter: TypeAdapter,
+    produce: Callable[[], Tuple[Any, Dict[str, str]]]
+) -> Response:
+    """
+    Render produce()'s (content, headers) as JSON through adapter, sharing
+    the query and the serialised body with identical concurrent requests
+    when coalescing is enabled.
+    """
+    def render() -> Rendered:
+        content, headers = produce()
+        return adapter.dump_json(adapter.validate_python(content, from_attributes=True)), headers
+
+    if COALESCE_ENABLED:
+        body, headers = await coalescer.run(request_key(request, scope), render)
+    else:
+        body, headers = render()
+    return Response(content=body, media_type='application/json', headers=headers)
@@ -0,0 +1,124 @@
+"""Column types and conversion of stored item values between them.
+
+Values live in items.values (JSONB), so each type has one canonical JSON
+representation. convert_value() maps any stored value onto that
+representation or raises ValueError when it cannot.
+"""
+import re
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional
+
+COLUMN_TYPES = ('text', 'number', 'date', 'email', 'phone', 'url', 'select', 'checkbox')
+
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+_PHONE_RE = re.compile(r'^\+?[0-9 ().\-]{3,}$')
+_URL_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.\-]*://\S+$')
+_INTEGER_RE = re.compile(r'^[+-]?\d+$')
+_TRUE = {'true', 'yes', 'y', '1', 'on', 'checked'}
+_FALSE = {'false', 'no', 'n', '0', 'off', 'unchecked'}
+
+
+def select_options(config: Optional[Dict[str, Any]]) -> List[str]:
+    """Allowed values of a select column; options may be strings or {'value': ...} dicts"""
+    options = (config or {}).get('options') or []
+    return [str(o.get('value')) if isinstance(o, dict) else str(o) for o in options]
+
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        raise ValueError("expected a scalar value")
+    return str(value)
+
+
+def _to_number(value: Any):
+    if isinstance(value, bool):
+        raise ValueError("expected a number")
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        cleaned = value.strip().replace(',', '')
+        try:
+            number = float(cleaned)
+        except ValueError:
+            raise ValueError(f"{value!r} is not a number")
+        if number != number or number in (float('inf'), float('-inf')):
+            raise ValueError(f"{value!r} is not a finite number")
+        return int(cleaned) if _INTEGER_RE.match(cleaned) else number
+    raise ValueError("expected a number")
+
+
+def _to_date(value: Any) -> str:
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            if len(text) == 10:
+                return date.fromisoformat(text).isoformat()
+            return datetime.fromisoformat(text).date().isoformat()
+        except ValueError:
+            raise ValueError(f"{value!r} is not an ISO date")
+    raise ValueError("expected an ISO date string")
+
+
+def _to_checkbox(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in _TRUE | _FALSE:
+        return value.strip().lower() in _TRUE
+    raise ValueError(f"{value!r} is not a boolean")
+
+
+def _matching(pattern, label: str):
+    def convert(value: Any) -> str:
+        text = _to_text(value).strip()
+        if not pattern.match(text):
+            raise ValueError(f"{value!r} is not a valid {label}")
+        return text
+    return convert
+
+
+_CONVERTERS = {
+    'text': _to_text,
+    'number': _to_number,
+    'date': _to_date,
+    'email': _matching(_EMAIL_RE, 'email'),
+    'phone': _matching(_PHONE_RE, 'phone number'),
+    'url': _matching(_URL_RE, 'URL'),
+    'checkbox': _to_checkbox,
+}
+
+
+def compile_converter(column_type: str, config: Optional[Dict[str, Any]] = None) -> Callable[[Any], Any]:
+    """
+    Build a converter for one column, with options and type dispatch resolved
+    up front so per-value calls are cheap.
+    """
+    if column_type == 'select':
+        options = frozenset(select_options(config))
+
+        def convert(value: Any) -> Any:
+            text = _to_text(value)
+            if options and text not in options:
+                raise ValueError(f"{value!r} is not one of the column's options")
+            return text
+    else:
+        convert = _CONVERTERS.get(column_type)
+        if convert is None:
+            return lambda value: value
+
+    def convert_or_empty(value: Any) -> Any:
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return None
+        return convert(value)
+    return convert_or_empty
+
+
+def convert_value(column_type: str, value: Any, config: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Convert a stored value to the canonical representation of column_type.
+    Empty values become None; unknown types pass values through unchanged.
+    """
+    return compile_converter(column_type, config)(value)
@@ -1,39 +1,256 @@
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+"""Engines and sessions.
+
+Every worker process keeps its own pool per engine, so the database sees up
+to (workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW)) connections from the API
+(and as many again on the replica). Size it as
+
+    DB_POOL_SIZE ~ threads that hit the database concurrently per worker
+                   (the threadpool runs at most 40; 5 covers most traffic)
+    workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) + jobs + migrations
+                 < the server's max_connections (or the pooler's pool size)
+
+e.g. 4 gunicorn workers x (5 + 10) = 60 connections at peak. Behind a
+transaction-mode pooler (pgbouncer, Neon "pooled" URLs) keep pools small and
+the recycle short; the pooler does the multiplexing.
+
+When DATABASE_READ_URL is set (a read replica or a pooler endpoint in front
+of one) sessions opened for GET/HEAD requests read from it, while
+
+- every flush and INSERT/UPDATE/DELETE goes to the primary, and the session
+  stays on the primary after its first write;
+- cache fills (use_primary()) read the primary, so replica lag is never
+  cached under a new version;
+- a user who wrote in the last READ_YOUR_WRITES_SECONDS reads from the
+  primary (read-your-writes). Writers are announced to every process over
+  the invalidation bus, so the replica is only used while this process's
+  bus listener is connected.
+"""
 import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from shared.base import Base
+from shared.metrics import POOL_CONNECTIONS, POOL_WAIT, pool_collector
+from shared.invalidation import on_state_change, publish, subscribe
+from shared.query_stats import attach
+from shared.settings import get_settings
+from shared.slow_queries import install as install_slow_query_log
+
+
+def _clean_url(url: str) -> str:
+    # Clean up the URL (remove any accidental prefixes or quotes)
+    url = url.strip().strip("'").strip('"')
+    if url.startswith('psql '):
+        url = url[5:].strip().strip("'").strip('"')
+    return url
+
+
+READ_METHODS = ('GET', 'HEAD')
+# Executions on one connection after which psycopg 3 prepares a statement
+PREPARE_THRESHOLD = 5
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started, engine=self._orig_logging_name or 'primary')
+
+
+def _connect_args(url: str, prepared_statements: bool) -> dict:
+    """
+    Driver options. Server-side prepared statements need psycopg 3
+    (postgresql+psycopg://), which prepares a statement on a connection once it
+    ran PREPARE_THRESHOLD times there; psycopg2 always sends plain SQL. They
+    break behind a transaction-mode pooler (pgbouncer < 1.21, Neon "pooled"
+    URLs), so they are off unless DB_PREPARED_STATEMENTS=true, which settings
+    only accept with psycopg 3 URLs.
+    """
+    args = {"connect_timeout": 10}
+    driver = make_url(url).get_driver_name()
+    if driver == 'psycopg':
+        args['prepare_threshold'] = PREPARE_THRESHOLD if prepared_statements else None
+    return args
+
+
+def _make_engine(url: str, name: str, pool_size: int, max_overflow: int) -> Engine:
+    # pool_pre_ping: Check connection health before using
+    # DB_POOL_RECYCLE: Recycle connections after this many seconds
+    # DB_POOL_TIMEOUT: Seconds to wait for a free connection before failing
+    settings = get_settings()
+    engine = create_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_logging_name=name,
+        pool_pre_ping=True,
+        pool_recycle=settings.db_pool_recycle,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        connect_args=_connect_args(url, settings.db_prepared_statements)
+    )
+    POOL_CONNECTIONS.add_collector(pool_collector(engine, name))
+    install_slow_query_log(engine)
+    return engine
+
+
+# (primary, replica or None), created on first use in each process
+_engines: Optional[Tuple[Engine, Optional[Engine]]] = None
+_engines_lock = threading.Lock()
+
+
+def _create_engines() -> Tuple[Engine, Optional[Engine]]:
+    global _engines
+    with _engines_lock:
+        if _engines is None:
+            settings = get_settings()
+            if not settings.database_url:
+                raise ValueError("DATABASE_URL environment variable is not set")
+            read_url = _clean_url(settings.database_read_url or '') or None
+            primary = _make_engine(
+                _clean_url(settings.database_url), 'primary', settings.db_pool_size, settings.db_max_overflow
+            )
+            replica = _make_engine(
+                read_url, 'replica',
+                settings.db_read_pool_size if settings.db_read_pool_size is not None else settings.db_pool_size,
+                settings.db_read_max_overflow if settings.db_read_max_overflow is not None else settings.db_max_overflow
+            ) if read_url else None
+            _engines = (primary, replica)
+        return _engines
+
+
+def get_engine() -> Engine:
+    """The primary engine (created on first use; raises if DATABASE_URL is unset)"""
+    return (_engines or _create_engines())[0]
+
+
+def get_read_engine() -> Optional[Engine]:
+    """The replica engine, or None when DATABASE_READ_URL is unset"""
+    return (_engines or _create_engines())[1]
+
+
+def _after_fork_in_child() -> None:
+    # A pool inherited from the parent (e.g. touched before gunicorn forked)
+    # must not share its sockets; start empty pools without closing them
+    for engine in _engines or ():
+        if engine is not None:
+            engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def dispose_engines() -> None:
+    """Close the pools' idle connections (on shutdown, after in-flight requests finished)"""
+    for engine in _engines or ():
+        if engine is not None:
+            engine.dispose()
+
+
+def __getattr__(name: str) -> Any:
+    # database.engine / database.read_engine, created on first access
+    if name == 'engine':
+        return get_engine()
+    if name == 'read_engine':
+        return get_read_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Set by use_primary(); forces reads in this context onto the primary
+_primary_only: ContextVar[bool] = ContextVar('primary_only', default=False)
+
+# user id -> monotonic deadline until which the user reads from the primary
+_recent_writers: 'OrderedDict[str, float]' = OrderedDict()
+_recent_writers_lock = threading.Lock()
+_RECENT_WRITERS_SIZE = 10000
+_bus_connected = False
+
+
+class RoutingSession(Session):
+    """Session that sends the reads of read-only sessions to the replica"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        engine, read_engine = _engines or _create_engines()
+        if self._flushing or getattr(clause, 'is_dml', False):
+            if not self.info.get('wrote'):
+                self.info['wrote'] = True
+                if read_engine is not None and self.info.get('user_id'):
+                    publish(self, 'writer', self.info['user_id'])
+            return engine
+        if read_engine is not None and self.info.get('read_only') and not self.info.get('wrote') \
+                and not _primary_only.get() and _bus_connected:
+            return read_engine
+        return engine
+
+
+# Unbound: RoutingSession.get_bind picks the engine, creating it on first use
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, class_=RoutingSession)
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside this block (e.g. to fill a shared cache)"""
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+def bind_user(db: Session, user_id: Any) -> None:
+    """
+    Tie a request's session to the authenticated user: its writes are
+    announced for read-your-writes, and it reads from the primary when the
+    user wrote recently.
+    """
+    user_id = str(user_id)
+    db.info['user_id'] = user_id
+    if db.info.get('read_only') and recently_wrote(user_id):
+        db.info['read_only'] = False
+
+
+def recently_wrote(user_id: str) -> bool:
+    deadline = _recent_writers.get(user_id)
+    return deadline is not None and deadline > time.monotonic()
+
+
+def _on_writer(user_id: str, version: Optional[int], local: bool) -> None:
+    with _recent_writers_lock:
+        _recent_writers[user_id] = time.monotonic() + get_settings().read_your_writes_seconds
+        _recent_writers.move_to_end(user_id)
+        while len(_recent_writers) > _RECENT_WRITERS_SIZE:
+            _recent_writers.popitem(last=False)
+
+
+def _on_bus_state(connected: bool) -> None:
+    # Without the bus, writes made through other processes would go unnoticed
+    global _bus_connected
+    _bus_connected = connected
+
+
+subscribe('writer', _on_writer)
+on_state_change(_on_bus_state)
+
 
-load_dotenv()
-DATABASE_URL = os.getenv('DATABASE_URL')
-
-# Validate DATABASE_URL
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set")
-
-# Clean up the URL (remove any accidental prefixes or quotes)
-DATABASE_URL = DATABASE_URL.strip().strip("'").strip('"')
-if DATABASE_URL.startswith('psql '):
-    DATABASE_URL = DATABASE_URL[5:].strip().strip("'").strip('"')
-
-# Configure connection pool for cloud environments (Render)
-# pool_pre_ping: Check connection health before using
-# pool_recycle: Recycle connections every 5 minutes (300 seconds)
-# pool_size: Number of permanent connections
-# max_overflow: Additional connections when needed
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    pool_size=5,
-    max_overflow=10,
-    connect_args={"connect_timeout": 10}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_db():
+def get_db(request: Request = None):
     db = SessionLocal()
+    attach(db, request)
+    if request is not None and request.method in READ_METHODS:
+        db.info['read_only'] = True
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,202 @@
+"""Lookup and rollup columns materialised from relationships.
+
+A lookup column lists a target column's values (or titles) of the items
+linked through a relationship; a rollup column aggregates them (count, sum,
+min, max). Values are stored in items.values like any other column and kept
+current by refresh_items()/refresh_linked_to(), which the relationship and
+item services call in the same transaction as the link or item write, so
+reading a page with derived columns costs nothing extra.
+
+A derived column may live on either side of its relationship: on the
+relationship's list it follows links forward, on the target list backward.
+
+config: {'relationship_id': ..., 'target_column': <key, omitted for the title>,
+         'aggregate': 'count' | 'sum' | 'min' | 'max' (rollup only)}
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, case, cast, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session, aliased
+
+from shared.models import Column_, Relationship
+
+DERIVED_TYPES = ('lookup', 'rollup')
+ROLLUP_AGGREGATES = ('count', 'sum', 'min', 'max')
+
+
+class DerivedColumn:
+    """A lookup/rollup column resolved against its relationship"""
+
+    def __init__(self, column: Column_, relationship: Relationship, target_type: Optional[str]):
+        config = column.config or {}
+        self.id = column.id
+        self.list_id = column.list_id
+        self.key = column.key
+        self.relationship_id = relationship.id
+        # Forward when the column sits on the relationship's own list
+        self.forward = column.list_id == relationship.list_id
+        self.target_list_id = relationship.target_list_id if self.forward else relationship.list_id
+        self.target_key: Optional[str] = config.get('target_column')
+        self.aggregate: Optional[str] = config.get('aggregate') if column.type == 'rollup' else None
+        self.numeric = target_type == 'number'
+
+    def depends_on(self, changed_keys: Iterable[str], title_changed: bool = False) -> bool:
+        """Whether editing these fields of a target item can change this column's value"""
+        if self.aggregate == 'count':
+            return False
+        if self.target_key is None:
+            return title_changed
+        return self.target_key in changed_keys
+
+    def _value_sql(self) -> str:
+        value = "to_jsonb(t.title)" if self.target_key is None else "t.values -> :target_key"
+        scalar = "t.title" if self.target_key is None else "t.values ->> :target_key"
+        if self.aggregate is None:
+            return (
+                f"jsonb_agg({value} ORDER BY l.created_at, t.id) "
+                f"FILTER (WHERE {value} IS NOT NULL AND {value} <> 'null'::jsonb)"
+            )
+        if self.aggregate == 'count':
+            return "to_jsonb(count(*))"
+        if self.numeric:
+            scalar = (
+                "CASE WHEN jsonb_typeof(t.values -> :target_key) = 'number' "
+                "THEN (t.values ->> :target_key)::numeric END"
+            )
+        if self.aggregate == 'sum':
+            return f"to_jsonb(COALESCE(sum({scalar}), 0))"
+        return f"to_jsonb({self.aggregate}({scalar}))"
+
+    def _refresh_sql(self, sources: str) -> str:
+        own, other = ('source_item_id', 'target_item_id') if self.forward else ('target_item_id', 'source_item_id')
+        empty = "'[]'::jsonb" if self.aggregate is None else "'null'::jsonb"
+        return f"""
+        UPDATE items AS i
+        SET values = i.values || jsonb_build_object(:key, d.value)
+        FROM (
+            SELECT s.id, COALESCE((
+                SELECT {self._value_sql()}
+                FROM relationship_links l
+                JOIN items t ON t.id = l.{other}
+                WHERE l.relationship_id = :relationship_id AND l.{own} = s.id
+                  AND t.archived_at IS NULL
+            ), {empty}) AS value
+            FROM ({sources.format(own=own, other=other)}) AS s(id)
+        ) AS d
+        WHERE i.id = d.id AND i.list_id = :list_id
+          AND i.values -> :key IS DISTINCT FROM d.value
+        """
+
+    def _params(self, **extra: Any) -> Dict[str, Any]:
+        return {
+            'key': self.key,
+            'target_key': self.target_key,
+            'relationship_id': self.relationship_id,
+            'list_id': self.list_id,
+            **extra
+        }
+
+    def refresh_items(self, db: Session, item_ids: Iterable[UUID]) -> None:
+        """Recompute this column for the given items of its list in one statement"""
+        item_ids = list({str(item_id) for item_id in item_ids})
+        if not item_ids:
+            return
+        sql = self._refresh_sql("SELECT unnest(CAST(:item_ids AS uuid[]))")
+        db.execute(text(sql), self._params(item_ids=item_ids))
+
+    def refresh_linked_to(self, db: Session, target_item_id: UUID) -> None:
+        """Recompute this column for every item linked to a (changed) target item"""
+        sql = self._refresh_sql(
+            "SELECT DISTINCT l2.{own} FROM relationship_links l2 "
+            "WHERE l2.relationship_id = :relationship_id AND l2.{other} = :target_item_id"
+        )
+        db.execute(text(sql), self._params(target_item_id=target_item_id))
+
+
+def _load(db: Session, *criteria) -> List[DerivedColumn]:
+    target = aliased(Column_)
+    other_list = case(
+        (Column_.list_id == Relationship.list_id, Relationship.target_list_id),
+        else_=Relationship.list_id
+    )
+    rows = db.query(Column_, Relationship, target.type).join(
+        Relationship, Relationship.id == cast(Column_.config['relationship_id'].astext, PG_UUID(as_uuid=True))
+    ).outerjoin(
+        target, and_(target.list_id == other_list, target.key == Column_.config['target_column'].astext)
+    ).filter(Column_.type.in_(DERIVED_TYPES), *criteria).all()
+    return [DerivedColumn(column, relationship, target_type) for column, relationship, target_type in rows]
+
+
+def get_derived_column(db: Session, column_id: UUID) -> Optional[DerivedColumn]:
+    """A lookup/rollup column resolved against its relationship, or None"""
+    found = _load(db, Column_.id == column_id)
+    return found[0] if found else None
+
+
+def columns_for_relationship(db: Session, relationship_id: UUID) -> List[DerivedColumn]:
+    """Derived columns (on either list) computed through a relationship"""
+    return _load(db, Relationship.id == relationship_id)
+
+
+def dependents_of(db: Session, list_id: UUID) -> List[DerivedColumn]:
+    """Derived columns on other lists (or this one) whose values are read from this list's items"""
+    candidates = _load(db, (Relationship.list_id == list_id) | (Relationship.target_list_id == list_id))
+    return [d for d in candidates if d.target_list_id == list_id]
+
+
+def refresh_for_links(db: Session, relationship_id: UUID, links: Iterable) -> None:
+    """Recompute derived columns for both ends of created or deleted links"""
+    links = list(links)
+    if not links:
+        return
+    for derived in columns_for_relationship(db, relationship_id):
+        ends = [link.source_item_id if derived.forward else link.target_item_id for link in links]
+        derived.refresh_items(db, ends)
+
+
+def resolve_config(db: Session, list_id: UUID, column_type: str, config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Validate a lookup/rollup column's config for a column on list_id and
+    return it normalised. Raises ValueError when it does not fit.
+    """
+    config = dict(config or {})
+    try:
+        relationship_id = UUID(str(config.get('relationship_id')))
+    except ValueError:
+        raise ValueError("Lookup and rollup columns need a relationship_id")
+    relationship = db.query(Relationship).filter(Relationship.id == relationship_id).first()
+    if relationship is None or list_id not in (relationship.list_id, relationship.target_list_id):
+        raise ValueError("relationship_id must be a relationship of this list")
+    other_list = relationship.target_list_id if relationship.list_id == list_id else relationship.list_id
+
+    aggregate = config.get('aggregate')
+    if column_type == 'rollup':
+        if aggregate not in ROLLUP_AGGREGATES:
+            raise ValueError(f"Rollup aggregate must be one of: {', '.join(ROLLUP_AGGREGATES)}")
+    else:
+        config.pop('aggregate', None)
+
+    target_key = config.get('target_column')
+    if target_key is None and aggregate == 'sum':
+        raise ValueError("A sum rollup needs a target_column")
+    if target_key is not None:
+        target = db.query(Column_).filter(Column_.list_id == other_list, Column_.key == target_key).first()
+        if target is None:
+            raise ValueError(f"Target column '{target_key}' does not exist on the related list")
+        if target.type in DERIVED_TYPES:
+            raise ValueError("Lookup and rollup columns cannot read other derived columns")
+        if aggregate == 'sum' and target.type != 'number':
+            raise ValueError("A sum rollup needs a number target column")
+
+    config['relationship_id'] = str(relationship_id)
+    return config
+
+
+def related_list_id(db: Session, list_id: UUID, config: Dict[str, Any]) -> Optional[UUID]:
+    """The list a derived column on list_id reads from"""
+    relationship = db.query(Relationship).filter(Relationship.id == config.get('relationship_id')).first()
+    if relationship is None:
+        return None
+    return relationship.target_list_id if relationship.list_id == list_id else relationship.list_id
@@ -0,0 +1,215 @@
+"""Cross-process cache invalidation over Postgres LISTEN/NOTIFY.
+
+Every worker process keeps small in-process caches (workspace metadata,
+active users, memberships, compiled list schemas). A write that changes one
+of those entities calls publish(db, entity, id, version) inside its
+transaction; the notification is sent with the transaction (NOTIFY is
+transactional, so nothing is announced for a rollback) and handled
+
+- in the writing process right after the commit, and
+- in every other process by its listener thread, which holds one
+  dedicated connection doing LISTEN on CHANNEL.
+
+Handlers registered with subscribe(entity, handler) evict their entries.
+While the listener is disconnected notifications may be missed, so
+on_state_change handlers are told to drop everything and fall back to short
+TTLs until it reconnects.
+
+LISTEN needs a session-level connection. When DATABASE_URL points at a
+transaction-mode pooler (e.g. a "pooled" Neon URL), set
+CACHE_INVALIDATION_DATABASE_URL to a direct connection string for the
+listener; notifications themselves are sent through the normal pool.
+Both psycopg2 and psycopg 3 (postgresql+psycopg://) connections work.
+"""
+import json
+import logging
+import os
+import select
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'cache_invalidation'
+# Poll interval of the listener; also how quickly it notices a dead connection
+LISTEN_TIMEOUT_SECONDS = 5.0
+RECONNECT_MAX_SECONDS = 30.0
+
+Handler = Callable[[str, Optional[int], bool], None]
+
+_handlers: Dict[str, List[Handler]] = {}
+_state_handlers: List[Callable[[bool], None]] = []
+_origin = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def subscribe(entity: str, handler: Handler) -> None:
+    """
+    Call handler(entity_id, version, local) whenever an entity changes.
+    local is True in the process that made the change (once its transaction
+    has committed) and False when the change arrives from another process.
+    """
+    _handlers.setdefault(entity, []).append(handler)
+
+
+def on_state_change(handler: Callable[[bool], None]) -> None:
+    """Call handler(connected) whenever this process's listener connects or disconnects"""
+    _state_handlers.append(handler)
+
+
+def publish(db: Session, entity: str, entity_id: Any, version: Optional[int] = None) -> None:
+    """Announce a change to entity_id when db's transaction commits"""
+    pending = db.info.setdefault('invalidations', {})
+    key = (entity, str(entity_id))
+    if version is not None or key not in pending:
+        pending[key] = version
+
+
+def _dispatch(entity: str, entity_id: str, version: Optional[int], local: bool) -> None:
+    for handler in _handlers.get(entity, ()):
+        try:
+            handler(entity_id, version, local)
+        except Exception:
+            logger.exception("Invalidation handler for %s failed", entity)
+
+
+@event.listens_for(Session, 'before_commit')
+def _send_notifications(session: Session) -> None:
+    # commit() only flushes after this hook; flush first so that what the
+    # flush publishes (e.g. the session's 'writer' mark) goes out too
+    session.flush()
+    pending = session.info.get('invalidations')
+    if not pending:
+        return
+    for (entity, entity_id), version in pending.items():
+        payload = json.dumps({'entity': entity, 'id': entity_id, 'version': version, 'origin': _origin})
+        session.execute(text("SELECT pg_notify(:channel, :payload)"), {'channel': CHANNEL, 'payload': payload})
+
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_local(session: Session) -> None:
+    for (entity, entity_id), version in session.info.pop('invalidations', {}).items():
+        _dispatch(entity, entity_id, version, True)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard(session: Session) -> None:
+    session.info.pop('invalidations', None)
+
+
+class InvalidationListener(threading.Thread):
+    """Daemon thread applying other processes' notifications to this process"""
+
+    def __init__(self, engine):
+        super().__init__(name='cache-invalidation-listener', daemon=True)
+        self.engine = engine
+        self.connected = False
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _set_connected(self, connected: bool) -> None:
+        if connected == self.connected:
+            return
+        self.connected = connected
+        for handler in _state_handlers:
+            try:
+                handler(connected)
+            except Exception:
+                logger.exception("Invalidation state handler failed")
+
+    def _connect(self):
+        direct_url = os.getenv('CACHE_INVALIDATION_DATABASE_URL')
+        if direct_url:
+            # With the engine's driver (psycopg2, or psycopg 3)
+            conn = self.engine.dialect.loaded_dbapi.connect(direct_url, connect_timeout=10)
+        else:
+            # A dedicated connection, detached so it does not count against the pool
+            raw = self.engine.raw_connection()
+            raw.detach()
+            conn = raw.dbapi_connection
+        conn.autocommit = True
+        if not hasattr(conn, 'poll'):
+            # psycopg 3 hands notifications that arrive during a statement to its handlers
+            conn.add_notify_handler(lambda notify: self._handle(notify.payload))
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    def _receive(self, conn) -> None:
+        """Apply the notifications waiting on conn"""
+        if hasattr(conn, 'poll'):
+            # psycopg2
+            conn.poll()
+            while conn.notifies:
+                self._handle(conn.notifies.pop(0).payload)
+        else:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+    def run(self) -> None:
+        backoff = 1.0
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                self._set_connected(True)
+                backoff = 1.0
+                while not self._stop_event.is_set():
+                    if select.select([conn], [], [], LISTEN_TIMEOUT_SECONDS) == ([], [], []):
+                        with conn.cursor() as cursor:
+                            cursor.execute("SELECT 1")  # surface dead connections
+                        continue
+                    self._receive(conn)
+            except Exception:
+                logger.warning("Cache invalidation listener disconnected", exc_info=True)
+            finally:
+                self._set_connected(False)
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self._stop_event.wait(backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+
+    def _handle(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get('origin') == _origin:
+            return  # already applied after our own commit
+        _dispatch(message.get('entity'), message.get('id'), message.get('version'), False)
+
+
+_listener: Optional[InvalidationListener] = None
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+
+
+def start_listener(engine) -> InvalidationListener:
+    """Start this process's listener (once per process, also after a fork)"""
+    global _listener, _listener_pid, _origin
+    with _listener_lock:
+        if _listener is None or _listener_pid != os.getpid():
+            _origin = f"{socket.gethostname()}:{os.getpid()}"
+            _listener = InvalidationListener(engine)
+            _listener_pid = os.getpid()
+            _listener.start()
+        return _listener
+
+
+def stop_listener() -> None:
+    """Stop this process's listener, if it runs (on shutdown)"""
+    with _listener_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+
+
+def listener_connected() -> bool:
+    return _listener is not None and _listener_pid == os.getpid() and _listener.connected
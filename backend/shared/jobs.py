@@ -0,0 +1,153 @@
+"""Background job dispatch.
+
+Jobs are plain module-level functions that open their own session via
+SessionLocal. When REDIS_URL is set they are pushed onto an RQ queue
+(run workers with `rq worker --url $REDIS_URL` from the backend directory);
+otherwise they run on a daemon thread inside the API process, which is
+enough for local development and single-instance deploys.
+
+Long-running jobs that report progress are tracked in background_jobs and
+executed through run_job().
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from shared.database import SessionLocal, get_engine
+from shared.metrics import JOB_QUEUE_DEPTH
+from shared.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NAME = 'default'
+
+# Job kind -> module-level runner taking the job id, used to resume jobs
+JOB_RUNNERS: Dict[str, Callable[[str], None]] = {}
+
+
+def job_runner(kind: str):
+    """Register the runner for a background_jobs kind"""
+    def decorator(func: Callable[[str], None]) -> Callable[[str], None]:
+        JOB_RUNNERS[kind] = func
+        return func
+    return decorator
+
+
+def _run_inline(func: Callable, args: tuple, kwargs: dict) -> None:
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background job %s failed", func.__name__)
+
+
+def get_queue():
+    """Return the RQ queue, or None when no Redis is configured"""
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        return None
+    from redis import Redis
+    from rq import Queue
+    return Queue(QUEUE_NAME, connection=Redis.from_url(redis_url))
+
+
+# Scrapes within this many seconds share one Redis and database read
+QUEUE_DEPTH_CACHE_SECONDS = float(os.getenv('QUEUE_DEPTH_CACHE_SECONDS', '10'))
+_queue_depth_cache: Optional[Tuple[float, Dict[tuple, float]]] = None
+_queue_depth_lock = threading.Lock()
+
+
+def _queue_depth() -> Dict[tuple, float]:
+    """_read_queue_depth(), reread at most every QUEUE_DEPTH_CACHE_SECONDS"""
+    global _queue_depth_cache
+    with _queue_depth_lock:
+        if _queue_depth_cache is None or _queue_depth_cache[0] <= time.monotonic():
+            _queue_depth_cache = (time.monotonic() + QUEUE_DEPTH_CACHE_SECONDS, _read_queue_depth())
+        return _queue_depth_cache[1]
+
+
+def _read_queue_depth() -> Dict[tuple, float]:
+    """Jobs waiting on the RQ queue, and tracked jobs by status (for /metrics)"""
+    depth: Dict[tuple, float] = {}
+    queue = get_queue()
+    if queue is not None:
+        depth[(QUEUE_NAME, 'queued')] = queue.count
+    db = SessionLocal()
+    try:
+        counts = dict(db.query(BackgroundJob.status, func.count()).filter(
+            BackgroundJob.status.in_(('queued', 'running'))
+        ).group_by(BackgroundJob.status).all())
+    finally:
+        db.close()
+    for status in ('queued', 'running'):
+        depth[('background_jobs', status)] = counts.get(status, 0)
+    return depth
+
+
+JOB_QUEUE_DEPTH.add_collector(_queue_depth)
+
+
+def enqueue(func: Callable, *args: Any, **kwargs: Any) -> None:
+    """Run func(*args, **kwargs) in the background. Call only after committing."""
+    queue = get_queue()
+    if queue is not None:
+        queue.enqueue(func, *args, **kwargs)
+        return
+    threading.Thread(target=_run_inline, args=(func, args, kwargs), daemon=True).start()
+
+
+def run_job(job_id: str, handler: Callable[[Session, BackgroundJob], Optional[Dict[str, Any]]]) -> None:
+    """
+    Execute handler for a background_jobs record, maintaining its status.
+    The handler may commit as it goes (e.g. once per batch, together with
+    job.progress) so a failed or interrupted job can be resumed.
+    """
+    lock_key = {'key': f'job:{job_id}'}
+    # The session releases its connection on every commit, so the advisory lock
+    # that stops a resumed job running alongside a live copy gets its own connection
+    with get_engine().connect() as lock_conn:
+        if not lock_conn.execute(text("SELECT pg_try_advisory_lock(hashtext(:key))"), lock_key).scalar():
+            return
+        lock_conn.commit()  # session-level lock survives; don't sit idle in a transaction
+        try:
+            _run_locked(job_id, handler)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), lock_key)
+
+
+def _run_locked(job_id: str, handler: Callable[[Session, BackgroundJob], Optional[Dict[str, Any]]]) -> None:
+    db = SessionLocal()
+    try:
+        job = db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+        if not job or job.status in ('completed', 'cancelled'):
+            return
+        
+        job.status = 'running'
+        job.error = None
+        job.started_at = job.started_at or datetime.utcnow()
+        db.commit()
+        
+        result = handler(db, job)
+        
+        if job.status == 'running':
+            job.status = 'completed'
+        if result is not None:
+            job.result = result
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        logger.exception("Background job %s failed", job_id)
+        db.rollback()
+        job = db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+        if job:
+            job.status = 'failed'
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.commit()
+    finally:
+        db.close()
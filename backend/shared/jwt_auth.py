@@ -1,22 +1,29 @@
 """JWT Authentication utilities for handling user authentication without Supabase"""
+import logging
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
 from sqlalchemy.orm import Session
 from uuid import UUID
-import os
+from functools import lru_cache
+
+from shared.settings import INSECURE_JWT_SECRET, get_settings
+
+logger = logging.getLogger(__name__)
 
 # JWT settings
-SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-if not SECRET_KEY or SECRET_KEY == "your-secret-key-change-in-production":
-    print("⚠️  WARNING: JWT_SECRET_KEY not set or using default value!")
-    print("⚠️  Please set JWT_SECRET_KEY environment variable in production")
-    SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production-INSECURE")
-    
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
+@lru_cache(maxsize=None)
+def _secret_key() -> str:
+    """JWT_SECRET_KEY, read on first use (warns once when it is missing)"""
+    settings = get_settings()
+    if not settings.jwt_secret_is_set:
+        logger.warning("JWT_SECRET_KEY is not set or uses the documented default; set it in production")
+    return settings.jwt_secret_key or f"{INSECURE_JWT_SECRET}-INSECURE"
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     try:
@@ -24,8 +31,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         password_bytes = plain_password.encode('utf-8')
         hash_bytes = hashed_password.encode('utf-8')
         return bcrypt.checkpw(password_bytes, hash_bytes)
-    except Exception as e:
-        print(f"❌ Password verification error: {str(e)}")
+    except Exception:
+        logger.exception("Password verification failed")
         return False
 
 def get_password_hash(password: str) -> str:
@@ -36,7 +43,7 @@ def get_password_hash(password: str) -> str:
         
         # Truncate to 72 bytes if needed (bcrypt hard limit)
         if len(password_bytes) > 72:
-            print(f"⚠️  Password is {len(password_bytes)} bytes, truncating to 72")
+            logger.warning("Password longer than bcrypt's 72-byte limit; hashing its first 72 bytes")
             password_bytes = password_bytes[:72]
         
         # Generate salt and hash
@@ -46,8 +53,7 @@ def get_password_hash(password: str) -> str:
         # Return as string
         return hashed.decode('utf-8')
     except Exception as e:
-        print(f"❌ Error hashing password: {str(e)}")
-        print(f"   Password length: {len(password)} chars, {len(password.encode('utf-8'))} bytes")
+        logger.exception("Password hashing failed")
         raise Exception(f"Failed to hash password: {str(e)}")
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -59,13 +65,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _secret_key(), algorithm=ALGORITHM)
     return encoded_jwt
 
 def decode_access_token(token: str) -> Optional[dict]:
     """Decode and verify a JWT token"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, _secret_key(), algorithms=[ALGORITHM])
         return payload
     except JWTError:
         return None
@@ -0,0 +1,222 @@
+"""Prometheus metrics for the API process.
+
+A deliberately small in-process registry (gauges, collected counters and
+histograms with labels) rendered in the Prometheus text format by GET /metrics. Values that
+already live elsewhere - pool state, cache counters, job queue depth - are
+read when scraped through gauges with a collect callback, so recording them
+costs nothing per request.
+
+Metrics are per process: scrape each worker (or run one worker per
+instance, as render.yaml does) and aggregate in Prometheus.
+"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class Metric(ABC):
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(sample name, rendered labels, value) for every series"""
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for name, labels, value in self.samples():
+            lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Gauge(Metric):
+    """A gauge set directly, or read from collect() -> {label values: value} when scraped"""
+    kind = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        collect: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._collectors: List[Callable[[], Dict[LabelValues, float]]] = [collect] if collect else []
+
+    def add_collector(self, collect: Callable[[], Dict[LabelValues, float]]) -> None:
+        self._collectors.append(collect)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for collect in self._collectors:
+            try:
+                values.update(collect())
+            except Exception:
+                continue  # a failing source must not break the scrape
+        return [(self.name, _format_labels(self.label_names, key), value) for key, value in values.items()]
+
+
+class CollectedCounter(Gauge):
+    """A running total kept elsewhere (e.g. cache counters), read when scraped"""
+    kind = 'counter'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        samples = []
+        for key, state in values.items():
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                labels = _format_labels(self.label_names + ('le',), key + (_format_value(bound),))
+                samples.append((f'{self.name}_bucket', labels, cumulative))
+            labels = _format_labels(self.label_names, key)
+            samples.append((f'{self.name}_sum', labels, state[-2]))
+            samples.append((f'{self.name}_count', labels, state[-1]))
+        return samples
+
+
+registry: List[Metric] = []
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    return '\n'.join(metric.render() for metric in registry) + '\n'
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route template and status',
+    ('method', 'route', 'status')
+)
+REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests being handled')
+QUERY_LATENCY = Histogram(
+    'db_query_duration_seconds', 'Database statement latency by statement type', ('type',)
+)
+POOL_WAIT = Histogram(
+    'db_pool_wait_seconds', 'Time spent waiting for a pooled connection', ('engine',),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+)
+POOL_CONNECTIONS = Gauge(
+    'db_pool_connections', 'Pooled connections by state (checked_out, idle, overflow, size)', ('engine', 'state')
+)
+CACHE_LOOKUPS = CollectedCounter('cache_lookups_total', 'Read cache lookups by result', ('result',))
+CACHE_HIT_RATIO = Gauge('cache_hit_ratio', 'Share of read cache lookups served without the loader')
+JOB_QUEUE_DEPTH = Gauge('job_queue_depth', 'Background jobs waiting or running', ('queue', 'status'))
+
+_STATEMENT_TYPES = {'select', 'insert', 'update', 'delete', 'with'}
+
+
+def observe_query(statement: str, seconds: float) -> None:
+    """Record a statement's latency under its leading keyword"""
+    keyword = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ''
+    QUERY_LATENCY.observe(seconds, type=keyword if keyword in _STATEMENT_TYPES else 'other')
+
+
+def pool_collector(engine, name: str) -> Callable[[], Dict[LabelValues, float]]:
+    """Collect callback reporting a QueuePool's connections by state"""
+    def collect():
+        pool = engine.pool
+        checked_out = pool.checkedout()
+        return {
+            (name, 'checked_out'): checked_out,
+            (name, 'idle'): pool.checkedin(),
+            (name, 'overflow'): max(pool.overflow(), 0),
+            (name, 'size'): pool.size(),
+        }
+    return collect
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """Records latency per route template and status, and requests in flight"""
+
+    async def dispatch(self, request: Request, call_next):
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        status = '500'
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = request.scope.get('route')
+            # Unmatched paths share one label so scanners cannot blow up cardinality
+            template = getattr(route, 'path', '<unmatched>')
+            REQUEST_LATENCY.observe(time.perf_counter() - started, method=request.method, route=template, status=status)
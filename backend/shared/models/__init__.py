@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Enum, ForeignKey, Integer, Boolean
+from sqlalchemy import Column, String, Text, DateTime, Enum, ForeignKey, Integer, Boolean, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 import uuid
@@ -50,7 +50,9 @@ class List(Base):
     workspace_id = Column(UUID(as_uuid=True), ForeignKey('workspaces.id', ondelete='CASCADE'), nullable=False)
     name = Column(Text, nullable=False)
     description = Column(Text)
-    position = Column(Integer)
+    position = Column(Text(collation='C'))
+    item_count = Column(Integer, nullable=False, default=0, server_default='0')
+    schema_version = Column(Integer, nullable=False, default=0, server_default='0')
     created_by = Column(UUID(as_uuid=True))
     archived_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -78,7 +80,7 @@ class Item(Base):
     list_id = Column(UUID(as_uuid=True), ForeignKey('lists.id', ondelete='CASCADE'), nullable=False)
     title = Column(Text)
     values = Column(JSONB, default={})
-    position = Column(Integer)
+    position = Column(Text(collation='C'))
     created_by = Column(UUID(as_uuid=True))
     updated_by = Column(UUID(as_uuid=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -98,6 +100,9 @@ class Relationship(Base):
 
 class RelationshipLink(Base):
     __tablename__ = 'relationship_links'
+    __table_args__ = (
+        UniqueConstraint('relationship_id', 'source_item_id', 'target_item_id', name='uq_relationship_link'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     relationship_id = Column(UUID(as_uuid=True), ForeignKey('relationships.id', ondelete='CASCADE'), nullable=False)
@@ -125,4 +130,22 @@ class AuditLog(Base):
     entity_type = Column(Text)
     entity_id = Column(UUID(as_uuid=True))
     details = Column(JSONB, default={})
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class BackgroundJob(Base):
+    __tablename__ = 'background_jobs'
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    workspace_id = Column(UUID(as_uuid=True), ForeignKey('workspaces.id', ondelete='CASCADE'), nullable=False)
+    kind = Column(Text, nullable=False)
+    status = Column(Enum('queued', 'running', 'completed', 'failed', 'cancelled', name='job_status'), nullable=False, default='queued')
+    params = Column(JSONB, default={})
+    progress = Column(Integer, nullable=False, default=0)
+    total = Column(Integer)
+    result = Column(JSONB, default={})
+    error = Column(Text)
+    created_by = Column(UUID(as_uuid=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
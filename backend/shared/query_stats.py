@@ -0,0 +1,192 @@
+"""Per-request query counting, query budgets and N+1 detection.
+
+get_db() gives every request's session a QueryStats; engine events count
+each statement the session runs on either engine, with its time, and notice
+repeats: the same SQL shape run many times (the N+1 pattern) and exactly
+identical statements run more than once.
+
+Routes declare what they should cost with
+
+    @router.get(..., dependencies=[Depends(query_budget(3))])
+
+and QueryStatsMiddleware checks the budget when the request ends: over
+budget is logged (QUERY_BUDGET_MODE=log, the default) or raised as
+QueryBudgetExceeded (=raise, for tests and development). With QUERY_DEBUG=true
+responses carry the counts in a Server-Timing header.
+
+Tests can also measure directly:
+
+    with count_queries() as stats:
+        client.get(...)
+    assert stats.count <= 2
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from shared.metrics import observe_query
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'log').lower()
+QUERY_DEBUG = os.getenv('QUERY_DEBUG', 'false').lower() == 'true'
+# Runs of one statement shape per request reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', '5'))
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more queries than its route declared"""
+
+
+class QueryStats:
+    """Statements run for one request (or one count_queries() block)"""
+
+    def __init__(self, route: Optional[str] = None):
+        self.route = route
+        self.count = 0
+        self.seconds = 0.0
+        # Rows returned by statements with a result set
+        self.rows = 0
+        self.shapes: Counter = Counter()
+        self.duplicates = 0
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, parameters, seconds: float, rows: int = 0) -> None:
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.rows += rows
+            self.shapes[statement] += 1
+            identity = hash((statement, repr(parameters)))
+            if identity in self._seen:
+                self.duplicates += 1
+            else:
+                self._seen.add(identity)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """Statement shapes run at least threshold times"""
+        return {sql: n for sql, n in self.shapes.items() if n >= threshold}
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries", '
+            f'db-dup;desc="{self.duplicates} duplicates"'
+        )
+
+
+# Statistics collected by count_queries() blocks, across threads
+_captures: List[QueryStats] = []
+# Called as observer(conn, statement, parameters, executemany, seconds) after every statement
+_observers: List[Callable] = []
+
+
+def observe_statements(observer: Callable) -> None:
+    """Also hand every timed statement to observer (e.g. the slow query log), so it is timed once"""
+    _observers.append(observer)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Count every statement run in this process inside the block (for tests)"""
+    stats = QueryStats()
+    _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        _captures.remove(stats)
+
+
+def attach(db: Session, request: Optional[Request] = None) -> QueryStats:
+    """Collect the statements of db's transactions into a new QueryStats"""
+    stats = db.info['query_stats'] = QueryStats()
+    if request is not None:
+        route = request.scope.get('route')
+        stats.route = f"{request.method} {getattr(route, 'path', request.url.path)}"
+        request.state.query_stats = stats
+    return stats
+
+
+@event.listens_for(Session, 'after_begin')
+def _bind_connection(session: Session, transaction, connection) -> None:
+    stats = session.info.get('query_stats')
+    if stats is not None:
+        connection.info['query_stats'] = stats
+
+
+@event.listens_for(Pool, 'checkin')
+def _unbind_connection(dbapi_connection, connection_record) -> None:
+    if connection_record is not None:
+        connection_record.info.pop('query_stats', None)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get('query_started')
+    if not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    observe_query(statement, seconds)
+    # psycopg2 buffers result sets, so rowcount is the number of rows fetched
+    rows = max(cursor.rowcount, 0) if cursor.description is not None else 0
+    stats = conn.info.get('query_stats')
+    if stats is not None:
+        stats.record(statement, parameters, seconds, rows)
+    for capture in list(_captures):
+        capture.record(statement, parameters, seconds, rows)
+    for observer in _observers:
+        observer(conn, statement, parameters, executemany, seconds)
+
+
+def query_budget(max_queries: Union[int, Callable[[Request], int]]):
+    """
+    Dependency factory declaring a route's query budget: a number, or a
+    function of the request for routes whose query flags add statements
+    Usage: @router.get(..., dependencies=[Depends(query_budget(3))])
+    """
+    async def declare(request: Request):
+        request.state.query_budget = max_queries(request) if callable(max_queries) else max_queries
+    return declare
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """Checks query budgets and reports query counts once a request is handled"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        stats: Optional[QueryStats] = getattr(request.state, 'query_stats', None)
+        if stats is None:
+            return response
+
+        route = request.scope.get('route')
+        name = f"{request.method} {getattr(route, 'path', request.url.path)}"
+        for sql, n in stats.repeated().items():
+            logger.warning("Possible N+1 in %s: statement ran %d times: %.200s", name, n, sql)
+
+        budget = getattr(request.state, 'query_budget', None)
+        if budget is not None and stats.count > budget:
+            message = f"{name} ran {stats.count} queries, over its budget of {budget}"
+            if QUERY_BUDGET_MODE == 'raise':
+                raise QueryBudgetExceeded(message)
+            if QUERY_BUDGET_MODE == 'log':
+                logger.warning(message)
+
+        if QUERY_DEBUG:
+            response.headers['Server-Timing'] = stats.server_timing()
+        return response
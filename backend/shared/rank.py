@@ -0,0 +1,110 @@
+"""Lexicographic rank keys for cheap reordering (LexoRank-style).
+
+A rank is a base-62 fraction written without the leading "0." and without
+trailing zeros, so plain string comparison (COLLATE "C") matches numeric
+order. A key can always be generated between any two others, so moving a
+row only ever rewrites that row.
+"""
+from typing import List, Optional
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+# Width of the "head" used for appends and prepends: 62**6 ~ 5.7e10 slots
+RANK_WIDTH = 6
+# Gap left between appended/prepended keys, so later inserts stay short
+RANK_STEP = BASE ** 2
+# Keys longer than this trigger a background rebalance of the scope
+RANK_REBALANCE_LENGTH = 20
+
+_SPACE = BASE ** RANK_WIDTH
+_INDEX = {digit: i for i, digit in enumerate(DIGITS)}
+
+
+def _to_int(key: str) -> int:
+    value = 0
+    for digit in key[:RANK_WIDTH].ljust(RANK_WIDTH, '0'):
+        value = value * BASE + _INDEX[digit]
+    return value
+
+
+def _to_key(value: int) -> str:
+    digits = []
+    for _ in range(RANK_WIDTH):
+        value, remainder = divmod(value, BASE)
+        digits.append(DIGITS[remainder])
+    return ''.join(reversed(digits)).rstrip('0')
+
+
+def _midpoint(a: str, b: Optional[str]) -> str:
+    """Key strictly between a and b, where a may be '' (zero) and b None (one)"""
+    if b is not None:
+        # Keep the common prefix and recurse on the remainder
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else '0') == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = _INDEX[a[0]] if a else 0
+    digit_b = _INDEX[b[0]] if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    # Consecutive leading digits
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _validate(key: str) -> None:
+    if not key or key.endswith('0') or any(digit not in _INDEX for digit in key):
+        raise ValueError(f"Invalid rank key: {key!r}")
+
+
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    """
+    Return a key that sorts strictly after `before` and strictly before `after`.
+    Either bound may be None for an open end (append / prepend).
+    """
+    if before is not None:
+        _validate(before)
+    if after is not None:
+        _validate(after)
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"Rank {before!r} does not sort before {after!r}")
+
+    if before is None and after is None:
+        return _to_key(_SPACE // 2)
+
+    if after is None:
+        # Append: step the head forward, keeping keys short
+        value = _to_int(before) + RANK_STEP
+        if value < _SPACE:
+            return _to_key(value)
+        return _midpoint(before, None)
+
+    if before is None:
+        # Prepend: step the head backward
+        value = _to_int(after) - RANK_STEP
+        if value > 0:
+            return _to_key(value)
+        return _midpoint('', after)
+
+    return _midpoint(before, after)
+
+
+def rank_sequence(count: int) -> List[str]:
+    """
+    Evenly spaced keys for `count` rows, used when (re)assigning a whole scope.
+    Keys occupy the middle half of the space so appends and prepends have room.
+    """
+    if count <= 0:
+        return []
+    gap = max((_SPACE // 2) // (count + 1), 1)
+    start = _SPACE // 4
+    return [_to_key(start + gap * (i + 1)) for i in range(count)]
+
+
+def needs_rebalance(key: str) -> bool:
+    """Whether a key has grown long enough to warrant rebalancing its scope"""
+    return len(key) > RANK_REBALANCE_LENGTH
@@ -0,0 +1,638 @@
+"""Storage behind the item service.
+
+The item service reads and writes through an ItemRepository instead of
+querying a Session directly:
+
+- SqlItemRepository runs the queries the service always ran, on a Session.
+  It is what the API uses.
+- MemoryItemRepository works on a MemoryStore: plain dicts of lists,
+  columns, items, comments and audit entries, with the indexes the service
+  needs (live items per list kept in rank order, a value index per unique
+  column) and JSONB-style containment filtering. Nothing touches a database,
+  so the business logic - validation, ranking, filtering, counting, audit -
+  can be tested in milliseconds.
+
+item_repository(db) picks the implementation: a MemoryStore passed in place
+of the session gets the memory one, a Session the SQL one.
+
+MemoryStore is for tests only. It holds no relationships, so link summaries
+come back empty and lookups and rollups are not refreshed; lists,
+memberships and counts outside the item service are still read through
+SQL. The API cannot run on it.
+"""
+import bisect
+import json
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from shared.cache import invalidate_item_counts
+from shared.jobs import enqueue
+from shared.models import AuditLog, Column_, Comment, Item, List as ListModel
+from shared.rank import rank_sequence
+from shared.schema_registry import registry
+from shared.validation import ItemValidator, UniqueViolation, compile_validator
+
+def contains(value: Any, pattern: Any) -> bool:
+    """JSONB @> semantics: does value contain pattern?"""
+    if isinstance(pattern, dict):
+        return isinstance(value, dict) and all(
+            key in value and contains(value[key], sub) for key, sub in pattern.items()
+        )
+    if isinstance(pattern, list):
+        return isinstance(value, list) and all(
+            any(contains(element, sub) for element in value) for sub in pattern
+        )
+    if isinstance(value, list):
+        # A top-level array contains a bare scalar it holds
+        return any(not isinstance(element, (dict, list)) and _scalar_equal(element, pattern) for element in value)
+    return not isinstance(value, dict) and _scalar_equal(value, pattern)
+
+
+def _scalar_equal(a: Any, b: Any) -> bool:
+    # JSON booleans are not numbers
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    return a == b
+
+
+class ItemRepository(ABC):
+    """Reads and writes of the item service, for one unit of work"""
+
+    @abstractmethod
+    def get_list(self, list_id) -> Optional[ListModel]:
+        ...
+
+    @abstractmethod
+    def validator(self, db_list: ListModel) -> ItemValidator:
+        ...
+
+    @abstractmethod
+    def get_item(self, item_id) -> Optional[Item]:
+        ...
+
+    @abstractmethod
+    def list_items(self, list_id, limit: int, offset: int, filters: Optional[Dict[str, Any]] = None) -> List[Item]:
+        """Live items in rank order, optionally filtered by containment"""
+
+    @abstractmethod
+    def item_count(self, list_id) -> int:
+        """The list's maintained live item counter"""
+
+    @abstractmethod
+    def estimate_count(self, list_id, filters: Dict[str, Any]) -> int:
+        ...
+
+    @abstractmethod
+    def count_matching(self, list_id, filters: Dict[str, Any]) -> int:
+        ...
+
+    @abstractmethod
+    def link_summaries(self, item_ids: List[Any], top_n: int) -> Dict[Any, List[Dict[str, Any]]]:
+        ...
+
+    @abstractmethod
+    def last_position(self, list_id) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def sibling_position(self, item: Item, sibling_id) -> Optional[str]:
+        """Rank of another live item in item's list"""
+
+    @abstractmethod
+    def next_position(self, item: Item, above: Optional[str] = None) -> Optional[str]:
+        """Lowest rank among item's live siblings (above the given rank)"""
+
+    @abstractmethod
+    def previous_position(self, item: Item, below: str) -> Optional[str]:
+        """Highest rank among item's live siblings below the given rank"""
+
+    @abstractmethod
+    def adjust_item_count(self, list_id, delta: int) -> None:
+        ...
+
+    @abstractmethod
+    def add(self, obj) -> None:
+        """Stage a new item, comment or audit entry; its id is set on return"""
+
+    @abstractmethod
+    def refresh_dependents(self, dependents: List[Any], item_id) -> None:
+        """Recompute lookups/rollups on items linked to item_id"""
+
+    @abstractmethod
+    def rebalance_later(self, list_id) -> None:
+        """Reassign short ranks to a list whose keys grew too long"""
+
+    @abstractmethod
+    def get_comment(self, comment_id) -> Optional[Comment]:
+        ...
+
+    @abstractmethod
+    def list_comments(self, item_id) -> List[Comment]:
+        ...
+
+    @abstractmethod
+    def delete_comment(self, comment_id) -> None:
+        ...
+
+    @abstractmethod
+    def commit(self) -> None:
+        """Make staged writes and changes to loaded objects durable; raises UniqueViolation"""
+
+    @abstractmethod
+    def refresh(self, obj) -> None:
+        """Reload an object's server-set fields after a commit"""
+
+
+# Per item and relationship: the live link count plus the first few linked
+# items (in link order). Each direction aggregates over the page with one
+# index scan (idx_rel_links_source / idx_rel_links_target) and fetches the
+# top titles with a LATERAL ... LIMIT, so the whole page costs one query.
+_LINK_SUMMARIES = text("""
+SELECT s.item_id, s.relationship_id, 'outgoing' AS direction, s.link_count, top.linked_id, top.title
+FROM (
+    SELECT l.source_item_id AS item_id, l.relationship_id, count(*) AS link_count
+    FROM relationship_links l
+    JOIN items t ON t.id = l.target_item_id AND t.archived_at IS NULL
+    WHERE l.source_item_id = ANY(CAST(:item_ids AS uuid[]))
+    GROUP BY l.source_item_id, l.relationship_id
+) s
+LEFT JOIN LATERAL (
+    SELECT t.id AS linked_id, t.title
+    FROM relationship_links l
+    JOIN items t ON t.id = l.target_item_id AND t.archived_at IS NULL
+    WHERE l.source_item_id = s.item_id AND l.relationship_id = s.relationship_id
+    ORDER BY l.created_at, l.id
+    LIMIT :top_n
+) top ON true
+UNION ALL
+SELECT s.item_id, s.relationship_id, 'incoming', s.link_count, top.linked_id, top.title
+FROM (
+    SELECT l.target_item_id AS item_id, l.relationship_id, count(*) AS link_count
+    FROM relationship_links l
+    JOIN items t ON t.id = l.source_item_id AND t.archived_at IS NULL
+    WHERE l.target_item_id = ANY(CAST(:item_ids AS uuid[]))
+    GROUP BY l.target_item_id, l.relationship_id
+) s
+LEFT JOIN LATERAL (
+    SELECT t.id AS linked_id, t.title
+    FROM relationship_links l
+    JOIN items t ON t.id = l.source_item_id AND t.archived_at IS NULL
+    WHERE l.target_item_id = s.item_id AND l.relationship_id = s.relationship_id
+    ORDER BY l.created_at, l.id
+    LIMIT :top_n
+) top ON true
+""")
+
+
+# The lookups made on nearly every item request, built once. A prebuilt
+# select() with named bind parameters skips rebuilding the query and reuses
+# its cache key, so each call goes straight to the engine's compiled cache.
+_GET_LIST = select(ListModel).where(ListModel.id == bindparam('list_id')).limit(1)
+_GET_ITEM = select(Item).where(Item.id == bindparam('item_id')).limit(1)
+_ITEM_COUNT = select(ListModel.item_count).where(ListModel.id == bindparam('list_id'))
+_LIVE_ITEMS = select(Item).where(
+    Item.list_id == bindparam('list_id'),
+    Item.archived_at.is_(None)
+).order_by(Item.position, Item.created_at).limit(bindparam('limit')).offset(bindparam('offset'))
+_LIVE_ITEMS_MATCHING = _LIVE_ITEMS.where(Item.values.contains(bindparam('filters', type_=JSONB)))
+
+
+class SqlItemRepository(ItemRepository):
+    """The item service's queries, on a SQLAlchemy session"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_list(self, list_id):
+        return self.db.execute(_GET_LIST, {'list_id': list_id}).scalars().first()
+
+    def validator(self, db_list):
+        # Compiled validator for the list's current schema (cached; no query on a hit)
+        return registry.get_validator(self.db, db_list.id, db_list.schema_version)
+
+    def get_item(self, item_id):
+        return self.db.execute(_GET_ITEM, {'item_id': item_id}).scalars().first()
+
+    def _live_items(self, list_id, filters: Optional[Dict[str, Any]] = None):
+        """Base query for live items in a list, optionally filtered by JSONB containment"""
+        query = self.db.query(Item).filter(
+            Item.list_id == list_id,
+            Item.archived_at.is_(None)
+        )
+        if filters:
+            query = query.filter(Item.values.contains(filters))
+        return query
+
+    def list_items(self, list_id, limit, offset, filters=None):
+        params = {'list_id': list_id, 'limit': limit, 'offset': offset}
+        if filters:
+            return self.db.execute(_LIVE_ITEMS_MATCHING, {**params, 'filters': filters}).scalars().all()
+        return self.db.execute(_LIVE_ITEMS, params).scalars().all()
+
+    def item_count(self, list_id):
+        return self.db.execute(_ITEM_COUNT, {'list_id': list_id}).scalar() or 0
+
+    def estimate_count(self, list_id, filters):
+        """Planner row estimate for a filtered listing (no table scan)"""
+        plan = self.db.execute(
+            text(
+                "EXPLAIN (FORMAT JSON) SELECT 1 FROM items "
+                "WHERE list_id = :list_id AND archived_at IS NULL "
+                "AND values @> CAST(:filters AS JSONB)"
+            ),
+            {'list_id': str(list_id), 'filters': json.dumps(filters)}
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def count_matching(self, list_id, filters):
+        return self._live_items(list_id, filters).order_by(None).count()
+
+    def link_summaries(self, item_ids, top_n):
+        summaries: Dict[Any, Dict[Tuple[Any, str], Dict[str, Any]]] = {item_id: {} for item_id in item_ids}
+        rows = self.db.execute(_LINK_SUMMARIES, {'item_ids': [str(i) for i in item_ids], 'top_n': top_n})
+        for row in rows:
+            summary = summaries[row.item_id].setdefault((row.relationship_id, row.direction), {
+                'relationship_id': row.relationship_id,
+                'direction': row.direction,
+                'count': row.link_count,
+                'items': []
+            })
+            if row.linked_id is not None:
+                summary['items'].append({'id': row.linked_id, 'title': row.title})
+        return {item_id: list(by_key.values()) for item_id, by_key in summaries.items()}
+
+    def last_position(self, list_id):
+        return self.db.query(func.max(Item.position)).filter(
+            Item.list_id == list_id,
+            Item.archived_at.is_(None)
+        ).scalar()
+
+    def _siblings(self, item: Item):
+        return self.db.query(Item.position).filter(
+            Item.list_id == item.list_id,
+            Item.archived_at.is_(None),
+            Item.id != item.id
+        )
+
+    def sibling_position(self, item, sibling_id):
+        return self._siblings(item).filter(Item.id == sibling_id).scalar()
+
+    def next_position(self, item, above=None):
+        query = self._siblings(item)
+        if above is not None:
+            query = query.filter(Item.position > above)
+        return query.order_by(Item.position).limit(1).scalar()
+
+    def previous_position(self, item, below):
+        return self._siblings(item).filter(Item.position < below).order_by(Item.position.desc()).limit(1).scalar()
+
+    def adjust_item_count(self, list_id, delta):
+        """Atomically adjust the maintained item counter on a list"""
+        self.db.query(ListModel).filter(ListModel.id == list_id).update(
+            {ListModel.item_count: ListModel.item_count + delta},
+            synchronize_session=False
+        )
+        invalidate_item_counts(self.db, list_id)
+
+    def add(self, obj):
+        self.db.add(obj)
+        self.db.flush()
+
+    def refresh_dependents(self, dependents, item_id):
+        self.db.flush()
+        for derived in dependents:
+            derived.refresh_linked_to(self.db, item_id)
+
+    def rebalance_later(self, list_id):
+        from services.item.jobs import rebalance_item_ranks  # the job belongs to the item service
+        enqueue(rebalance_item_ranks, str(list_id))
+
+    def get_comment(self, comment_id):
+        return self.db.query(Comment).filter(Comment.id == comment_id).first()
+
+    def list_comments(self, item_id):
+        return self.db.query(Comment).filter(
+            Comment.item_id == item_id
+        ).order_by(Comment.created_at.desc()).all()
+
+    def delete_comment(self, comment_id):
+        self.db.query(Comment).filter(Comment.id == comment_id).delete()
+
+    def commit(self):
+        """Commit, turning unique index violations into UniqueViolation"""
+        try:
+            self.db.commit()
+        except IntegrityError as e:
+            self.db.rollback()
+            constraint = getattr(getattr(e.orig, 'diag', None), 'constraint_name', None) or ''
+            if constraint.startswith('uq_items_col_'):
+                raise UniqueViolation("Another item already has this value in a unique column")
+            raise
+
+    def refresh(self, obj) -> None:
+        self.db.refresh(obj)
+
+
+def _order_key(item: Item) -> Tuple[str, datetime, str]:
+    return (item.position or '', item.created_at, str(item.id))
+
+
+def _unique_key(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class MemoryStore:
+    """
+    Item data held in dicts. Objects are the ORM classes, never attached to
+    a session, so services and response models treat them like loaded rows.
+    """
+
+    def __init__(self):
+        self.lists: Dict[Any, ListModel] = {}
+        self.columns: Dict[Any, List[Column_]] = {}
+        self.items: Dict[Any, Item] = {}
+        self.comments: Dict[Any, Comment] = {}
+        self.comments_by_item: Dict[Any, List[Any]] = {}
+        self.audit: List[AuditLog] = []
+        # list id -> sorted [(position, created_at, id)] of live items
+        self.order: Dict[Any, List[Tuple[str, datetime, str]]] = {}
+        # (list id, column key) -> {value: item id} over live items
+        self.unique: Dict[Tuple[Any, str], Dict[str, Any]] = {}
+        self._validators: Dict[Tuple[Any, int], ItemValidator] = {}
+        self.lock = threading.RLock()
+
+    def add_list(self, workspace_id, name: str, list_id=None) -> ListModel:
+        now = datetime.utcnow()
+        db_list = ListModel(
+            id=list_id or uuid.uuid4(), workspace_id=workspace_id, name=name, item_count=0, schema_version=0,
+            created_at=now, updated_at=now
+        )
+        self.lists[db_list.id] = db_list
+        self.columns[db_list.id] = []
+        self.order[db_list.id] = []
+        return db_list
+
+    def add_column(self, list_id, key: str, name: str, type: str, **options: Any) -> Column_:
+        """Add a column and bump the list's schema version, as the list service does"""
+        column = Column_(
+            id=uuid.uuid4(), list_id=list_id, key=key, name=name, type=type,
+            position=len(self.columns[list_id]), is_required=options.get('is_required', False),
+            is_unique=options.get('is_unique', False), config=options.get('config', {})
+        )
+        with self.lock:
+            self.columns[list_id].append(column)
+            if column.is_unique:
+                index = self.unique[(list_id, key)] = {}
+                for item_id in self.live_ids(list_id):
+                    value = (self.items[item_id].values or {}).get(key)
+                    if value is not None:
+                        index[_unique_key(value)] = item_id
+            self.lists[list_id].schema_version += 1
+        return column
+
+    def validator(self, db_list: ListModel) -> ItemValidator:
+        key = (db_list.id, db_list.schema_version)
+        validator = self._validators.get(key)
+        if validator is None:
+            validator = self._validators[key] = compile_validator(self.columns.get(db_list.id, []))
+        return validator
+
+    def live_ids(self, list_id) -> List[Any]:
+        return [uuid.UUID(entry[2]) for entry in self.order.get(list_id, ())]
+
+    def _unindex(self, item: Item, state: Dict[str, Any]) -> None:
+        if state['archived_at'] is None:
+            order = self.order[item.list_id]
+            key = (state['position'] or '', item.created_at, str(item.id))
+            i = bisect.bisect_left(order, key)
+            if i < len(order) and order[i] == key:
+                del order[i]
+            for (list_id, column_key), index in self.unique.items():
+                if list_id == item.list_id:
+                    value = (state['values'] or {}).get(column_key)
+                    if value is not None and index.get(_unique_key(value)) == item.id:
+                        del index[_unique_key(value)]
+
+    def _index(self, item: Item) -> None:
+        if item.archived_at is None:
+            bisect.insort(self.order.setdefault(item.list_id, []), _order_key(item))
+            for (list_id, column_key), index in self.unique.items():
+                if list_id == item.list_id:
+                    value = (item.values or {}).get(column_key)
+                    if value is not None:
+                        index[_unique_key(value)] = item.id
+
+    def conflicts(self, item: Item) -> bool:
+        """Would item (live) duplicate another live item's value in a unique column?"""
+        if item.archived_at is not None:
+            return False
+        for (list_id, column_key), index in self.unique.items():
+            if list_id == item.list_id:
+                value = (item.values or {}).get(column_key)
+                if value is not None and index.get(_unique_key(value), item.id) != item.id:
+                    return True
+        return False
+
+
+def _snapshot(item: Item) -> Dict[str, Any]:
+    return {
+        'title': item.title, 'values': dict(item.values or {}), 'position': item.position,
+        'archived_at': item.archived_at, 'updated_at': item.updated_at, 'updated_by': item.updated_by,
+    }
+
+
+class MemoryItemRepository(ItemRepository):
+    """
+    The item service's reads and writes against a MemoryStore. Items handed
+    out are tracked; commit() re-indexes the changed ones, or puts them back
+    as they were and raises UniqueViolation.
+    """
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self._loaded: Dict[Any, Dict[str, Any]] = {}
+        self._staged: List[Any] = []
+        self._deleted_comments: List[Any] = []
+        self._count_deltas: Dict[Any, int] = {}
+
+    def _track(self, item: Optional[Item]) -> Optional[Item]:
+        if item is not None and item.id not in self._loaded:
+            self._loaded[item.id] = _snapshot(item)
+        return item
+
+    def get_list(self, list_id):
+        return self.store.lists.get(list_id)
+
+    def validator(self, db_list):
+        return self.store.validator(db_list)
+
+    def get_item(self, item_id):
+        return self._track(self.store.items.get(item_id))
+
+    def _live(self, list_id):
+        items = self.store.items
+        for entry in self.store.order.get(list_id, ()):
+            yield items[uuid.UUID(entry[2])]
+
+    def list_items(self, list_id, limit, offset, filters=None):
+        if not filters:
+            return [self.store.items[uuid.UUID(entry[2])] for entry in self.store.order.get(list_id, [])[offset:offset + limit]]
+        page = []
+        for item in self._live(list_id):
+            if contains(item.values or {}, filters):
+                if offset:
+                    offset -= 1
+                    continue
+                page.append(item)
+                if len(page) == limit:
+                    break
+        return page
+
+    def item_count(self, list_id):
+        db_list = self.store.lists.get(list_id)
+        return db_list.item_count if db_list is not None else 0
+
+    def estimate_count(self, list_id, filters):
+        return self.count_matching(list_id, filters)
+
+    def count_matching(self, list_id, filters):
+        return sum(1 for item in self._live(list_id) if contains(item.values or {}, filters))
+
+    def link_summaries(self, item_ids, top_n):
+        # Relationships are not kept in memory
+        return {item_id: [] for item_id in item_ids}
+
+    def last_position(self, list_id):
+        order = self.store.order.get(list_id)
+        return order[-1][0] if order else None
+
+    def _sibling_positions(self, item: Item) -> List[str]:
+        return sorted(entry[0] for entry in self.store.order.get(item.list_id, ()) if entry[2] != str(item.id))
+
+    def sibling_position(self, item, sibling_id):
+        sibling = self.store.items.get(sibling_id)
+        if sibling is None or sibling.id == item.id or sibling.list_id != item.list_id or sibling.archived_at is not None:
+            return None
+        return sibling.position
+
+    def next_position(self, item, above=None):
+        positions = self._sibling_positions(item)
+        i = 0 if above is None else bisect.bisect_right(positions, above)
+        return positions[i] if i < len(positions) else None
+
+    def previous_position(self, item, below):
+        positions = self._sibling_positions(item)
+        i = bisect.bisect_left(positions, below)
+        return positions[i - 1] if i > 0 else None
+
+    def adjust_item_count(self, list_id, delta):
+        self._count_deltas[list_id] = self._count_deltas.get(list_id, 0) + delta
+
+    def add(self, obj):
+        now = datetime.utcnow()
+        if obj.id is None:
+            obj.id = uuid.uuid4()
+        if getattr(obj, 'created_at', None) is None:
+            obj.created_at = now
+        if isinstance(obj, Item):
+            obj.updated_at = obj.updated_at or now
+            obj.values = obj.values or {}
+            self._loaded[obj.id] = None
+        self._staged.append(obj)
+
+    def refresh_dependents(self, dependents, item_id):
+        # Memory validators carry no lookup/rollup dependents
+        return None
+
+    def rebalance_later(self, list_id):
+        """Rebalance right away; there is no queue to hand it to"""
+        with self.store.lock:
+            ids = self.store.live_ids(list_id)
+            for item_id, rank in zip(ids, rank_sequence(len(ids))):
+                item = self.store.items[item_id]
+                state = _snapshot(item)
+                item.position = rank
+                self.store._unindex(item, state)
+                self.store._index(item)
+
+    def get_comment(self, comment_id):
+        return self.store.comments.get(comment_id)
+
+    def list_comments(self, item_id):
+        comments = [self.store.comments[c] for c in self.store.comments_by_item.get(item_id, ())]
+        # Newest first; equal timestamps keep the later insert first
+        return sorted(reversed(comments), key=lambda c: c.created_at, reverse=True)
+
+    def delete_comment(self, comment_id):
+        self._deleted_comments.append(comment_id)
+
+    def commit(self):
+        store = self.store
+        with store.lock:
+            changed = [
+                (store.items.get(item_id) or next(o for o in self._staged if o.id == item_id), state)
+                for item_id, state in self._loaded.items()
+            ]
+            # Check every change against the index without this unit's own old values
+            for item, state in changed:
+                if state is not None:
+                    store._unindex(item, state)
+            conflict = False
+            for item, _ in changed:
+                if store.conflicts(item):
+                    conflict = True
+                    break
+                store._index(item)
+            if conflict:
+                for item, state in changed:
+                    store._unindex(item, _snapshot(item))
+                for item, state in changed:
+                    if state is not None:
+                        for field, value in state.items():
+                            setattr(item, field, value)
+                        store._index(item)
+                self._reset()
+                raise UniqueViolation("Another item already has this value in a unique column")
+
+            for obj in self._staged:
+                if isinstance(obj, Item):
+                    store.items[obj.id] = obj
+                elif isinstance(obj, Comment):
+                    store.comments[obj.id] = obj
+                    store.comments_by_item.setdefault(obj.item_id, []).append(obj.id)
+                elif isinstance(obj, AuditLog):
+                    store.audit.append(obj)
+            for comment_id in self._deleted_comments:
+                comment = store.comments.pop(comment_id, None)
+                if comment is not None:
+                    store.comments_by_item[comment.item_id].remove(comment_id)
+            for list_id, delta in self._count_deltas.items():
+                store.lists[list_id].item_count += delta
+        self._reset()
+
+    def refresh(self, obj) -> None:
+        # Objects are the stored ones; nothing to reload
+        return None
+
+    def _reset(self) -> None:
+        self._loaded = {}
+        self._staged = []
+        self._deleted_comments = []
+        self._count_deltas = {}
+
+
+def item_repository(db: Any) -> ItemRepository:
+    """The repository for db: a Session, or a MemoryStore (tests)"""
+    if isinstance(db, MemoryStore):
+        return MemoryItemRepository(db)
+    return SqlItemRepository(db)
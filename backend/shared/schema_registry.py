@@ -0,0 +1,94 @@
+"""Per-process cache of compiled item validators.
+
+Validators are keyed by (list_id, lists.schema_version). Every column
+change bumps schema_version in the same transaction, and item writes
+already load the list row, so a stale validator is never used and a
+cache hit costs no query - in this process or any other.
+
+A validator also carries the lookup/rollup columns that read the list's
+items, so adding or removing one bumps the schema version of the list it
+reads from as well.
+"""
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from shared.cache import invalidate_list
+from shared.derived import dependents_of
+from shared.invalidation import publish, subscribe
+from shared.models import Column_, List as ListModel
+from shared.validation import ItemValidator, compile_validator
+
+# Lists whose validators are kept per process
+SCHEMA_CACHE_SIZE = 1024
+
+
+class SchemaRegistry:
+    """LRU of compiled validators keyed by list id and schema version"""
+
+    def __init__(self, max_size: int = SCHEMA_CACHE_SIZE):
+        self.max_size = max_size
+        self._validators: 'OrderedDict[UUID, Tuple[int, ItemValidator]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_validator(self, db: Session, list_id: UUID, schema_version: int) -> ItemValidator:
+        """Return the validator for this schema version, compiling it on a miss"""
+        with self._lock:
+            cached = self._validators.get(list_id)
+            if cached is not None and cached[0] == schema_version:
+                self._validators.move_to_end(list_id)
+                return cached[1]
+
+        columns = db.query(Column_).filter(Column_.list_id == list_id).all()
+        validator = compile_validator(columns, dependents_of(db, list_id))
+
+        with self._lock:
+            cached = self._validators.get(list_id)
+            # Never replace a newer version compiled concurrently
+            if cached is None or cached[0] <= schema_version:
+                self._validators[list_id] = (schema_version, validator)
+                self._validators.move_to_end(list_id)
+            while len(self._validators) > self.max_size:
+                self._validators.popitem(last=False)
+        return validator
+
+    def invalidate(self, list_id: UUID, below_version: Optional[int] = None) -> None:
+        """
+        Drop a list's validator, or only one older than below_version (its next
+        version would miss anyway; this frees memory early)
+        """
+        with self._lock:
+            cached = self._validators.get(list_id)
+            if cached is not None and (below_version is None or cached[0] < below_version):
+                del self._validators[list_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._validators.clear()
+
+
+registry = SchemaRegistry()
+
+
+def bump_schema_version(db: Session, list_id: UUID) -> None:
+    """Mark a list's columns as changed; call inside the transaction that changes them"""
+    version = db.execute(
+        update(ListModel).where(ListModel.id == list_id).values(
+            schema_version=ListModel.schema_version + 1
+        ).returning(ListModel.schema_version),
+        execution_options={'synchronize_session': False}
+    ).scalar()
+    registry.invalidate(list_id)
+    invalidate_list(db, list_id)
+    publish(db, 'list_schema', list_id, version)
+
+
+def _on_schema_change(list_id: str, version: Optional[int], local: bool) -> None:
+    registry.invalidate(UUID(list_id), version)
+
+
+subscribe('list_schema', _on_schema_change)
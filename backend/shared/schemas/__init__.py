@@ -56,14 +56,19 @@ class ListCreate(BaseModel):
 class ListUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
-    position: Optional[int] = None
+
+class ListMove(BaseModel):
+    # Place directly after after_id, else directly before before_id, else at the top
+    after_id: Optional[UUID] = None
+    before_id: Optional[UUID] = None
 
 class ListResponse(BaseModel):
     id: UUID
     workspace_id: UUID
     name: str
     description: Optional[str]
-    position: Optional[int]
+    position: Optional[str]
+    item_count: int = 0
     created_by: Optional[UUID]
     archived_at: Optional[datetime]
     created_at: datetime
@@ -72,6 +77,13 @@ class ListResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ListItemCount(BaseModel):
+    id: UUID
+    item_count: int
+    
+    class Config:
+        from_attributes = True
+
 # Column Schemas
 class ColumnCreate(BaseModel):
     key: str
@@ -114,14 +126,29 @@ class ItemCreate(BaseModel):
 class ItemUpdate(BaseModel):
     title: Optional[str] = None
     values: Optional[Dict[str, Any]] = None
-    position: Optional[int] = None
+
+class ItemMove(BaseModel):
+    # Place directly after after_id, else directly before before_id, else at the top
+    after_id: Optional[UUID] = None
+    before_id: Optional[UUID] = None
+
+class LinkedItemTitle(BaseModel):
+    id: UUID
+    title: Optional[str]
+
+class ItemLinkSummary(BaseModel):
+    relationship_id: UUID
+    # 'outgoing' when the item is the link source, 'incoming' when it is the target
+    direction: str
+    count: int
+    items: List[LinkedItemTitle]
 
 class ItemResponse(BaseModel):
     id: UUID
     list_id: UUID
     title: Optional[str]
     values: Dict[str, Any]
-    position: Optional[int]
+    position: Optional[str]
     created_by: Optional[UUID]
     updated_by: Optional[UUID]
     created_at: datetime
@@ -131,6 +158,10 @@ class ItemResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ItemWithLinksResponse(ItemResponse):
+    # Listings that ask for link summaries (links=true)
+    links: List[ItemLinkSummary] = []
+
 # Relationship Schemas
 class RelationshipCreate(BaseModel):
     name: str
@@ -163,6 +194,35 @@ class RelationshipLinkResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class RelationshipLinkBulk(BaseModel):
+    links: List[RelationshipLinkCreate] = Field(max_length=5000)
+
+class RelationshipLinkSet(BaseModel):
+    target_item_ids: List[UUID] = Field(max_length=5000)
+
+class RelationshipLinkBulkResponse(BaseModel):
+    created: List[RelationshipLinkResponse] = []
+    deleted: List[RelationshipLinkResponse] = []
+
+class GraphNode(BaseModel):
+    id: UUID
+    list_id: UUID
+    title: Optional[str]
+    values: Dict[str, Any]
+    depth: int
+
+class GraphEdge(BaseModel):
+    id: UUID
+    relationship_id: UUID
+    source_item_id: UUID
+    target_item_id: UUID
+
+class ItemGraphResponse(BaseModel):
+    root_id: UUID
+    nodes: List[GraphNode]
+    edges: List[GraphEdge]
+    truncated: bool
+
 # Comment Schemas
 class CommentCreate(BaseModel):
     content: str
@@ -191,3 +251,22 @@ class AuditLogResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+# Background Job Schemas
+class BackgroundJobResponse(BaseModel):
+    id: UUID
+    workspace_id: UUID
+    kind: str
+    status: str
+    params: Dict[str, Any]
+    progress: int
+    total: Optional[int]
+    result: Dict[str, Any]
+    error: Optional[str]
+    created_by: Optional[UUID]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,73 @@
+"""Process configuration.
+
+Settings are read from the environment (after loading backend/.env, when
+present) the first time get_settings() is called, not when a module is
+imported. Importing the app therefore needs no configuration at all: a
+missing DATABASE_URL surfaces when the first connection is made, and
+gunicorn --preload can import everything in the master before any worker
+exists.
+
+Field names are the environment variable names in lower case. Tuning knobs
+that only one module reads (SLOW_QUERY_MS, CACHE_TTL_SECONDS, ...) stay
+constants in that module.
+"""
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import model_validator
+from pydantic_settings import BaseSettings
+
+# The default the docs used to ship; never accepted as a real secret
+INSECURE_JWT_SECRET = "your-secret-key-change-in-production"
+
+
+class Settings(BaseSettings):
+    # Database (see shared/database.py for sizing the pools)
+    database_url: Optional[str] = None
+    database_read_url: Optional[str] = None
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 300
+    db_pool_timeout: float = 30
+    db_read_pool_size: Optional[int] = None
+    db_read_max_overflow: Optional[int] = None
+    read_your_writes_seconds: float = 5
+    db_prepared_statements: bool = False
+
+    # Auth
+    jwt_secret_key: Optional[str] = None
+
+    # API gateway
+    frontend_url: str = ""
+    metrics_token: Optional[str] = None
+    admin_token: Optional[str] = None
+    cache_invalidation_listener: bool = True
+
+    # Server (gunicorn.conf.py; see api_gateway/server.py)
+    web_concurrency: Optional[int] = None
+    db_max_connections: Optional[int] = None
+    graceful_timeout: int = 25
+    warmup: bool = True
+
+    @model_validator(mode='after')
+    def _prepared_statements_need_psycopg3(self) -> 'Settings':
+        # psycopg2 cannot prepare statements server-side (see shared/database.py)
+        if self.db_prepared_statements:
+            for name in ('database_url', 'database_read_url'):
+                url = getattr(self, name)
+                if url and not url.strip().strip('\'"').startswith('postgresql+psycopg://'):
+                    raise ValueError(f"DB_PREPARED_STATEMENTS=true needs a postgresql+psycopg:// {name.upper()}")
+        return self
+
+    @property
+    def jwt_secret_is_set(self) -> bool:
+        return bool(self.jwt_secret_key) and self.jwt_secret_key != INSECURE_JWT_SECRET
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """The process's settings, read once (get_settings.cache_clear() re-reads them)"""
+    from dotenv import load_dotenv
+    # Also exported to os.environ for the modules that read their own knobs
+    load_dotenv()
+    return Settings()
@@ -0,0 +1,214 @@
+"""Slow query log with EXPLAIN capture and plan change tracking.
+
+install(engine) enables it for an engine; statements are timed by the cursor
+hooks of shared.query_stats, not a second time here. Statements slower than
+SLOW_QUERY_MS are recorded per statement text, with the route that ran them
+(from the request's QueryStats) and the shape of their bound parameters -
+types and list lengths, never values.
+
+With SLOW_QUERY_EXPLAIN on, a background thread runs
+EXPLAIN (FORMAT JSON) for a slow statement on its own connection, at most
+once per statement every PLAN_RECHECK_SECONDS, so the request that was slow
+never waits for it. Plans are fingerprinted by their shape (node types,
+relations, indexes and join structure, not costs or row estimates); when a
+statement's fingerprint changes - an index no longer used, a flip to a
+sequential scan - the change is logged and kept with the statement.
+
+slow_log.statements(route) returns what was recorded in this process, newest
+plan included; GET /admin/slow-queries serves it.
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from shared.query_stats import observe_statements
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '500'))
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+PLAN_RECHECK_SECONDS = float(os.getenv('PLAN_RECHECK_SECONDS', '300'))
+# Distinct slow statements kept per process
+MAX_STATEMENTS = 500
+MAX_PLAN_CHANGES = 10
+EXPLAIN_QUEUE_SIZE = 100
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Types (and list lengths) of bound parameters, without their values"""
+    if executemany:
+        rows = list(parameters or ())
+        return {'rows': len(rows), 'row': parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: parameter_shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and all(not isinstance(value, (list, tuple, dict)) for value in parameters) \
+                and len({type(value) for value in parameters}) == 1 and len(parameters) > 3:
+            return f'{type(parameters[0]).__name__}[{len(parameters)}]'
+        return [parameter_shape(value) for value in parameters]
+    return type(parameters).__name__
+
+
+def plan_fingerprint(plan: Any) -> str:
+    """Hash of a JSON plan's shape: node types, relations, indexes and nesting"""
+    def shape(node: Dict[str, Any]) -> List[Any]:
+        return [
+            node.get('Node Type'), node.get('Relation Name'), node.get('Index Name'),
+            node.get('Join Type'), node.get('Parent Relationship'),
+            [shape(child) for child in node.get('Plans', ())]
+        ]
+    root = plan[0]['Plan'] if isinstance(plan, list) else plan['Plan']
+    return hashlib.sha1(json.dumps(shape(root)).encode()).hexdigest()[:16]
+
+
+class SlowStatement:
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_seen: Optional[str] = None
+        self.routes: Counter = Counter()
+        self.parameter_shape: Any = None
+        self.plan: Any = None
+        self.fingerprint: Optional[str] = None
+        self.explained_at = 0.0
+        self.plan_changes: List[Dict[str, Any]] = []
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'statement': self.statement,
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 1) if self.count else None,
+            'max_ms': round(self.max_ms, 1),
+            'last_seen': self.last_seen,
+            'routes': dict(self.routes),
+            'parameter_shape': self.parameter_shape,
+            'fingerprint': self.fingerprint,
+            'plan': self.plan,
+            'plan_changes': list(self.plan_changes),
+        }
+
+
+class SlowQueryLog:
+    """Slow statements of this process, and the thread that explains them"""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, explain: bool = SLOW_QUERY_EXPLAIN):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self._statements: 'OrderedDict[str, SlowStatement]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue: 'queue.Queue' = queue.Queue(EXPLAIN_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, engine, statement: str, parameters: Any, executemany: bool, ms: float, route: Optional[str]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._statements.get(statement)
+            if entry is None:
+                entry = self._statements[statement] = SlowStatement(statement)
+                while len(self._statements) > MAX_STATEMENTS:
+                    self._statements.popitem(last=False)
+            self._statements.move_to_end(statement)
+            entry.count += 1
+            entry.total_ms += ms
+            entry.max_ms = max(entry.max_ms, ms)
+            entry.last_seen = datetime.now(timezone.utc).isoformat()
+            entry.routes[route or '<no request>'] += 1
+            entry.parameter_shape = parameter_shape(parameters, executemany)
+            due = self.explain and not executemany and now - entry.explained_at >= PLAN_RECHECK_SECONDS
+            if due:
+                entry.explained_at = now
+        logger.warning("Slow query (%.0f ms) in %s: %.300s", ms, route or 'no request', statement)
+        if due:
+            self._start()
+            try:
+                self._queue.put_nowait((engine, entry, statement, parameters))
+            except queue.Full:
+                pass
+
+    def _start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='slow-query-explain', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            engine, entry, statement, parameters = self._queue.get()
+            try:
+                self.capture_plan(engine, entry, statement, parameters)
+            except Exception:
+                logger.warning("Could not explain slow query: %.200s", statement, exc_info=True)
+
+    def capture_plan(self, engine, entry: SlowStatement, statement: str, parameters: Any) -> None:
+        """EXPLAIN a statement (without running it) and compare its plan with the last one"""
+        with engine.connect() as conn:
+            conn.info['explaining'] = True
+            try:
+                plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            finally:
+                conn.info.pop('explaining', None)
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        fingerprint = plan_fingerprint(plan)
+        with self._lock:
+            previous = entry.fingerprint
+            entry.plan = plan
+            entry.fingerprint = fingerprint
+            if previous is not None and previous != fingerprint:
+                entry.plan_changes.append({
+                    'at': datetime.now(timezone.utc).isoformat(), 'from': previous, 'to': fingerprint
+                })
+                del entry.plan_changes[:-MAX_PLAN_CHANGES]
+        if previous is not None and previous != fingerprint:
+            logger.warning("Plan changed (%s -> %s) for: %.300s", previous, fingerprint, statement)
+
+    def statements(self, route: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recorded statements, slowest first, optionally only those run by route"""
+        with self._lock:
+            entries = [e.as_dict() for e in self._statements.values() if route is None or route in e.routes]
+        return sorted(entries, key=lambda e: e['max_ms'], reverse=True)
+
+    def routes(self) -> Dict[str, int]:
+        """Routes with slow statements, and how many slow executions each had"""
+        totals: Counter = Counter()
+        with self._lock:
+            for entry in self._statements.values():
+                totals.update(entry.routes)
+        return dict(totals)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._statements.clear()
+
+
+slow_log = SlowQueryLog()
+
+
+# Engines whose slow statements are recorded
+_engines: 'weakref.WeakSet' = weakref.WeakSet()
+
+
+def install(engine) -> None:
+    """Record the engine's statements slower than the threshold"""
+    _engines.add(engine)
+
+
+def _observe(conn, statement: str, parameters: Any, executemany: bool, seconds: float) -> None:
+    # Timed once, by shared.query_stats' cursor hooks
+    ms = seconds * 1000
+    if ms < slow_log.threshold_ms or conn.info.get('explaining') or conn.engine not in _engines:
+        return
+    stats = conn.info.get('query_stats')
+    slow_log.record(conn.engine, statement, parameters, executemany, ms, getattr(stats, 'route', None))
+
+
+observe_statements(_observe)
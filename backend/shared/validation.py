@@ -0,0 +1,101 @@
+"""Item value validation against a list's column definitions.
+
+compile_validator() turns a list's columns into a validator once (type
+converters, select options and required keys resolved up front), so each
+write only runs cheap dict lookups. Compiled validators are cached per list
+schema version by shared.schema_registry. Uniqueness is not checked here:
+it is enforced by a per-column partial unique index (see unique_index_name).
+Lookup and rollup values are maintained by shared.derived; writes to them
+are ignored.
+"""
+from typing import Any, Callable, Dict, Iterable, List
+from uuid import UUID
+
+from shared.column_types import compile_converter
+from shared.derived import DERIVED_TYPES
+
+
+class ItemValidationError(ValueError):
+    """Item values do not satisfy the list's column definitions"""
+
+
+class UniqueViolation(ValueError):
+    """An item value duplicates another live item's value in a unique column"""
+
+
+def unique_index_name(column_id) -> str:
+    """Name of the partial unique index backing a column's is_unique flag"""
+    return f"uq_items_col_{UUID(str(column_id)).hex}"
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _compile_coercer(column) -> Callable[[Any], Any]:
+    config = dict(column.config or {})
+    convert = compile_converter(column.type, config)
+    conversion = config.get('conversion')
+    if not conversion:
+        return convert
+
+    # While a type conversion runs, accept either representation, preferring the new one
+    convert_new = compile_converter(conversion['to'], config)
+
+    def coerce(value: Any) -> Any:
+        try:
+            return convert_new(value)
+        except ValueError:
+            return convert(value)
+    return coerce
+
+
+class ItemValidator:
+    """Validator and coercer compiled from a list's columns"""
+
+    def __init__(self, columns: Iterable, dependents: Iterable = ()):
+        columns = list(columns)
+        self.required_keys: List[str] = [c.key for c in columns if c.is_required]
+        self.derived_keys = frozenset(c.key for c in columns if c.type in DERIVED_TYPES)
+        self._coercers: Dict[str, Callable[[Any], Any]] = {
+            c.key: _compile_coercer(c) for c in columns if c.key not in self.derived_keys
+        }
+        # Derived columns elsewhere that read this list's items (shared.derived.DerivedColumn)
+        self.dependents = list(dependents)
+
+    def coerce(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Type-check and convert the given values to their columns' canonical
+        representation. Keys without a column pass through unchanged; keys of
+        lookup/rollup columns are dropped.
+        """
+        coerced = {key: value for key, value in values.items() if key not in self.derived_keys}
+        errors = []
+        for key, value in coerced.items():
+            coercer = self._coercers.get(key)
+            if coercer is None:
+                continue
+            try:
+                coerced[key] = coercer(value)
+            except ValueError as e:
+                errors.append(f"{key}: {e}")
+        if errors:
+            raise ItemValidationError("; ".join(errors))
+        return coerced
+
+    def check_required(self, values: Dict[str, Any]) -> None:
+        """Raise ItemValidationError if the (complete, merged) values miss a required key"""
+        missing = [key for key in self.required_keys if _is_empty(values.get(key))]
+        if missing:
+            raise ItemValidationError(f"Missing required values: {', '.join(missing)}")
+
+    def validate(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Coerce and fully validate a complete set of values"""
+        coerced = self.coerce(values)
+        self.check_required(coerced)
+        return coerced
+
+
+def compile_validator(columns: Iterable, dependents: Iterable = ()) -> ItemValidator:
+    """Compile a list's columns into a reusable validator"""
+    return ItemValidator(columns, dependents)
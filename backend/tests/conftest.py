@@ -0,0 +1,29 @@
+"""
+PERF_DATABASE_URL names a throwaway Postgres database for the route
+regression tests (test_route_regressions.py). When it is set the whole run
+uses it, so nothing else in the run can reach another database. The
+regression tests drop its schema, so the database name must end in _perf
+or _test (e.g. customer_db_perf); anything else stops the run.
+"""
+import os
+
+import pytest
+from sqlalchemy.engine import make_url
+
+THROWAWAY_SUFFIXES = ('_perf', '_test')
+
+if os.getenv('PERF_DATABASE_URL'):
+    database = make_url(os.environ['PERF_DATABASE_URL']).database or ''
+    if not database.endswith(THROWAWAY_SUFFIXES):
+        raise pytest.UsageError(
+            f"PERF_DATABASE_URL names database '{database}'; the route regression tests wipe it, "
+            f"so its name must end in {' or '.join(THROWAWAY_SUFFIXES)}"
+        )
+    os.environ['DATABASE_URL'] = os.environ['PERF_DATABASE_URL']
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--update-baselines', action='store_true',
+        help='Record what each route costs as its new baseline in tests/route_baselines.json'
+    )
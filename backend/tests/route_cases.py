@@ -0,0 +1,391 @@
+"""One request per API route, for the route regression tests.
+
+Each case is registered under its route ("METHOD /template", as mounted
+under /api/v1) and returns the concrete request to measure. Setup a case
+needs - a workspace to delete, a job to resume - is done through
+ctx.call(), which is not measured. Cases run in registration order on a
+freshly seeded database, so the same code always sees the same data.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.testclient import TestClient
+
+from shared.jwt_auth import create_access_token
+from shared.models import BackgroundJob, User, WorkspaceMembership
+from benchmarks.generator import BENCHMARK_PASSWORD, Dataset, DatasetSpec
+
+API = '/api/v1'
+
+# Small enough to seed in seconds, big enough that paging and N+1s show
+SEED_SPEC = DatasetSpec(
+    seed=7, users=5, items=500, companies=50, comments=200, audit_entries=1000, extra_workspaces=2
+)
+
+
+@dataclass
+class RouteRequest:
+    path: str
+    json: Optional[Any] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+class RouteContext:
+    def __init__(self, dataset: Dataset, client: TestClient, session_factory: Callable):
+        self.dataset = dataset
+        self.client = client
+        self.session_factory = session_factory
+        self.headers = self.headers_for(dataset.owner_id, dataset.owner_email)
+
+    @staticmethod
+    def headers_for(user_id, email: str) -> Dict[str, str]:
+        return {'Authorization': f"Bearer {create_access_token({'sub': str(user_id), 'email': email})}"}
+
+    def call(self, method: str, path: str, **kwargs) -> Any:
+        """An unmeasured setup request as the workspace owner"""
+        response = self.client.request(method, API + path, headers=self.headers, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"Setup {method} {path} -> {response.status_code}: {response.text[:200]}")
+        return response.json() if response.content else None
+
+    def new_list(self, name: str) -> str:
+        return self.call('POST', f'/workspaces/{self.dataset.workspace_id}/lists', json={'name': name})['id']
+
+    def column_id(self, key: str) -> str:
+        columns = self.call('GET', f'/lists/{self.dataset.contacts_list_id}/columns')
+        return next(c['id'] for c in columns if c['key'] == key)
+
+    def new_company(self, title: str) -> str:
+        return self.call('POST', f'/lists/{self.dataset.companies_list_id}/items', json={'title': title})['id']
+
+    def finished_job(self) -> str:
+        """A column-deletion job, run to completion"""
+        list_id = self.new_list('Job source')
+        column = self.call('POST', f'/lists/{list_id}/columns', json={'key': 'doomed', 'name': 'Doomed', 'type': 'text'})
+        job_id = self.call('DELETE', f"/columns/{column['id']}")['id']
+        deadline = time.monotonic() + 30
+        while self.call('GET', f'/jobs/{job_id}')['status'] in ('queued', 'running'):
+            if time.monotonic() > deadline:
+                raise RuntimeError("Setup job did not finish")
+            time.sleep(0.05)
+        return job_id
+
+
+@dataclass
+class RouteCase:
+    route: str
+    build: Callable[[RouteContext], RouteRequest]
+    # Who sends the measured request, when not the workspace owner
+    as_user: Optional[Callable[[RouteContext], Dict[str, str]]] = None
+
+    @property
+    def method(self) -> str:
+        return self.route.split(' ', 1)[0]
+
+
+CASES: List[RouteCase] = []
+
+
+def case(route: str, as_user: Optional[Callable[[RouteContext], Dict[str, str]]] = None):
+    def decorator(build: Callable[[RouteContext], RouteRequest]):
+        CASES.append(RouteCase(route, build, as_user))
+        return build
+    return decorator
+
+
+def _member_headers(ctx: RouteContext) -> Dict[str, str]:
+    """A seeded user other than the owner"""
+    db = ctx.session_factory()
+    try:
+        member = db.query(User.id, User.email).join(
+            WorkspaceMembership, WorkspaceMembership.user_id == User.id
+        ).filter(
+            WorkspaceMembership.workspace_id == ctx.dataset.workspace_id,
+            User.id != ctx.dataset.owner_id
+        ).order_by(User.email).first()
+        return ctx.headers_for(member.id, member.email)
+    finally:
+        db.close()
+
+
+# Auth
+@case('POST /auth/signup')
+def _(ctx):
+    return RouteRequest('/auth/signup', json={'email': 'perf-signup@example.com', 'password': 'perf-password-1'})
+
+
+@case('POST /auth/login')
+def _(ctx):
+    return RouteRequest('/auth/login', json={'email': ctx.dataset.owner_email, 'password': BENCHMARK_PASSWORD})
+
+
+@case('GET /auth/me')
+def _(ctx):
+    return RouteRequest('/auth/me')
+
+
+# Workspaces and members
+@case('POST /workspaces')
+def _(ctx):
+    return RouteRequest('/workspaces', json={'name': 'Perf workspace'})
+
+
+@case('GET /workspaces')
+def _(ctx):
+    return RouteRequest('/workspaces')
+
+
+@case('GET /workspaces/{workspace_id}')
+def _(ctx):
+    return RouteRequest(f'/workspaces/{ctx.dataset.workspace_id}')
+
+
+@case('PATCH /workspaces/{workspace_id}')
+def _(ctx):
+    return RouteRequest(f'/workspaces/{ctx.dataset.workspace_id}', json={'description': 'Seeded for route tests'})
+
+
+@case('DELETE /workspaces/{workspace_id}')
+def _(ctx):
+    workspace = ctx.call('POST', '/workspaces', json={'name': 'Short-lived'})
+    return RouteRequest(f"/workspaces/{workspace['id']}")
+
+
+@case('POST /workspaces/{workspace_id}/invite')
+def _(ctx):
+    return RouteRequest(f'/workspaces/{ctx.dataset.workspace_id}/invite',
+                        json={'email': 'perf-invite@example.com', 'role': 'editor'})
+
+
+@case('POST /invites/{invite_token}/accept', as_user=_member_headers)
+def _(ctx):
+    workspace = ctx.call('POST', '/workspaces', json={'name': 'Invite target'})
+    invite = ctx.call('POST', f"/workspaces/{workspace['id']}/invite", json={'email': 'perf-accept@example.com'})
+    db = ctx.session_factory()
+    try:
+        token = db.query(WorkspaceMembership.invite_token).filter(WorkspaceMembership.id == invite['id']).scalar()
+    finally:
+        db.close()
+    return RouteRequest(f'/invites/{token}/accept')
+
+
+@case('GET /workspaces/{workspace_id}/members')
+def _(ctx):
+    return RouteRequest(f'/workspaces/{ctx.dataset.workspace_id}/members')
+
+
+@case('PATCH /workspaces/{workspace_id}/members/{membership_id}/role')
+def _(ctx):
+    members = ctx.call('GET', f'/workspaces/{ctx.dataset.workspace_id}/members')
+    member = next(m for m in members if m['role'] != 'owner' and m['status'] == 'accepted')
+    return RouteRequest(f"/workspaces/{ctx.dataset.workspace_id}/members/{member['id']}/role", json={'role': 'editor'})
+
+
+@case('DELETE /workspaces/{workspace_id}/members/{membership_id}')
+def _(ctx):
+    invite = ctx.call('POST', f'/workspaces/{ctx.dataset.workspace_id}/invite', json={'email': 'perf-remove@example.com'})
+    return RouteRequest(f"/workspaces/{ctx.dataset.workspace_id}/members/{invite['id']}")
+
+
+# Lists and columns
+@case('POST /workspaces/{workspace_id}/lists')
+def _(ctx):
+    return RouteRequest(f'/workspaces/{ctx.dataset.workspace_id}/lists', json={'name': 'Perf list'})
+
+
+@case('GET /workspaces/{workspace_id}/lists')
+def _(ctx):
+    return RouteRequest(f'/workspaces/{ctx.dataset.workspace_id}/lists')
+
+
+@case('GET /lists/{list_id}')
+def _(ctx):
+    return RouteRequest(f'/lists/{ctx.dataset.contacts_list_id}')
+
+
+@case('PATCH /lists/{list_id}')
+def _(ctx):
+    return RouteRequest(f'/lists/{ctx.dataset.contacts_list_id}', json={'description': 'People we sell to'})
+
+
+@case('POST /lists/{list_id}/move')
+def _(ctx):
+    return RouteRequest(f'/lists/{ctx.dataset.companies_list_id}/move', json={'after_id': str(ctx.dataset.contacts_list_id)})
+
+
+@case('DELETE /lists/{list_id}')
+def _(ctx):
+    return RouteRequest(f"/lists/{ctx.new_list('Short-lived list')}")
+
+
+@case('POST /lists/{list_id}/columns')
+def _(ctx):
+    return RouteRequest(f"/lists/{ctx.new_list('Column target')}/columns",
+                        json={'key': 'rating', 'name': 'Rating', 'type': 'number'})
+
+
+@case('GET /lists/{list_id}/columns')
+def _(ctx):
+    return RouteRequest(f'/lists/{ctx.dataset.contacts_list_id}/columns')
+
+
+@case('PATCH /columns/{column_id}')
+def _(ctx):
+    return RouteRequest(f"/columns/{ctx.column_id('notes')}", json={'name': 'Remarks'})
+
+
+@case('DELETE /columns/{column_id}')
+def _(ctx):
+    list_id = ctx.new_list('Column removal')
+    column = ctx.call('POST', f'/lists/{list_id}/columns', json={'key': 'legacy', 'name': 'Legacy', 'type': 'text'})
+    return RouteRequest(f"/columns/{column['id']}")
+
+
+# Items and comments
+@case('POST /lists/{list_id}/items')
+def _(ctx):
+    return RouteRequest(f'/lists/{ctx.dataset.contacts_list_id}/items',
+                        json={'title': 'Perf contact', 'values': {'stage': 'lead', 'deal_size': 1200}})
+
+
+@case('GET /lists/{list_id}/items')
+def _(ctx):
+    return RouteRequest(f'/lists/{ctx.dataset.contacts_list_id}/items', params={'limit': 100, 'links': 'true'})
+
+
+@case('GET /items/{item_id}')
+def _(ctx):
+    return RouteRequest(f'/items/{ctx.dataset.contact_ids[0]}')
+
+
+@case('PATCH /items/{item_id}')
+def _(ctx):
+    return RouteRequest(f'/items/{ctx.dataset.contact_ids[1]}', json={'values': {'deal_size': 4200}})
+
+
+@case('POST /items/{item_id}/move')
+def _(ctx):
+    return RouteRequest(f'/items/{ctx.dataset.contact_ids[2]}/move', json={'after_id': str(ctx.dataset.contact_ids[10])})
+
+
+@case('DELETE /items/{item_id}')
+def _(ctx):
+    item = ctx.call('POST', f'/lists/{ctx.dataset.contacts_list_id}/items', json={'title': 'Short-lived contact'})
+    return RouteRequest(f"/items/{item['id']}")
+
+
+@case('POST /items/{item_id}/comments')
+def _(ctx):
+    return RouteRequest(f'/items/{ctx.dataset.contact_ids[0]}/comments', json={'content': 'Perf comment'})
+
+
+@case('GET /items/{item_id}/comments')
+def _(ctx):
+    return RouteRequest(f'/items/{ctx.dataset.contact_ids[0]}/comments')
+
+
+@case('DELETE /comments/{comment_id}')
+def _(ctx):
+    comment = ctx.call('POST', f'/items/{ctx.dataset.contact_ids[3]}/comments', json={'content': 'Short-lived'})
+    return RouteRequest(f"/comments/{comment['id']}")
+
+
+# Background jobs
+@case('GET /workspaces/{workspace_id}/jobs')
+def _(ctx):
+    return RouteRequest(f'/workspaces/{ctx.dataset.workspace_id}/jobs')
+
+
+@case('GET /jobs/{job_id}')
+def _(ctx):
+    return RouteRequest(f'/jobs/{ctx.finished_job()}')
+
+
+@case('POST /jobs/{job_id}/resume')
+def _(ctx):
+    job_id = ctx.finished_job()
+    db = ctx.session_factory()
+    try:
+        db.query(BackgroundJob).filter(BackgroundJob.id == job_id).update({'status': 'failed'})
+        db.commit()
+    finally:
+        db.close()
+    return RouteRequest(f'/jobs/{job_id}/resume')
+
+
+# Relationships and links
+@case('POST /lists/{list_id}/relationships')
+def _(ctx):
+    return RouteRequest(f'/lists/{ctx.dataset.companies_list_id}/relationships', json={
+        'name': 'contacts', 'target_list_id': str(ctx.dataset.contacts_list_id), 'relationship_type': 'many_to_many'
+    })
+
+
+@case('GET /lists/{list_id}/relationships')
+def _(ctx):
+    return RouteRequest(f'/lists/{ctx.dataset.contacts_list_id}/relationships')
+
+
+@case('DELETE /relationships/{relationship_id}')
+def _(ctx):
+    relationship = ctx.call('POST', f'/lists/{ctx.new_list("Relationship source")}/relationships', json={
+        'name': 'companies', 'target_list_id': str(ctx.dataset.companies_list_id), 'relationship_type': 'many_to_many'
+    })
+    return RouteRequest(f"/relationships/{relationship['id']}")
+
+
+@case('POST /relationships/{relationship_id}/links')
+def _(ctx):
+    return RouteRequest(f'/relationships/{ctx.dataset.relationship_id}/links', json={
+        'source_item_id': str(ctx.dataset.contact_ids[0]), 'target_item_id': ctx.new_company('Single link target')
+    })
+
+
+@case('POST /relationships/{relationship_id}/links/bulk')
+def _(ctx):
+    company = ctx.new_company('Bulk link target')
+    return RouteRequest(f'/relationships/{ctx.dataset.relationship_id}/links/bulk', json={'links': [
+        {'source_item_id': str(contact), 'target_item_id': company} for contact in ctx.dataset.contact_ids[:50]
+    ]})
+
+
+@case('POST /relationships/{relationship_id}/links/bulk-delete')
+def _(ctx):
+    company = ctx.new_company('Bulk unlink target')
+    body = {'links': [
+        {'source_item_id': str(contact), 'target_item_id': company} for contact in ctx.dataset.contact_ids[50:100]
+    ]}
+    ctx.call('POST', f'/relationships/{ctx.dataset.relationship_id}/links/bulk', json=body)
+    return RouteRequest(f'/relationships/{ctx.dataset.relationship_id}/links/bulk-delete', json=body)
+
+
+@case('PUT /relationships/{relationship_id}/items/{item_id}/links')
+def _(ctx):
+    targets = [str(company) for company in ctx.dataset.company_ids[:3]]
+    return RouteRequest(f'/relationships/{ctx.dataset.relationship_id}/items/{ctx.dataset.contact_ids[4]}/links',
+                        json={'target_item_ids': targets})
+
+
+@case('GET /relationships/{relationship_id}/links')
+def _(ctx):
+    return RouteRequest(f'/relationships/{ctx.dataset.relationship_id}/links')
+
+
+@case('DELETE /links/{link_id}')
+def _(ctx):
+    link = ctx.call('POST', f'/relationships/{ctx.dataset.relationship_id}/links', json={
+        'source_item_id': str(ctx.dataset.contact_ids[5]), 'target_item_id': ctx.new_company('Unlink target')
+    })
+    return RouteRequest(f"/links/{link['id']}")
+
+
+@case('GET /items/{item_id}/graph')
+def _(ctx):
+    return RouteRequest(f'/items/{ctx.dataset.contact_ids[0]}/graph', params={'depth': 2})
+
+
+# Audit
+@case('GET /workspaces/{workspace_id}/audit')
+def _(ctx):
+    return RouteRequest(f'/workspaces/{ctx.dataset.workspace_id}/audit', params={'limit': 100})
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from api_gateway import admin
+from shared import auth, invalidation
+from shared.database import get_db
+from shared.settings import Settings
+
+
+def test_deactivating_a_user_evicts_their_cached_status(monkeypatch):
+    """The deactivation commits an invalidation that drops the user's cached active status"""
+    monkeypatch.setattr(admin, 'get_settings', lambda: Settings(admin_token='secret'))
+    user = SimpleNamespace(id=uuid4(), email='user@example.com', is_active=True)
+    workspace_id = uuid4()
+    added = []
+    db = SimpleNamespace(
+        info={}, get=lambda model, user_id: user if user_id == user.id else None, commit=lambda: None,
+        execute=lambda statement: SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: [workspace_id])),
+        add_all=added.extend
+    )
+    app = FastAPI()
+    app.include_router(admin.router)
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    assert client.post(f'/admin/users/{user.id}/deactivate').status_code == 403
+    assert client.post(f'/admin/users/{uuid4()}/deactivate', headers={'Authorization': 'Bearer secret'}).status_code == 404
+    auth._active_users.set(str(user.id), True)
+    response = client.post(f'/admin/users/{user.id}/deactivate', headers={'Authorization': 'Bearer secret'})
+    assert response.json() == {'id': str(user.id), 'is_active': False} and user.is_active is False
+    assert [(entry.workspace_id, entry.action, entry.entity_id) for entry in added] == [
+        (workspace_id, 'user.deactivated', user.id)
+    ]
+    # What the after_commit hook does with the pending invalidation
+    for (entity, entity_id), version in db.info.pop('invalidations').items():
+        invalidation._dispatch(entity, entity_id, version, True)
+    assert auth._active_users.get(str(user.id)) is None
+
+
+def test_bearer_token_check():
+    admin.require_bearer_token('Bearer secret', 'secret', 'denied')
+    for authorization, token in (('Bearer wrong', 'secret'), (None, 'secret'), ('Bearer ', None), ('Bearer ü', 'secret')):
+        with pytest.raises(HTTPException):
+            admin.require_bearer_token(authorization, token, 'denied')
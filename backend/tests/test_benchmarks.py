@@ -0,0 +1,79 @@
+import random
+
+from benchmarks.__main__ import compare, summarize
+from benchmarks.generator import _Ids
+
+
+def test_ids_are_deterministic_per_seed():
+    first, second = _Ids(random.Random(7)), _Ids(random.Random(7))
+    assert [first() for _ in range(5)] == [second() for _ in range(5)]
+    assert _Ids(random.Random(8))() != _Ids(random.Random(7))()
+
+
+def test_summarize_reports_milliseconds_and_worst_query_count():
+    result = summarize([0.001 * n for n in range(1, 21)], [3, 3, 4])
+    assert result['runs'] == 20
+    assert result['min_ms'] == 1.0
+    assert result['median_ms'] == 10.5
+    assert result['p95_ms'] == 19.0
+    assert result['queries'] == 4
+
+
+def test_compare_flags_slower_scenarios_and_extra_queries():
+    def run(**medians):
+        return {'scenarios': {name: {'median_ms': ms, 'queries': q} for name, (ms, q) in medians.items()}}
+
+    old = run(a=(10.0, 2), b=(10.0, 2), c=(10.0, 2), gone=(1.0, 1))
+    new = run(a=(12.0, 2), b=(8.0, 2), c=(10.0, 3), added=(1.0, 1))
+    verdicts = {row['scenario']: row['verdict'] for row in compare(old, new, threshold=0.1)}
+    assert verdicts == {'a': 'slower', 'b': 'faster', 'c': 'slower', 'gone': 'removed', 'added': 'added'}
+
+
+def test_load_report_checks_endpoints_against_slos():
+    from benchmarks.load import Recorder, Slo
+
+    recorder = Recorder()
+    for ms in range(1, 101):
+        recorder.record('GET /fast', ms / 10000, 200)
+        recorder.record('GET /slow', ms / 1000, 200 if ms <= 95 else 500)
+    slos = {'GET /fast': Slo(p95_ms=50, p99_ms=100), 'GET /slow': Slo(p95_ms=50, p99_ms=100)}
+    report = recorder.report(elapsed=10.0, slos=slos)
+
+    assert report['requests'] == 200 and report['rps'] == 20.0
+    assert report['endpoints']['GET /fast']['breaches'] == []
+    slow = report['endpoints']['GET /slow']
+    assert slow['p50_ms'] == 50.0 and slow['error_rate'] == 0.05
+    assert len(slow['breaches']) == 2  # p95 and errors; p99 99ms is within 100
+
+
+def test_pool_wait_is_read_from_metrics_scrapes():
+    from benchmarks.load import histogram_delta, parse_histogram
+
+    def scrape(fast, slow):
+        return '\n'.join([
+            '# TYPE db_pool_wait_seconds histogram',
+            f'db_pool_wait_seconds_bucket{{engine="primary",le="0.001"}} {fast}',
+            f'db_pool_wait_seconds_bucket{{engine="primary",le="0.05"}} {fast + slow}',
+            f'db_pool_wait_seconds_bucket{{engine="primary",le="+Inf"}} {fast + slow}',
+            f'db_pool_wait_seconds_sum{{engine="primary"}} {fast * 0.0005 + slow * 0.04}',
+            f'db_pool_wait_seconds_count{{engine="primary"}} {fast + slow}',
+            'db_pool_wait_seconds_count{engine="replica"} 999',
+        ])
+
+    wait = histogram_delta(
+        parse_histogram(scrape(100, 0), 'db_pool_wait_seconds', engine='primary'),
+        parse_histogram(scrape(190, 10), 'db_pool_wait_seconds', engine='primary'),
+    )
+    assert wait['waits'] == 100
+    assert wait['p99_ms'] == 50.0
+    assert wait['mean_ms'] == 4.45
+
+
+def test_parse_importtime_skips_header():
+    from benchmarks.startup import parse_importtime
+    stderr = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       120 |        120 |   shared.settings',
+        'import time:      4000 |       9000 | api_gateway.main',
+    ])
+    assert parse_importtime(stderr) == [('shared.settings', 120, 120), ('api_gateway.main', 4000, 9000)]
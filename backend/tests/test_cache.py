@@ -0,0 +1,70 @@
+import threading
+import time
+
+from pydantic import BaseModel
+
+from shared.cache import ReadCache
+
+class Row(BaseModel):
+    name: str
+
+    class Config:
+        from_attributes = True
+
+def test_hits_until_workspace_invalidated():
+    """Entries are served from memory until their workspace version is bumped"""
+    cache = ReadCache()
+    loads = []
+    def loader():
+        loads.append(1)
+        return Row(name=f'v{len(loads)}')
+    assert cache.get('list', 'ws', 'a', loader, Row).name == 'v1'
+    assert cache.get('list', 'ws', 'a', loader, Row).name == 'v1'
+    cache.invalidate_workspace('other')
+    assert cache.get('list', 'ws', 'a', loader, Row).name == 'v1'
+    cache.invalidate_workspace('ws')
+    assert cache.get('list', 'ws', 'a', loader, Row).name == 'v2'
+    stats = cache.stats()
+    assert stats['local_hits'] == 2 and stats['misses'] == 2 and stats['hit_ratio'] == 0.5
+
+def test_missing_rows_are_not_cached():
+    """A loader returning None is retried on the next read"""
+    cache = ReadCache()
+    calls = []
+    assert cache.get('list', 'ws', 'a', lambda: calls.append(1), Row) is None
+    assert cache.get('list', 'ws', 'a', lambda: calls.append(1), Row) is None
+    assert len(calls) == 2
+
+def test_concurrent_misses_load_once():
+    """Threads missing the same entry share one loader call"""
+    cache = ReadCache()
+    calls = []
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return [Row(name='x')]
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get('columns', 'ws', 'l', slow_loader, Row, many=True)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(result == [Row(name='x')] for result in results)
+
+def test_item_counts_are_versioned_apart_from_workspace_metadata():
+    """Bumping a workspace's item counts keeps its list snapshots cached"""
+    from shared.cache import item_counts_scope
+    cache = ReadCache()
+    loads = []
+    def loader():
+        loads.append(1)
+        return Row(name=f'v{len(loads)}')
+    assert cache.get('list', 'ws', 'a', loader, Row).name == 'v1'
+    assert cache.get('item_counts', item_counts_scope('ws'), 'ws', loader, Row).name == 'v2'
+    cache.invalidate_workspace(item_counts_scope('ws'))
+    assert cache.get('list', 'ws', 'a', loader, Row).name == 'v1'
+    assert cache.get('item_counts', item_counts_scope('ws'), 'ws', loader, Row).name == 'v3'
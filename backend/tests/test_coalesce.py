@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List
+from uuid import uuid4
+
+import pytest
+from pydantic import TypeAdapter
+
+from shared.coalesce import Coalescer
+from shared.schemas import ColumnResponse
+
+def test_concurrent_identical_calls_share_one_run():
+    """Callers with the same key await the leader instead of running again"""
+    coalescer = Coalescer()
+    runs = []
+    def produce():
+        runs.append(threading.get_ident())
+        time.sleep(0.05)
+        return b'body'
+    async def main():
+        return await asyncio.gather(*(coalescer.run('k', produce) for _ in range(10)))
+    assert asyncio.run(main()) == [b'body'] * 10
+    assert len(runs) == 1
+    assert coalescer.stats == {'leaders': 1, 'followers': 9}
+
+def test_leader_errors_reach_followers():
+    """A failing leader fails every request that shared its run"""
+    coalescer = Coalescer()
+    def produce():
+        time.sleep(0.02)
+        raise ValueError('boom')
+    async def main():
+        return await asyncio.gather(*(coalescer.run('k', produce) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in asyncio.run(main()))
+
+def test_cancelled_leader_does_not_cancel_followers():
+    """A leader whose client goes away leaves the shared run to its followers"""
+    coalescer = Coalescer()
+    def produce():
+        time.sleep(0.05)
+        return b'body'
+    async def main():
+        leader = asyncio.ensure_future(coalescer.run('k', produce))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(coalescer.run('k', produce)) for _ in range(2)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.gather(leader, *followers, return_exceptions=True)
+    leader, *followers = asyncio.run(main())
+    assert isinstance(leader, asyncio.CancelledError)
+    assert followers == [b'body', b'body']
+    assert coalescer.stats == {'leaders': 1, 'followers': 2}
+
+def test_rendering_accepts_orm_rows():
+    """Bodies are rendered from ORM-style objects through the response model"""
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    row = SimpleNamespace(
+        id=uuid4(), list_id=uuid4(), key='k', name='K', type='text', position=1,
+        is_required=False, is_unique=False, config={}, created_at=now, updated_at=now
+    )
+    adapter = TypeAdapter(List[ColumnResponse])
+    body = adapter.dump_json(adapter.validate_python([row], from_attributes=True))
+    assert b'"key":"k"' in body
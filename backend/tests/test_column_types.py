@@ -0,0 +1,37 @@
+import pytest
+from shared.column_types import convert_value
+
+def test_text_to_number():
+    """Numeric strings convert to ints or floats"""
+    assert convert_value('number', '1,250') == 1250
+    assert convert_value('number', ' 3.5 ') == 3.5
+    assert convert_value('number', 7) == 7
+
+def test_text_to_date():
+    """ISO dates and datetimes convert to YYYY-MM-DD"""
+    assert convert_value('date', '2026-02-15') == '2026-02-15'
+    assert convert_value('date', '2026-02-15T10:30:00+07:00') == '2026-02-15'
+
+def test_empty_values_become_none():
+    """Blank cells convert to None for every type"""
+    assert convert_value('number', '  ') is None
+    assert convert_value('date', None) is None
+
+def test_select_checks_options():
+    """Select values must be one of the configured options"""
+    config = {'options': ['Lead', {'value': 'Client'}]}
+    assert convert_value('select', 'Client', config) == 'Client'
+    with pytest.raises(ValueError):
+        convert_value('select', 'Vendor', config)
+
+@pytest.mark.parametrize('column_type,value', [
+    ('number', 'twelve'),
+    ('number', True),
+    ('date', 'next week'),
+    ('email', 'not-an-email'),
+    ('checkbox', 'maybe'),
+])
+def test_unconvertible_values_raise(column_type, value):
+    """Values that cannot be represented in the new type raise ValueError"""
+    with pytest.raises(ValueError):
+        convert_value(column_type, value)
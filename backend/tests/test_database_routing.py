@@ -0,0 +1,92 @@
+import json
+
+from sqlalchemy import create_engine, event, text, update
+
+from shared import database
+from shared.models import List as ListModel
+
+
+class _Engines:
+    """Two in-memory stand-ins for the primary and the replica that record what they run"""
+
+    def __init__(self, monkeypatch):
+        self.primary = create_engine('sqlite://')
+        self.replica = create_engine('sqlite://')
+        self.ran = []
+        for name, eng in (('primary', self.primary), ('replica', self.replica)):
+            event.listen(eng, 'before_cursor_execute', lambda *args, name=name: self.ran.append(name))
+        monkeypatch.setattr(database, '_engines', (self.primary, self.replica))
+        monkeypatch.setattr(database, '_bus_connected', True)
+
+    def session(self, read_only=True, user_id=None):
+        db = database.RoutingSession(bind=self.primary)
+        db.info['read_only'] = read_only
+        if user_id is not None:
+            database.bind_user(db, user_id)
+        return db
+
+
+def test_read_only_sessions_read_from_replica(monkeypatch):
+    engines = _Engines(monkeypatch)
+    engines.session().execute(text('SELECT 1'))
+    engines.session(read_only=False).execute(text('SELECT 1'))
+    assert engines.ran == ['replica', 'primary']
+
+
+def test_writes_go_to_primary_and_pin_the_session(monkeypatch):
+    engines = _Engines(monkeypatch)
+    db = engines.session()
+    bind = db.get_bind(clause=update(ListModel).values(name='x'))
+    assert bind is engines.primary
+    db.execute(text('SELECT 1'))
+    assert engines.ran == ['primary']
+
+
+def test_cache_fills_read_primary(monkeypatch):
+    engines = _Engines(monkeypatch)
+    with database.use_primary():
+        engines.session().execute(text('SELECT 1'))
+    assert engines.ran == ['primary']
+
+
+def test_recent_writers_read_their_writes(monkeypatch):
+    engines = _Engines(monkeypatch)
+    database._on_writer('writer-1', None, True)
+    engines.session(user_id='writer-1').execute(text('SELECT 1'))
+    engines.session(user_id='someone-else').execute(text('SELECT 1'))
+    assert engines.ran == ['primary', 'replica']
+
+
+def test_no_replica_reads_while_bus_is_down(monkeypatch):
+    engines = _Engines(monkeypatch)
+    monkeypatch.setattr(database, '_bus_connected', False)
+    engines.session().execute(text('SELECT 1'))
+    assert engines.ran == ['primary']
+
+def test_prepared_statements_only_for_psycopg3():
+    """DB_PREPARED_STATEMENTS sets psycopg 3's prepare_threshold; psycopg2 gets no extra options"""
+    assert database._connect_args('postgresql+psycopg://u:p@h/db', True)['prepare_threshold'] == database.PREPARE_THRESHOLD
+    assert database._connect_args('postgresql+psycopg://u:p@h/db', False)['prepare_threshold'] is None
+    assert database._connect_args('postgresql://u:p@h/db', True) == {'connect_timeout': 10}
+
+
+def test_writer_is_notified_when_commit_does_the_flush(monkeypatch):
+    """A write first flushed by commit() still sends the 'writer' NOTIFY to other workers"""
+    from sqlalchemy import Column, Integer, String
+    from sqlalchemy.orm import declarative_base
+    Base = declarative_base()
+
+    class Row(Base):
+        __tablename__ = 'rows'
+        id = Column(Integer, primary_key=True)
+        name = Column(String)
+
+    engines = _Engines(monkeypatch)
+    notified = []
+    event.listen(engines.primary, 'connect',
+                 lambda conn, record: conn.create_function('pg_notify', 2, lambda channel, payload: notified.append(payload)))
+    Base.metadata.create_all(engines.primary)
+    db = engines.session(read_only=False, user_id='u1')
+    db.add(Row(name='x'))
+    db.commit()
+    assert [json.loads(payload)['entity'] for payload in notified] == ['writer']
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+from shared.derived import DerivedColumn
+
+OWNERS, PROPERTIES = uuid4(), uuid4()
+RELATIONSHIP = SimpleNamespace(id=uuid4(), list_id=OWNERS, target_list_id=PROPERTIES)
+
+def make_derived(list_id, type, target_type=None, **config):
+    column = SimpleNamespace(id=uuid4(), list_id=list_id, key='derived', type=type, config=config)
+    return DerivedColumn(column, RELATIONSHIP, target_type)
+
+def test_direction_follows_column_list():
+    """Columns on the relationship's list follow links forward, on the target list backward"""
+    forward = make_derived(OWNERS, 'rollup', aggregate='count')
+    backward = make_derived(PROPERTIES, 'lookup')
+    assert forward.forward and forward.target_list_id == PROPERTIES
+    assert not backward.forward and backward.target_list_id == OWNERS
+    assert 'l.target_item_id = s.id' in backward._refresh_sql("SELECT 1")
+
+def test_depends_on():
+    """Only edits to the looked-up field refresh a derived column; counts never depend on values"""
+    lookup = make_derived(PROPERTIES, 'lookup', target_column='name')
+    title = make_derived(PROPERTIES, 'lookup')
+    count = make_derived(OWNERS, 'rollup', aggregate='count')
+    assert lookup.depends_on(['name']) and not lookup.depends_on(['phone'])
+    assert title.depends_on([], title_changed=True) and not title.depends_on(['name'])
+    assert not count.depends_on(['name'], title_changed=True)
+
+def test_numeric_rollups_ignore_non_numbers():
+    """Number rollups aggregate numerically and skip values of other JSON types"""
+    total = make_derived(OWNERS, 'rollup', 'number', aggregate='sum', target_column='rent')
+    latest = make_derived(OWNERS, 'rollup', 'date', aggregate='max', target_column='listed_on')
+    assert "jsonb_typeof" in total._value_sql() and "sum(" in total._value_sql()
+    assert latest._value_sql() == "to_jsonb(max(t.values ->> :target_key))"
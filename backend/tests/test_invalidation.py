@@ -0,0 +1,63 @@
+import json
+from types import SimpleNamespace
+
+from shared import invalidation
+from shared.cache import LocalCache
+
+def test_publish_dedupes_per_transaction():
+    """Repeated changes to one entity in a transaction send one notification, keeping the latest version"""
+    db = SimpleNamespace(info={})
+    invalidation.publish(db, 'list_schema', 'a', 1)
+    invalidation.publish(db, 'list_schema', 'a', 2)
+    invalidation.publish(db, 'workspace', 'w')
+    invalidation.publish(db, 'workspace', 'w')
+    assert db.info['invalidations'] == {('list_schema', 'a'): 2, ('workspace', 'w'): None}
+
+def test_listener_dispatches_other_processes_only():
+    """Notifications from this process were applied at commit and are skipped by the listener"""
+    seen = []
+    invalidation.subscribe('test_entity', lambda entity_id, version, local: seen.append((entity_id, version, local)))
+    listener = invalidation.InvalidationListener(engine=None)
+    listener._handle(json.dumps({'entity': 'test_entity', 'id': 'x', 'version': 3, 'origin': 'elsewhere:1'}))
+    listener._handle(json.dumps({'entity': 'test_entity', 'id': 'y', 'version': 4, 'origin': invalidation._origin}))
+    listener._handle('not json')
+    assert seen == [('x', 3, False)]
+
+def test_local_cache_evicts_matching_keys():
+    """Evicting a workspace drops only that workspace's entries"""
+    local = LocalCache()
+    local.set(('w1', 'u1'), 'a')
+    local.set(('w2', 'u1'), 'b')
+    local.evict(lambda key: key[0] == 'w1')
+    assert local.get(('w1', 'u1')) is None and local.get(('w2', 'u1')) == 'b'
+
+def test_listener_receives_through_psycopg3_notify_handlers():
+    """psycopg 3 connections have no poll(); notifications reach the listener through add_notify_handler"""
+    class Cursor:
+        def __init__(self, conn):
+            self.conn = conn
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            return False
+        def execute(self, sql):
+            if sql == 'SELECT 1':
+                for handler in self.conn.handlers:
+                    handler(SimpleNamespace(payload=json.dumps({'entity': 'test_entity3', 'id': 'z', 'version': None, 'origin': 'elsewhere:2'})))
+
+    class Connection:
+        autocommit = False
+        def __init__(self):
+            self.handlers = []
+        def add_notify_handler(self, handler):
+            self.handlers.append(handler)
+        def cursor(self):
+            return Cursor(self)
+
+    conn = Connection()
+    engine = SimpleNamespace(raw_connection=lambda: SimpleNamespace(detach=lambda: None, dbapi_connection=conn))
+    seen = []
+    invalidation.subscribe('test_entity3', lambda entity_id, version, local: seen.append(entity_id))
+    listener = invalidation.InvalidationListener(engine)
+    listener._receive(listener._connect())
+    assert conn.autocommit and seen == ['z']
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from services.job.service import requeue_job
+
+class FakeSession:
+    def __init__(self, job, dialect='postgresql', lock_free=False):
+        self.job = job
+        self.dialect = dialect
+        self.lock_free = lock_free
+        self.committed = False
+
+    def query(self, *entities):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def first(self):
+        return self.job
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name=self.dialect))
+
+    def execute(self, statement, params):
+        return SimpleNamespace(scalar=lambda: self.lock_free)
+
+    def commit(self):
+        self.committed = True
+
+    def refresh(self, obj):
+        pass
+
+def _job(status):
+    return SimpleNamespace(id=uuid4(), status=status, finished_at=None)
+
+def test_requeue_rejects_a_running_job():
+    """A job a worker still holds stays running instead of being marked queued"""
+    for db in (FakeSession(_job('running')), FakeSession(_job('running'), dialect='sqlite', lock_free=True)):
+        with pytest.raises(ValueError):
+            requeue_job(db, db.job.id)
+        assert db.job.status == 'running' and not db.committed
+
+def test_requeue_resumes_failed_and_abandoned_jobs():
+    """Failed jobs and running rows whose worker is gone are queued again"""
+    for db in (FakeSession(_job('failed')), FakeSession(_job('running'), lock_free=True)):
+        assert requeue_job(db, db.job.id).status == 'queued'
+        assert db.committed
@@ -0,0 +1,64 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from shared.metrics import CollectedCounter, Histogram, MetricsMiddleware, QUERY_LATENCY, REQUEST_LATENCY, observe_query, registry, render
+
+
+def _detached(metric):
+    registry.remove(metric)
+    return metric
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = _detached(Histogram('t_latency_seconds', 'test', ('route',), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, route='/x')
+    text = histogram.render()
+    assert 't_latency_seconds_bucket{route="/x",le="0.1"} 1.0' in text
+    assert 't_latency_seconds_bucket{route="/x",le="1.0"} 2.0' in text
+    assert 't_latency_seconds_bucket{route="/x",le="+Inf"} 3.0' in text
+    assert 't_latency_seconds_count{route="/x"} 3.0' in text
+
+
+def test_collected_values_are_read_on_scrape():
+    counter = _detached(CollectedCounter('t_total', 'test', ('result',)))
+    counter.add_collector(lambda: {('hit',): 7})
+    counter.add_collector(lambda: 1 / 0)  # a broken source is skipped
+    assert '# TYPE t_total counter' in counter.render()
+    assert 't_total{result="hit"} 7.0' in counter.render()
+
+
+def test_requests_are_recorded_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get('/things/{thing_id}')
+    def thing(thing_id: int):
+        return {}
+
+    client = TestClient(app)
+    client.get('/things/1')
+    client.get('/things/2')
+    client.get('/nowhere')
+    samples = {(name, labels): value for name, labels, value in REQUEST_LATENCY.samples()}
+    assert samples[('http_request_duration_seconds_count', '{method="GET",route="/things/{thing_id}",status="200"}')] >= 2
+    assert ('http_request_duration_seconds_count', '{method="GET",route="<unmatched>",status="404"}') in samples
+
+
+def test_queries_are_labelled_by_statement_type():
+    observe_query('  UPDATE items SET x = 1', 0.01)
+    observe_query('SAVEPOINT sa_1', 0.01)
+    text = QUERY_LATENCY.render()
+    assert 'type="update"' in text and 'type="other"' in text
+    assert render().endswith('\n')
+
+
+def test_queue_depth_is_read_once_per_interval(monkeypatch):
+    """Scrapes in quick succession do not each query Redis and the database"""
+    from shared import jobs
+    reads = []
+    monkeypatch.setattr(jobs, '_read_queue_depth', lambda: reads.append(1) or {('default', 'queued'): len(reads)})
+    monkeypatch.setattr(jobs, '_queue_depth_cache', None)
+    assert jobs._queue_depth() == jobs._queue_depth() == {('default', 'queued'): 1}
+    monkeypatch.setattr(jobs, '_queue_depth_cache', (0.0, {}))
+    assert jobs._queue_depth() == {('default', 'queued'): 2}
@@ -0,0 +1,52 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api_gateway import profiler as profiler_module
+from api_gateway.profiler import PROFILE_HEADER, ProfilerMiddleware, SamplingProfiler
+
+
+def _spin_for_profile(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _client(monkeypatch) -> TestClient:
+    monkeypatch.setattr(profiler_module, 'PROFILER_TOKEN', 'secret')
+    monkeypatch.setattr(profiler_module, 'PROFILE_SAMPLE_RATE', 0.0)
+    monkeypatch.setattr(profiler_module, 'profiler', SamplingProfiler(interval=0.001))
+    app = FastAPI()
+    app.add_middleware(ProfilerMiddleware)
+
+    @app.get('/slow/{n}')
+    def slow(n: int):
+        _spin_for_profile(0.1)
+        return {}
+
+    return TestClient(app)
+
+
+def test_requests_with_the_header_are_profiled_per_route(monkeypatch):
+    client = _client(monkeypatch)
+    client.get('/slow/1', headers={PROFILE_HEADER: 'secret'})
+    summary = profiler_module.profiler.summary()
+    assert summary['GET /slow/{n}']['requests'] == 1
+    assert summary['GET /slow/{n}']['samples'] > 0
+    folded = profiler_module.profiler.folded('GET /slow/{n}')
+    assert 'test_profiler:_spin_for_profile' in folded
+
+
+def test_other_requests_are_not_profiled(monkeypatch):
+    client = _client(monkeypatch)
+    client.get('/slow/1')
+    client.get('/slow/1', headers={PROFILE_HEADER: 'wrong'})
+    assert profiler_module.profiler.summary() == {}
+
+
+def test_profiles_dump_to_disk(monkeypatch, tmp_path):
+    client = _client(monkeypatch)
+    client.get('/slow/2', headers={PROFILE_HEADER: 'secret'})
+    profiler_module.profiler.dump(str(tmp_path))
+    assert (tmp_path / 'GET_slow_n.folded').read_text().strip()
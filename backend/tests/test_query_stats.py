@@ -0,0 +1,83 @@
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from shared import query_stats
+from shared.query_stats import QueryBudgetExceeded, QueryStatsMiddleware, attach, count_queries, query_budget
+
+engine = create_engine('sqlite://')
+
+
+def _app(queries: int, budget) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    def get_session(request: Request):
+        db = Session(bind=engine)
+        attach(db, request)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get('/things/{n}', dependencies=[Depends(query_budget(budget))])
+    def things(n: int, db: Session = Depends(get_session)):
+        for i in range(queries):
+            db.execute(text('SELECT :i'), {'i': i % 2})
+        return {'ok': True}
+
+    return app
+
+
+def test_session_statements_are_counted():
+    db = Session(bind=engine)
+    stats = attach(db)
+    for i in (1, 2, 1):
+        db.execute(text('SELECT :i'), {'i': i})
+    db.close()
+    assert stats.count == 3
+    assert stats.duplicates == 1
+    assert stats.repeated(threshold=3) == {'SELECT ?': 3}
+    assert 'desc="3 queries"' in stats.server_timing()
+
+
+def test_count_queries_measures_an_endpoint():
+    client = TestClient(_app(queries=2, budget=2))
+    with count_queries() as stats:
+        assert client.get('/things/1').status_code == 200
+    assert stats.count <= 2
+
+
+def test_over_budget_raises_in_raise_mode(monkeypatch):
+    monkeypatch.setattr(query_stats, 'QUERY_BUDGET_MODE', 'raise')
+    client = TestClient(_app(queries=3, budget=2))
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/things/1')
+
+
+def test_debug_mode_adds_server_timing(monkeypatch):
+    monkeypatch.setattr(query_stats, 'QUERY_DEBUG', True)
+    response = TestClient(_app(queries=2, budget=5)).get('/things/1')
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert 'desc="2 queries"' in response.headers['Server-Timing']
+
+
+def test_list_items_budget_covers_filtered_pages_with_links(monkeypatch):
+    """A full filtered page with links=true runs user, page, counter, estimate, exact count and summaries"""
+    from services.item.routes import _list_items_budget
+    monkeypatch.setattr(query_stats, 'QUERY_BUDGET_MODE', 'raise')
+    client = TestClient(_app(queries=6, budget=_list_items_budget))
+    assert client.get('/things/1', params={'filter': '{"stage": "lead"}', 'links': 'true'}).status_code == 200
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/things/1')
+
+
+def test_list_items_budget_reads_the_links_flag(monkeypatch):
+    """links=false does not add the link summaries to the budget"""
+    from services.item.routes import _list_items_budget
+    monkeypatch.setattr(query_stats, 'QUERY_BUDGET_MODE', 'raise')
+    client = TestClient(_app(queries=7, budget=_list_items_budget))
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/things/1', params={'filter': '{"stage": "lead"}', 'links': 'false'})
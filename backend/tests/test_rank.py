@@ -0,0 +1,60 @@
+import random
+
+import pytest
+from shared.rank import rank_between, rank_sequence, needs_rebalance
+
+def test_first_key_is_short():
+    """An empty scope gets a single-character key"""
+    assert len(rank_between(None, None)) == 1
+
+def test_appends_stay_ordered_and_short():
+    """Repeated appends keep keys ordered without growing them"""
+    keys = [rank_between(None, None)]
+    for _ in range(5000):
+        keys.append(rank_between(keys[-1], None))
+    assert keys == sorted(keys)
+    assert max(len(k) for k in keys) <= 6
+
+def test_prepends_stay_ordered():
+    """Repeated moves to the top keep keys ordered"""
+    keys = [rank_between(None, None)]
+    for _ in range(500):
+        keys.insert(0, rank_between(None, keys[0]))
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+
+def test_random_inserts_stay_ordered():
+    """Inserting between random neighbours always yields a key strictly between them"""
+    rng = random.Random(42)
+    keys = rank_sequence(10)
+    for _ in range(2000):
+        i = rng.randint(0, len(keys))
+        before = keys[i - 1] if i > 0 else None
+        after = keys[i] if i < len(keys) else None
+        key = rank_between(before, after)
+        assert before is None or before < key
+        assert after is None or key < after
+        assert not key.endswith('0')
+        keys.insert(i, key)
+    assert keys == sorted(keys)
+
+def test_repeated_same_gap_triggers_rebalance():
+    """Hammering the same gap grows keys until a rebalance is requested"""
+    low, high = rank_sequence(2)
+    for _ in range(200):
+        high = rank_between(low, high)
+    assert needs_rebalance(high)
+
+def test_sequence_is_sorted_and_unique():
+    """Rebalanced keys are evenly spaced, sorted and unique"""
+    keys = rank_sequence(50000)
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+    assert not any(needs_rebalance(k) for k in keys)
+
+def test_invalid_bounds_rejected():
+    """Bounds out of order or with trailing zeros are rejected"""
+    with pytest.raises(ValueError):
+        rank_between('b', 'a')
+    with pytest.raises(ValueError):
+        rank_between('a0', None)
@@ -0,0 +1,47 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from services.relationship import routes
+from shared.auth import CurrentUser
+from shared.schemas import RelationshipLinkBulk, RelationshipLinkSet
+
+USER = CurrentUser(user_id=uuid4(), email='user@example.com')
+
+def _with_role(monkeypatch, role):
+    relationship = SimpleNamespace(id=uuid4(), list_id=uuid4())
+    monkeypatch.setattr(routes, 'get_relationship', lambda db, relationship_id: relationship)
+    monkeypatch.setattr(routes, 'workspace_of_list', lambda db, list_id: str(uuid4()))
+
+    async def membership(workspace_id, current_user, db):
+        return SimpleNamespace(role=role)
+
+    monkeypatch.setattr(routes, 'get_workspace_membership', membership)
+    return relationship
+
+def test_bulk_link_edits_need_an_editor_role(monkeypatch):
+    """Members without an editor role may not create or delete its links in bulk"""
+    relationship = _with_role(monkeypatch, 'editor')
+    assert asyncio.run(routes._relationship_for_editor(None, relationship.id, USER)) is relationship
+    _with_role(monkeypatch, 'member')
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(routes._relationship_for_editor(None, relationship.id, USER))
+    assert raised.value.status_code == 403
+
+def test_bulk_link_edits_on_a_deleted_list_are_not_found(monkeypatch):
+    relationship = _with_role(monkeypatch, 'owner')
+    monkeypatch.setattr(routes, 'workspace_of_list', lambda db, list_id: None)
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(routes._relationship_for_editor(None, relationship.id, USER))
+    assert raised.value.status_code == 404
+
+def test_bulk_link_batches_are_capped():
+    link = {'source_item_id': str(uuid4()), 'target_item_id': str(uuid4())}
+    with pytest.raises(ValidationError):
+        RelationshipLinkBulk(links=[link] * 5001)
+    with pytest.raises(ValidationError):
+        RelationshipLinkSet(target_item_ids=[uuid4()] * 5001)
@@ -0,0 +1,108 @@
+from uuid import uuid4
+
+import pytest
+from shared.repository import MemoryStore, contains
+from shared.schemas import ItemCreate, ItemUpdate, ItemMove, CommentCreate, ItemResponse, ItemWithLinksResponse
+from shared.validation import UniqueViolation
+from services.item import service
+
+USER = uuid4()
+
+@pytest.fixture
+def store():
+    return MemoryStore()
+
+@pytest.fixture
+def contacts(store):
+    db_list = store.add_list(uuid4(), 'Contacts')
+    store.add_column(db_list.id, 'email', 'Email', 'email', is_unique=True)
+    store.add_column(db_list.id, 'status', 'Status', 'select', config={'options': ['Lead', 'Client']})
+    return db_list
+
+def add(store, db_list, title, **values):
+    return service.create_item(store, db_list.id, ItemCreate(title=title, values=values), USER)
+
+def test_contains_follows_jsonb_semantics():
+    """Containment matches nested objects, array subsets and typed scalars"""
+    value = {'status': 'Lead', 'tags': ['a', 'b'], 'address': {'city': 'Phnom Penh', 'zip': 12000}, 'vip': True}
+    assert contains(value, {'status': 'Lead'})
+    assert contains(value, {'tags': ['b']})
+    assert contains(value, {'address': {'city': 'Phnom Penh'}})
+    assert not contains(value, {'tags': ['c']})
+    assert not contains(value, {'vip': 1})
+    assert not contains(value, {'missing': None})
+    assert contains(['a', 'b'], 'a')
+
+def test_create_list_filter_and_count(store, contacts):
+    """Items come back in rank order, filter by containment and keep the counter"""
+    for i in range(5):
+        add(store, contacts, f'c{i}', email=f'c{i}@x.co', status='Client' if i % 2 else 'Lead')
+    items = service.get_list_items(store, contacts.id)
+    assert [i.title for i in items] == ['c0', 'c1', 'c2', 'c3', 'c4']
+    assert [i.title for i in service.get_list_items(store, contacts.id, limit=2, offset=1)] == ['c1', 'c2']
+    leads = service.get_list_items(store, contacts.id, filters={'status': 'Lead'}, limit=2, offset=1)
+    assert [i.title for i in leads] == ['c2', 'c4']
+    assert service.count_list_items(store, contacts.id) == (5, True)
+    assert service.count_list_items(store, contacts.id, {'status': 'Client'}) == (2, True)
+
+    service.archive_item(store, items[0].id, USER)
+    assert service.count_list_items(store, contacts.id) == (4, True)
+    assert service.get_list_items(store, contacts.id)[0].title == 'c1'
+    assert [a.action for a in store.audit].count('item.create') == 5
+
+def test_item_payload_only_carries_links_when_asked(store, contacts):
+    """Plain item responses keep their fields; link summaries have their own model"""
+    item = add(store, contacts, 'a', email='a@x.co')
+    assert 'links' not in ItemResponse.model_validate(item).model_dump()
+    with_links = ItemWithLinksResponse(**ItemResponse.model_validate(item).model_dump())
+    assert with_links.model_dump()['links'] == []
+
+def test_move_reorders(store, contacts):
+    """Moves place an item between its new neighbours"""
+    a, b, c = (add(store, contacts, t) for t in 'abc')
+    service.move_item(store, c.id, ItemMove(after_id=a.id), USER)
+    assert [i.title for i in service.get_list_items(store, contacts.id)] == ['a', 'c', 'b']
+    service.move_item(store, b.id, ItemMove(), USER)
+    assert [i.title for i in service.get_list_items(store, contacts.id)] == ['b', 'a', 'c']
+    with pytest.raises(ValueError):
+        service.move_item(store, a.id, ItemMove(before_id=uuid4()), USER)
+
+def test_unique_violation_leaves_store_unchanged(store, contacts):
+    """A duplicate in a unique column is rejected and the failed write rolled back"""
+    first = add(store, contacts, 'first', email='a@x.co')
+    second = add(store, contacts, 'second', email='b@x.co')
+    with pytest.raises(UniqueViolation):
+        add(store, contacts, 'dup', email='a@x.co')
+    with pytest.raises(UniqueViolation):
+        service.update_item(store, second.id, ItemUpdate(values={'email': 'a@x.co'}), USER)
+    assert second.values['email'] == 'b@x.co'
+    assert service.count_list_items(store, contacts.id) == (2, True)
+
+    # Archiving frees the value
+    service.archive_item(store, first.id, USER)
+    service.update_item(store, second.id, ItemUpdate(values={'email': 'a@x.co'}), USER)
+    assert service.get_item(store, second.id).values['email'] == 'a@x.co'
+
+def test_comments(store, contacts):
+    """Comments list newest first and can be deleted"""
+    item = add(store, contacts, 'x')
+    first = service.create_comment(store, item.id, CommentCreate(content='one'), USER)
+    service.create_comment(store, item.id, CommentCreate(content='two'), USER)
+    assert [c.content for c in service.get_item_comments(store, item.id)][-1] == 'one'
+    service.delete_comment(store, first.id, USER)
+    assert [c.content for c in service.get_item_comments(store, item.id)] == ['two']
+
+def test_hot_lookups_are_prebuilt_with_bind_parameters():
+    """The cached statements compile once per dialect and take their ids as parameters"""
+    from sqlalchemy.dialects import postgresql
+    from shared import auth, repository
+    dialect = postgresql.dialect()
+    statements = {
+        auth._ACTIVE_USER: {'user_id'},
+        auth._MEMBERSHIP: {'workspace_id', 'user_id'},
+        repository._GET_LIST: {'list_id'},
+        repository._GET_ITEM: {'item_id'},
+        repository._LIVE_ITEMS_MATCHING: {'list_id', 'filters', 'limit', 'offset'},
+    }
+    for statement, names in statements.items():
+        assert names <= set(statement.compile(dialect=dialect).params)
@@ -0,0 +1,21 @@
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from api_gateway.server import worker_count
+from api_gateway.warmup import warm_pool
+from shared.settings import Settings
+
+
+def test_workers_follow_cpus_within_the_connection_budget():
+    assert worker_count(Settings(), cpus=2) == 5
+    assert worker_count(Settings(), cpus=0.1) == 3
+    # 5 + 10 pool connections + 1 listener per worker
+    assert worker_count(Settings(db_max_connections=40), cpus=4) == 2
+    assert worker_count(Settings(db_max_connections=10), cpus=4) == 1
+    assert worker_count(Settings(web_concurrency=6, db_max_connections=10), cpus=1) == 6
+
+
+def test_warm_pool_leaves_connections_idle(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'warm.db'}", poolclass=QueuePool, pool_size=3)
+    assert warm_pool(engine, 3) == 3
+    assert engine.pool.checkedin() == 3 and engine.pool.checkedout() == 0
@@ -0,0 +1,42 @@
+import pytest
+from pydantic import ValidationError
+from fastapi.middleware.cors import CORSMiddleware
+
+from shared import database
+from shared.settings import Settings, get_settings
+
+
+def test_settings_are_read_on_first_use(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '7')
+    monkeypatch.setenv('METRICS_TOKEN', 'abc')
+    get_settings.cache_clear()
+    try:
+        settings = get_settings()
+        assert settings.db_pool_size == 7 and settings.metrics_token == 'abc'
+        assert get_settings() is settings
+    finally:
+        get_settings.cache_clear()
+
+
+def test_create_app_adds_frontend_origin():
+    from api_gateway.main import create_app
+    app = create_app(Settings(frontend_url=' https://example.test '))
+    cors = next(m for m in app.user_middleware if m.cls is CORSMiddleware)
+    assert cors.kwargs['allow_origins'][-1] == 'https://example.test'
+
+
+def test_engine_needs_database_url_only_when_used(monkeypatch):
+    monkeypatch.setattr(database, '_engines', None)
+    monkeypatch.setattr(database, 'get_settings', lambda: Settings(database_url=None))
+    db = database.SessionLocal()
+    with pytest.raises(ValueError):
+        database.get_engine()
+    with pytest.raises(ValueError):
+        db.get_bind()
+    db.close()
+
+
+def test_prepared_statements_need_psycopg3_urls():
+    with pytest.raises(ValidationError, match='postgresql\\+psycopg://'):
+        Settings(database_url='postgresql://u:p@h/db', db_prepared_statements=True)
+    Settings(database_url='postgresql+psycopg://u:p@h/db', db_prepared_statements=True)
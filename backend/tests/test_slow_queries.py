@@ -0,0 +1,68 @@
+from sqlalchemy import create_engine, text
+
+from shared import slow_queries
+from shared.slow_queries import SlowQueryLog, parameter_shape, plan_fingerprint
+
+
+def _plan(node_type, index=None, cost=1.0):
+    return [{'Plan': {
+        'Node Type': 'Limit', 'Total Cost': cost,
+        'Plans': [{'Node Type': node_type, 'Relation Name': 'items', 'Index Name': index,
+                   'Parent Relationship': 'Outer', 'Total Cost': cost, 'Plan Rows': 10}]
+    }}]
+
+
+def test_parameter_shape_hides_values():
+    shape = parameter_shape({'list_id': 'abc', 'ids': ['a', 'b', 'c', 'd', 'e'], 'limit': 100})
+    assert shape == {'list_id': 'str', 'ids': 'str[5]', 'limit': 'int'}
+    assert parameter_shape([{'a': 1}, {'a': 2}], executemany=True) == {'rows': 2, 'row': {'a': 'int'}}
+
+
+def test_plan_fingerprint_ignores_costs_but_not_shape():
+    index_scan = plan_fingerprint(_plan('Index Scan', 'ix_items_list_id'))
+    assert index_scan == plan_fingerprint(_plan('Index Scan', 'ix_items_list_id', cost=900.0))
+    assert index_scan != plan_fingerprint(_plan('Seq Scan'))
+
+
+def test_statements_over_the_threshold_are_recorded(monkeypatch):
+    log = SlowQueryLog(threshold_ms=0, explain=False)
+    monkeypatch.setattr(slow_queries, 'slow_log', log)
+    engine = create_engine('sqlite://')
+    slow_queries.install(engine)
+    with engine.connect() as conn:
+        conn.execute(text('SELECT :x'), {'x': 1})
+        conn.execute(text('SELECT :x'), {'x': 2})
+    [entry] = log.statements()
+    assert entry['count'] == 2
+    assert entry['routes'] == {'<no request>': 2}
+    assert log.statements(route='GET /elsewhere') == []
+
+
+def test_plan_changes_are_flagged():
+    log = SlowQueryLog(threshold_ms=0, explain=False)
+    entry = slow_queries.SlowStatement('SELECT 1')
+    plans = iter([_plan('Index Scan', 'ix_items_list_id'), _plan('Seq Scan')])
+
+    class _Result:
+        def scalar(self):
+            return next(plans)
+
+    class _Conn:
+        info = {}
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            return False
+        def exec_driver_sql(self, sql, parameters):
+            assert sql.startswith('EXPLAIN (FORMAT JSON) ')
+            return _Result()
+
+    class _Engine:
+        def connect(self):
+            return _Conn()
+
+    log.capture_plan(_Engine(), entry, 'SELECT 1', ())
+    assert entry.plan_changes == []
+    log.capture_plan(_Engine(), entry, 'SELECT 1', ())
+    assert len(entry.plan_changes) == 1
+    assert entry.plan_changes[0]['to'] == entry.fingerprint
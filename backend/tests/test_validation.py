@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from shared.validation import compile_validator, ItemValidationError
+from shared.schema_registry import SchemaRegistry
+
+def make_column(key, type='text', is_required=False, config=None):
+    return SimpleNamespace(key=key, type=type, is_required=is_required, is_unique=False, config=config or {})
+
+COLUMNS = [
+    make_column('price', 'number'),
+    make_column('status', 'select', config={'options': ['Lead', 'Client']}),
+    make_column('email', 'email', is_required=True),
+]
+
+def test_validate_coerces_values():
+    """Values are converted to their column's representation"""
+    validator = compile_validator(COLUMNS)
+    values = validator.validate({'price': '1,500', 'status': 'Lead', 'email': 'a@b.co', 'extra': 1})
+    assert values == {'price': 1500, 'status': 'Lead', 'email': 'a@b.co', 'extra': 1}
+
+def test_validate_reports_type_and_option_errors():
+    """Bad types and unknown options are rejected with the offending keys"""
+    validator = compile_validator(COLUMNS)
+    with pytest.raises(ItemValidationError) as exc:
+        validator.validate({'price': 'cheap', 'status': 'Vendor', 'email': 'a@b.co'})
+    assert 'price' in str(exc.value) and 'status' in str(exc.value)
+
+def test_required_keys():
+    """Missing or blank required values are rejected"""
+    validator = compile_validator(COLUMNS)
+    with pytest.raises(ItemValidationError):
+        validator.validate({'price': 1})
+    with pytest.raises(ItemValidationError):
+        validator.check_required({'email': '  '})
+
+def test_conversion_accepts_both_representations():
+    """During a type conversion either the old or the new type is accepted"""
+    column = make_column('size', 'text', config={'conversion': {'to': 'number', 'job_id': 'x'}})
+    validator = compile_validator([column])
+    assert validator.coerce({'size': '42'}) == {'size': 42}
+    assert validator.coerce({'size': 'large'}) == {'size': 'large'}
+
+class FakeSession:
+    """Counts queries made by the registry (columns, then dependent derived columns)"""
+    def __init__(self, columns):
+        self.columns = columns
+        self.queries = 0
+
+    def query(self, *entities):
+        self.queries += 1
+        rows = self.columns if len(entities) == 1 else []
+        chain = SimpleNamespace(all=lambda: rows)
+        chain.filter = chain.join = chain.outerjoin = lambda *args: chain
+        return chain
+
+def test_registry_caches_by_schema_version():
+    """A cached validator is reused until the list's schema version changes"""
+    registry = SchemaRegistry()
+    db = FakeSession(COLUMNS)
+    list_id = uuid4()
+    first = registry.get_validator(db, list_id, 1)
+    assert registry.get_validator(db, list_id, 1) is first
+    assert db.queries == 2
+    assert registry.get_validator(db, list_id, 2) is not first
+    assert db.queries == 4
+
+def test_derived_values_are_not_writable():
+    """Writes to lookup/rollup columns are dropped rather than stored"""
+    validator = compile_validator(COLUMNS + [make_column('owner_count', 'rollup')])
+    assert validator.coerce({'price': 2, 'owner_count': 7}) == {'price': 2}